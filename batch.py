@@ -0,0 +1,246 @@
+"""
+Review label/PDF pairs from disk without the API, for large offline runs.
+
+    uv run python batch.py labels/ --output results.jsonl             # walk a directory tree
+    uv run python batch.py pairs.csv --output results.jsonl           # manifest: image,pdf[,id] columns
+    uv run python batch.py labels/ --output results.jsonl --workers 4 # rerun: skips pairs already in the output
+
+In a directory, a folder holding exactly one image and one PDF is one pair (like the
+nested zips of /bulk); otherwise images and PDFs sharing a file name stem are paired.
+Each worker process loads and warms up its own OCR model once. Results are appended
+to the output as JSON lines as soon as each pair finishes, so an interrupted run picks
+up where it stopped.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+from logic.executor import set_torch_threads
+from logic.review import IMAGE_EXTENSIONS
+
+
+@dataclass(frozen=True)
+class Pair:
+    id: str
+    image: Path
+    pdf: Path
+
+
+def discover_pairs(root: Path) -> tuple[list[Pair], list[str]]:
+    """Pairs found under root, plus a warning for every file that couldn't be paired."""
+    pairs: list[Pair] = []
+    warnings: list[str] = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        folder = Path(directory)
+        images = sorted(name for name in files if name.lower().endswith(IMAGE_EXTENSIONS))
+        pdfs = sorted(name for name in files if name.lower().endswith(".pdf"))
+        if len(images) == 1 and len(pdfs) == 1:
+            matched = [(images[0], pdfs[0])]
+        else:
+            by_stem = {Path(name).stem: name for name in pdfs}
+            matched = [(image, by_stem[Path(image).stem]) for image in images if Path(image).stem in by_stem]
+        paired = {name for pair in matched for name in pair}
+        for image, pdf in matched:
+            relative = (folder / image).relative_to(root)
+            pairs.append(Pair(id=str(relative), image=folder / image, pdf=folder / pdf))
+        for name in images + pdfs:
+            if name not in paired:
+                warnings.append(f"no pair for {(folder / name).relative_to(root)}")
+    return pairs, warnings
+
+
+def read_manifest(path: Path) -> list[Pair]:
+    """
+    A CSV with image and pdf columns, or JSON lines with image and pdf keys; an id
+    column/key is optional. Relative paths are relative to the manifest.
+    """
+    if path.suffix.lower() in (".jsonl", ".ndjson"):
+        with path.open(encoding="utf-8") as handle:
+            rows = [json.loads(line) for line in handle if line.strip()]
+    else:
+        with path.open(encoding="utf-8", newline="") as handle:
+            rows = list(csv.DictReader(handle))
+    pairs = []
+    for number, row in enumerate(rows, start=1):
+        if not row.get("image") or not row.get("pdf"):
+            raise ValueError(f"{path}: entry {number} needs both an image and a pdf")
+        image, pdf = path.parent / row["image"], path.parent / row["pdf"]
+        pairs.append(Pair(id=str(row.get("id") or f"{row['image']}|{row['pdf']}"), image=image, pdf=pdf))
+    return pairs
+
+
+def completed_ids(output: Path) -> set[str]:
+    """Ids already in the output. A line cut short by an interrupted run doesn't count."""
+    if not output.exists():
+        return set()
+    done = set()
+    with output.open(encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+
+def open_output(output: Path) -> IO[str]:
+    """Append to the output, first finishing off a last line an interrupted run left open."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    unterminated = False
+    if output.exists() and output.stat().st_size > 0:
+        with output.open("rb") as existing:
+            existing.seek(-1, os.SEEK_END)
+            unterminated = existing.read(1) != b"\n"
+    handle = output.open("a", encoding="utf-8")
+    if unterminated:
+        handle.write("\n")
+    return handle
+
+
+def init_worker(torch_threads: int) -> None:
+    """Process pool initializer: every worker loads and warms up its own model before taking pairs."""
+    from logic.ocr import OCR
+
+    set_torch_threads(torch_threads)
+    # a worker reviews one pair at a time, there is nothing to batch with
+    OCR.batching = False
+    OCR.warmup()
+
+
+def review_pair(pair: Pair, keep_timings: bool = False) -> dict[str, Any]:
+    """OCR, form reading and rules for one pair, in a worker. Files are read here, not pickled over."""
+    from logic import review as pipeline
+
+    try:
+        response = pipeline.review_label(pair.image.read_bytes(), pair.pdf.read_bytes())
+        if not keep_timings:
+            response.pop("timings", None)
+    except Exception as err:
+        response = pipeline.error_response(err)
+    return {"id": pair.id, "image": str(pair.image), "pdf": str(pair.pdf), **response}
+
+
+def run(
+    pairs: list[Pair],
+    output: Path,
+    *,
+    workers: int = 1,
+    torch_threads: int = 0,
+    keep_timings: bool = False,
+    shared_model: bool = False,
+    progress: IO[str] | None = None,
+) -> Counter:
+    """
+    Review the pairs not yet in output and append one JSON line per pair as it finishes.
+    workers=0 runs everything in this process. With shared_model the model is loaded
+    here and the workers are forked from this process, sharing its weights. Returns the
+    count of each decision written.
+    """
+    done = completed_ids(output)
+    todo = [pair for pair in pairs if pair.id not in done]
+    decisions: Counter = Counter()
+    started = time.perf_counter()
+    if progress:
+        print(f"{len(pairs)} pairs, {len(pairs) - len(todo)} already in {output}, {len(todo)} to review", file=progress)
+
+    def write(result: dict[str, Any]) -> None:
+        handle.write(json.dumps(result) + "\n")
+        handle.flush()
+        decisions[result.get("decision", "unknown")] += 1
+        if progress:
+            rate = sum(decisions.values()) / max(time.perf_counter() - started, 1e-9)
+            print(f"[{sum(decisions.values())}/{len(todo)}] {result['id']}: {result.get('decision')} ({rate:.2f}/s)", file=progress)
+
+    with open_output(output) as handle:
+        if workers == 0:
+            init_worker(torch_threads)
+            for pair in todo:
+                write(review_pair(pair, keep_timings))
+            return decisions
+
+        mp_context = None
+        if shared_model and todo:
+            from logic.ocr import OCR
+
+            OCR.load_for_workers()
+            mp_context = multiprocessing.get_context("fork")
+        pending: set[Future] = set()
+        remaining = iter(todo)
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=mp_context, initializer=init_worker, initargs=(torch_threads,),
+        ) as pool:
+            # a couple of pairs queued per worker keeps them busy without pickling thousands of tasks up front
+            for pair in _take(remaining, 2 * workers):
+                pending.add(pool.submit(review_pair, pair, keep_timings))
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    write(future.result())
+                for pair in _take(remaining, len(finished)):
+                    pending.add(pool.submit(review_pair, pair, keep_timings))
+    return decisions
+
+
+def _take(items: Iterator[Pair], count: int) -> list[Pair]:
+    return [pair for _, pair in zip(range(count), items)]
+
+
+def parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python batch.py", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("source", type=Path, help="directory to walk, or a .csv/.jsonl manifest of image/pdf pairs")
+    parser.add_argument("--output", type=Path, required=True, help="JSON lines file results are appended to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes, each with its own model (default: CPU count; 0 runs in this process)")
+    parser.add_argument("--torch-threads", type=int, default=1,
+                        help="torch intra-op threads per worker (default 1, 0 keeps the torch default)")
+    parser.add_argument("--shared-model", action="store_true",
+                        help="load the model once and fork the workers from this process so they share its weights")
+    parser.add_argument("--timings", action="store_true", help="keep each review's timings block")
+    parser.add_argument("--quiet", action="store_true", help="no per-pair progress on stderr")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.workers < 0:
+        print("--workers must not be negative", file=sys.stderr)
+        return 2
+    if args.source.is_dir():
+        pairs, warnings = discover_pairs(args.source)
+        for warning in warnings:
+            print(f"warning: {warning}", file=sys.stderr)
+    elif args.source.is_file():
+        pairs = read_manifest(args.source)
+    else:
+        print(f"{args.source} is neither a directory nor a manifest file", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    decisions = run(
+        pairs,
+        args.output,
+        workers=args.workers,
+        torch_threads=args.torch_threads,
+        keep_timings=args.timings,
+        shared_model=args.shared_model,
+        progress=None if args.quiet else sys.stderr,
+    )
+    summary = ", ".join(f"{decision}: {count}" for decision, count in sorted(decisions.items())) or "nothing to do"
+    print(f"{sum(decisions.values())} pairs reviewed in {time.perf_counter() - started:.1f}s ({summary})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
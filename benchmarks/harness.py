@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process plus that of its largest finished child, in MB."""
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(peak / divisor, 1)
+
+
+def process_memory_mb(pid: int) -> dict[str, float]:
+    """
+    Resident (rss), proportional (pss: shared pages split between the processes mapping
+    them) and unique (uss: pages no other process maps) memory of a process, in MB.
+    Linux only, read from /proc/<pid>/smaps_rollup.
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as handle:
+        for line in handle:
+            key, _, rest = line.partition(":")
+            if rest.strip().endswith("kB"):
+                fields[key] = int(rest.split()[0])
+    return {
+        "rss": round(fields["Rss"] / 1024, 1),
+        "pss": round(fields["Pss"] / 1024, 1),
+        "uss": round((fields["Private_Clean"] + fields["Private_Dirty"]) / 1024, 1),
+    }
+
+
+@dataclass
+class CaseResult:
+    name: str
+    calls: int
+    errors: int
+    concurrency: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    throughput_per_s: float
+    peak_rss_mb: float
+
+    def as_row(self) -> str:
+        return (
+            f"{self.name:<48} {self.calls:>5} {self.errors:>4} {self.p50_ms:>10.1f} {self.p95_ms:>10.1f} "
+            f"{self.p99_ms:>10.1f} {self.throughput_per_s:>8.2f} {self.peak_rss_mb:>9.1f}"
+        )
+
+    HEADER = (
+        f"{'case':<48} {'calls':>5} {'err':>4} {'p50 ms':>10} {'p95 ms':>10} "
+        f"{'p99 ms':>10} {'req/s':>8} {'rss MB':>9}"
+    )
+
+
+def run_case(
+    name: str,
+    call: Callable[[], Any],
+    *,
+    iterations: int,
+    concurrency: int = 1,
+    warmup: int = 1,
+) -> CaseResult:
+    """
+    Run `call` iterations times from `concurrency` threads and summarise the latencies.
+    A call that raises, or returns False, counts as an error (its latency still counts).
+    """
+    for _ in range(warmup):
+        call()
+
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed() -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = call() is not False
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(timed) for _ in range(iterations)]:
+            future.result()
+    wall = time.perf_counter() - started
+
+    ms = numpy.asarray(latencies) * 1000
+    p50, p95, p99 = numpy.percentile(ms, [50, 95, 99])
+    return CaseResult(
+        name=name,
+        calls=len(latencies),
+        errors=errors,
+        concurrency=concurrency,
+        p50_ms=round(float(p50), 3),
+        p95_ms=round(float(p95), 3),
+        p99_ms=round(float(p99), 3),
+        mean_ms=round(float(ms.mean()), 3),
+        throughput_per_s=round(len(latencies) / wall, 3) if wall > 0 else 0.0,
+        peak_rss_mb=peak_rss_mb(),
+    )
+
+
+def write_results(path: Path, results: list[CaseResult], meta: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"meta": meta, "cases": {result.name: asdict(result) for result in results}}
+    path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+
+def load_results(path: Path) -> dict[str, dict[str, Any]]:
+    return json.loads(path.read_text(encoding="utf-8")).get("cases", {})
+
+
+def find_regressions(
+    results: list[CaseResult],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float,
+) -> list[str]:
+    """
+    Cases whose p50/p95 latency grew, or whose throughput dropped, by more than
+    `threshold` (0.25 = 25%) against the baseline. Cases missing from the baseline are skipped.
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            before, after = base.get(metric, 0.0), getattr(result, metric)
+            if before > 0 and after > before * (1 + threshold):
+                regressions.append(f"{result.name}: {metric} {before:.1f} -> {after:.1f} (+{after / before - 1:.0%})")
+        before, after = base.get("throughput_per_s", 0.0), result.throughput_per_s
+        if before > 0 and after < before * (1 - threshold):
+            regressions.append(f"{result.name}: throughput {before:.2f}/s -> {after:.2f}/s ({after / before - 1:.0%})")
+        if result.errors > base.get("errors", 0):
+            regressions.append(f"{result.name}: errors {base.get('errors', 0)} -> {result.errors}")
+    return regressions
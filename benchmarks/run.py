@@ -0,0 +1,278 @@
+"""
+Replay the tests/fixtures corpus against every endpoint and every pipeline stage and
+report p50/p95/p99 latency, throughput and peak RSS.
+
+    uv run python -m benchmarks.run                       # everything, 3 calls per case
+    uv run python -m benchmarks.run --only stage/ --concurrency 4 --iterations 8
+    uv run python -m benchmarks.run --update-baseline     # record benchmarks/baseline.json
+    uv run python -m benchmarks.run --threshold 0.2       # exit 1 if >20% slower than the baseline
+    uv run python -m benchmarks.run --worker-memory 4     # also: per-worker memory, own vs shared model
+
+The OCR result cache is disabled unless --cache is given, so OCR cases measure the model.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import io
+import json
+import os
+import platform
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.harness import CaseResult, find_regressions, load_results, process_memory_mb, run_case, write_results
+
+FIXTURES = ROOT / "tests" / "fixtures"
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+IMAGES = ("busch.jpg", "jackdaniels.png", "upside_down_angled.png")
+FORMS = ("busch_application.pdf", "f510031.pdf")
+PACKAGES = ("beer_test.zip", "busch_test.zip", "jack_test.zip")
+# fields for the cases that skip the PDF; matches what busch_application.pdf holds
+FIELDS = {"Brand": "BUSCH", "Product Type": "Malt"}
+# untrained detectors from some seeds see thousands of boxes and take minutes per call
+RANDOM_WEIGHTS_SEED = 1
+
+Case = tuple[str, Callable[[], Any]]
+
+
+def use_random_weights() -> None:
+    """
+    Same architectures with randomly initialised weights, for machines that can't download
+    the pretrained ones. Compute per call is the same, the recognised text is not. Seeded,
+    so every process builds the same weights and runs find the same (meaningless) boxes.
+    """
+    import torch
+    from doctr.models import ocr_predictor, page_orientation_predictor
+
+    from logic.ocr import OCR
+
+    def build() -> Any:
+        torch.manual_seed(RANDOM_WEIGHTS_SEED)
+        return ocr_predictor(
+            det_arch="db_resnet50",
+            reco_arch="vitstr_small",
+            pretrained=False,
+            pretrained_backbone=False,
+        )
+
+    def build_orientation() -> Any:
+        torch.manual_seed(RANDOM_WEIGHTS_SEED)
+        return page_orientation_predictor(pretrained=False)
+
+    OCR.model_factory = staticmethod(build)
+    OCR.orientation_model_factory = staticmethod(build_orientation)
+
+
+def bulk_archive() -> bytes:
+    """The *_test.zip packages wrapped in one outer archive, the way /bulk expects them."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as outer:
+        for name in PACKAGES:
+            outer.writestr(name, (FIXTURES / name).read_bytes())
+    return buffer.getvalue()
+
+
+def stage_cases() -> list[Case]:
+    from logic import label_rules
+    from logic.form510031_reader import TTBForm510031Reader
+    from logic.ocr import OCR
+
+    cases: list[Case] = []
+    for image in IMAGES:
+        data = (FIXTURES / image).read_bytes()
+        cases.append((f"stage/ocr/{image}", lambda data=data: OCR(file_contents=data).processed_img is not None))
+    for form in FORMS:
+        data = (FIXTURES / form).read_bytes()
+        # full AcroForm walk vs. only the mapped fields (what reviews use)
+        for mode, mapped_only in (("full", False), ("mapped", True)):
+            cases.append((f"stage/form510031/{mode}/{form}", lambda data=data, mapped_only=mapped_only: (
+                TTBForm510031Reader(data, mapped_only=mapped_only).get_values_by_field_mapping()
+            )))
+
+    fields = TTBForm510031Reader((FIXTURES / "busch_application.pdf").read_bytes()).get_values_by_field_mapping()
+
+    def rules_case(image: str) -> Callable[[], Any]:
+        ocr: list[OCR] = []
+
+        def rules() -> Any:
+            if not ocr:
+                # OCR once (during the warmup call), then time only the rules on fresh copies
+                ocr.append(OCR(file_contents=(FIXTURES / image).read_bytes()))
+            fresh = copy.copy(ocr[0])
+            fresh.findings = list(ocr[0].findings)
+            fresh.text = None
+            fresh.index = None
+            return label_rules.check_rules(fresh, fields)
+
+        return rules
+
+    for image in IMAGES:
+        cases.append((f"stage/check_rules/{image}", rules_case(image)))
+    return cases
+
+
+def endpoint_cases() -> list[Case]:
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    client = TestClient(app)
+    pdf = (FIXTURES / "busch_application.pdf").read_bytes()
+    archive = bulk_archive()
+
+    def ok(response: Any) -> bool:
+        return response.status_code == 200
+
+    cases: list[Case] = []
+    for image in IMAGES:
+        data = (FIXTURES / image).read_bytes()
+        cases.append((f"endpoint/review/{image}", lambda data=data, image=image: ok(client.post(
+            "/review",
+            files={"image_file": (image, data), "pdf_file": ("busch_application.pdf", pdf, "application/pdf")},
+        ))))
+        cases.append((f"endpoint/review_with_fields/{image}", lambda data=data, image=image: ok(client.post(
+            "/review_with_fields",
+            files={"image_file": (image, data)},
+            data={"fields_json": json.dumps(FIELDS)},
+        ))))
+    cases.append(("endpoint/bulk", lambda: ok(client.post(
+        "/bulk", files={"zip_file": ("bench.zip", archive, "application/zip")},
+    ))))
+    cases.append(("endpoint/bulk_stream", lambda: ok(client.post(
+        "/bulk_stream", files={"zip_file": ("bench.zip", archive, "application/zip")},
+    ))))
+    return cases
+
+
+def worker_memory(workers: int, torch_threads: int) -> dict[str, Any]:
+    """
+    Memory of `workers` warmed-up OCR worker processes (OCR_EXECUTOR=process), each
+    loading its own model vs. forked from a parent that loaded it (OCR_SHARED_MODEL).
+    Must run before this process loads the model, or both setups would inherit it.
+    """
+    from logic.executor import ReviewExecutor
+
+    report: dict[str, Any] = {"workers": workers}
+    for mode, shared in (("own_model", False), ("shared_model", True)):
+        executor = ReviewExecutor(workers=workers, kind="process", torch_threads=torch_threads, shared_model=shared)
+        try:
+            # one warmup per worker process, every future is done once all of them are warm
+            for future in executor.warmup():
+                future.result()
+            per_worker = [process_memory_mb(pid) for pid in executor.worker_pids()]
+            report[mode] = {
+                key: round(sum(memory[key] for memory in per_worker) / len(per_worker), 1) for key in ("rss", "pss", "uss")
+            }
+            report[mode]["parent_pss"] = process_memory_mb(os.getpid())["pss"]
+        finally:
+            executor.shutdown()
+    report["uss_saving_per_worker_mb"] = round(report["own_model"]["uss"] - report["shared_model"]["uss"], 1)
+    # pss splits shared pages between the processes mapping them, so it adds up across processes
+    # and counts the copy the parent holds for the workers
+    totals = {mode: report[mode]["parent_pss"] + workers * report[mode]["pss"] for mode in ("own_model", "shared_model")}
+    report["total_saving_mb"] = round(totals["own_model"] - totals["shared_model"], 1)
+    return report
+
+
+def print_worker_memory(report: dict[str, Any]) -> None:
+    title = f"worker memory, {report['workers']} workers (MB per worker)"
+    print(f"{title:<48} {'rss':>8} {'pss':>8} {'uss':>8} {'parent pss':>11}")
+    for mode in ("own_model", "shared_model"):
+        row = report[mode]
+        print(f"{mode:<48} {row['rss']:>8.1f} {row['pss']:>8.1f} {row['uss']:>8.1f} {row['parent_pss']:>11.1f}")
+    saving, own = report["uss_saving_per_worker_mb"], report["own_model"]["uss"]
+    print(f"{'per-worker saving (uss)':<48} {saving:>8.1f} MB ({saving / own:.0%} of a worker with its own model)")
+    print(f"{'total saving (pss of parent and workers)':<48} {report['total_saving_mb']:>8.1f} MB")
+
+
+def parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=1, help="threads issuing calls per case (default 1)")
+    parser.add_argument("--iterations", type=int, default=3, help="timed calls per case (default 3)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed calls per case before timing (default 1)")
+    parser.add_argument("--only", action="append", default=[], help="run cases whose name contains this; repeatable")
+    parser.add_argument("--output", type=Path, help="write this run's results as JSON here")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="write this run to --baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown against the baseline (default 0.25 = 25%%)")
+    parser.add_argument("--cache", action="store_true", help="keep the OCR result cache on")
+    parser.add_argument("--worker-memory", type=int, default=0, metavar="N",
+                        help="measure N worker processes' memory with their own vs. a shared model (Linux)")
+    parser.add_argument("--random-weights", action="store_true", help="use untrained weights (no model download)")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if not args.cache:
+        # must happen before logic.settings is first read
+        os.environ["OCR_CACHE_MAX_MB"] = "0"
+    if args.random_weights:
+        use_random_weights()
+
+    memory_report = None
+    if args.worker_memory:
+        if not Path("/proc/self/smaps_rollup").exists():
+            print("--worker-memory needs /proc/<pid>/smaps_rollup (Linux), skipped", file=sys.stderr)
+        else:
+            # one torch thread per worker, the usual setup when scaling out with processes
+            memory_report = worker_memory(args.worker_memory, torch_threads=1)
+            print_worker_memory(memory_report)
+
+    from logic.ocr import OCR
+
+    cases = stage_cases() + endpoint_cases()
+    if args.only:
+        cases = [(name, call) for name, call in cases if any(part in name for part in args.only)]
+
+    if any(not name.startswith("stage/form510031/") for name, _ in cases):
+        started = time.perf_counter()
+        OCR.warmup()
+        print(f"model loaded and warmed up in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    results: list[CaseResult] = []
+    print(CaseResult.HEADER)
+    for name, call in cases:
+        result = run_case(name, call, iterations=args.iterations, concurrency=args.concurrency, warmup=args.warmup)
+        results.append(result)
+        print(result.as_row(), flush=True)
+
+    meta = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "concurrency": args.concurrency,
+        "iterations": args.iterations,
+        "cache": args.cache,
+        "random_weights": args.random_weights,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    if memory_report:
+        meta["worker_memory"] = memory_report
+    if args.output:
+        write_results(args.output, results, meta)
+    if args.update_baseline:
+        write_results(args.baseline, results, meta)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}, run with --update-baseline to record one")
+        return 0
+
+    regressions = find_regressions(results, load_results(args.baseline), args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from logic.metrics import metrics
+from logic.settings import Settings, get_settings
+
+Scope = dict[str, Any]
+Message = dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class AdmissionRejected(Exception):
+    """A request turned away before any of its work started."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Caps how many review requests are worked on at once.
+
+    Up to `limit` requests hold a slot; up to `queue_size` more wait for one, first come
+    first served, for at most `queue_timeout` seconds. Anything beyond the queue is
+    refused right away with 429, a request that waited too long gets 503. Both carry a
+    Retry-After estimated from how long slots are currently held.
+
+    Lives on the event loop, like the requests it admits.
+    """
+
+    # weight of the newest hold time in the moving average
+    SMOOTHING = 0.2
+
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        # moving average of how long a request holds its slot, seconds
+        self.hold_seconds = 1.0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> AdmissionController:
+        return cls(
+            limit=settings.review_max_in_flight,
+            queue_size=settings.review_queue_size,
+            queue_timeout=settings.review_queue_timeout_s,
+        )
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def retry_after(self) -> int:
+        """Seconds until a slot frees up for a request arriving now, going by recent hold times."""
+        return max(1, math.ceil(self.hold_seconds * (self.waiting + 1) / self.limit))
+
+    async def acquire(self) -> None:
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            return
+        if self.waiting >= self.queue_size:
+            raise AdmissionRejected(429, "Review queue is full", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise AdmissionRejected(
+                503, f"No review slot freed up within {self.queue_timeout:g}s", self.retry_after(),
+            ) from None
+        except BaseException:
+            # cancelled (the client went away) just as a slot was handed over: pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters and waiter.done():
+                self._waiters.remove(waiter)
+
+    def release(self, held_seconds: float | None = None) -> None:
+        if held_seconds is not None:
+            self.hold_seconds += self.SMOOTHING * (held_seconds - self.hold_seconds)
+        # hand the slot straight to the oldest waiter still waiting
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware in front of the review endpoints. It runs before the multipart body
+    is parsed, so a refused request costs nothing but its headers, and the upload limit
+    holds while the body streams in: via Content-Length when the client sends one,
+    otherwise by counting bytes and answering 413 once the limit is passed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        admitted_paths: tuple[str, ...] = ("/review", "/review_with_fields", "/bulk", "/bulk_stream"),
+        bulk_paths: tuple[str, ...] = ("/bulk", "/bulk_stream", "/jobs"),
+    ):
+        self.app = app
+        self.admitted_paths = admitted_paths
+        self.bulk_paths = bulk_paths
+
+    def upload_limit(self, path: str) -> int:
+        settings = get_settings()
+        limit_mb = settings.max_bulk_upload_mb if path in self.bulk_paths else settings.max_upload_mb
+        return limit_mb * 1024 * 1024
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        admitted = path in self.admitted_paths
+        limit = self.upload_limit(path) if admitted or path in self.bulk_paths else 0
+
+        if limit:
+            declared = dict(scope["headers"]).get(b"content-length")
+            if declared is not None and declared.isdigit() and int(declared) > limit:
+                metrics.admissions.inc(outcome="too_large")
+                await self.reply(send, 413, f"Upload larger than {limit // (1024 * 1024)} MB")
+                return
+
+        if not admitted:
+            await self.call_app(scope, receive, send, limit)
+            return
+
+        controller = get_admission_controller()
+        try:
+            await controller.acquire()
+        except AdmissionRejected as err:
+            metrics.admissions.inc(outcome="rejected_full" if err.status_code == 429 else "rejected_timeout")
+            await self.reply(send, err.status_code, err.reason, retry_after=err.retry_after)
+            return
+        metrics.admissions.inc(outcome="admitted")
+        started = time.perf_counter()
+        try:
+            await self.call_app(scope, receive, send, limit)
+        finally:
+            controller.release(time.perf_counter() - started)
+
+    async def call_app(self, scope: Scope, receive: Receive, send: Send, limit: int = 0) -> None:
+        """
+        Run the app; with a limit, answer 413 as soon as the body passes it and tell the
+        app the client went away, dropping whatever it still tries to send.
+        """
+        response_started = False
+        rejected = False
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected, response_started
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if limit and message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    rejected = True
+                    metrics.admissions.inc(outcome="too_large")
+                    if not response_started:
+                        response_started = True
+                        await self.reply(send, 413, f"Upload larger than {limit // (1024 * 1024)} MB")
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if rejected:
+                return
+            response_started = response_started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except Exception:
+            if not rejected:
+                raise
+
+    @staticmethod
+    async def reply(send: Send, status_code: int, reason: str, retry_after: int | None = None) -> None:
+        # same shape as the reviews' own human review responses
+        body = json.dumps({
+            "decision": "Human Review",
+            "confidence": 0.0,
+            "full_text": "",
+            "findings": ["Server busy, try again later" if retry_after is not None else "Upload rejected", reason],
+        }).encode("utf-8")
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(retry_after).encode()))
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+_controller: AdmissionController | None = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController.from_settings(get_settings())
+        return _controller
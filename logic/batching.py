@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable
+
+import numpy
+
+if TYPE_CHECKING:
+    from doctr.io.elements import Document
+
+
+@dataclass
+class _PendingPages:
+    pages: list[numpy.ndarray]
+    future: Future = field(default_factory=Future)
+
+
+class BatchingPredictor:
+    """
+    Micro-batching front for a docTR predictor.
+
+    Callers from any thread hand in their pages and block until their own slice of the
+    result is ready. A single scheduler thread gathers pages from concurrent callers
+    until max_batch_size pages are queued or max_wait_ms has passed since the first
+    one arrived, runs the predictor once on all of them and routes each caller its pages.
+    If the batched call fails, each caller's pages are retried on their own, so only
+    the caller whose pages the predictor can't handle gets the error.
+
+    Only worth it where several threads call the model at once: with a single caller
+    every pass would just wait out max_wait_ms (see OCR.get_batcher).
+    """
+
+    def __init__(self, model: Callable[[list[numpy.ndarray]], Document], max_batch_size: int = 4, max_wait_ms: float = 10.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: queue.Queue[_PendingPages | None] = queue.Queue()
+        self._closed = False
+        # held while checking _closed and queueing, so no pages can land behind the shutdown sentinel
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="ocr-batcher", daemon=True)
+        self._thread.start()
+
+    def __call__(self, pages: list[numpy.ndarray]) -> Document:
+        return self.submit(pages).result()
+
+    def submit(self, pages: list[numpy.ndarray]) -> Future:
+        pending = _PendingPages(pages=list(pages))
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("BatchingPredictor is shut down")
+            self._queue.put(pending)
+        return pending.future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Refuse new pages; what is already queued still runs before the scheduler thread exits."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _collect(self) -> tuple[list[_PendingPages], bool]:
+        """The next batch, and whether shutdown was reached while gathering it."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        page_count = len(first.pages)
+        deadline = time.monotonic() + self.max_wait
+        while page_count < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if pending is None:
+                return batch, True
+            batch.append(pending)
+            page_count += len(pending.pages)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch:
+                self._predict(batch)
+
+    def _predict(self, batch: list[_PendingPages]) -> None:
+        pages = [page for pending in batch for page in pending.pages]
+        try:
+            result = self.model(pages)
+        except BaseException as err:
+            if len(batch) == 1:
+                batch[0].future.set_exception(err)
+                return
+            # one caller's pages may have sunk the batch, find out whose
+            for pending in batch:
+                try:
+                    pending.future.set_result(self.model(pending.pages))
+                except BaseException as single_err:
+                    pending.future.set_exception(single_err)
+            return
+        start = 0
+        for pending in batch:
+            end = start + len(pending.pages)
+            pending.future.set_result(self._slice(result, start, end))
+            start = end
+
+    @staticmethod
+    def _slice(result: Any, start: int, end: int) -> Document:
+        from doctr.io.elements import Document
+
+        return Document(pages=result.pages[start:end])
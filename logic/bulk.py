@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import zipfile
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator
+
+from logic import review as pipeline
+from logic.executor import QueueFullError, get_executor
+from logic.metrics import metrics
+from logic.timings import Timings
+
+
+def skipped_entry(package_name: str) -> dict[str, Any]:
+    response = pipeline.human_review(["Skipped: top-level entry is not a zip file."])
+    response["package"] = package_name
+    return response
+
+
+@dataclass
+class PackageRef:
+    """One top-level entry of a bulk archive: content hashes of its image and PDF, or why it can't be reviewed."""
+
+    index: int
+    name: str
+    image_key: str | None = None
+    pdf_key: str | None = None
+    response: dict[str, Any] | None = None
+
+
+@dataclass
+class ArchiveSummary:
+    """What a bulk archive held and how much work deduplicating identical images and PDFs saved."""
+
+    packages: int = 0
+    not_reviewable: int = 0
+    images: int = 0
+    unique_images: int = 0
+    pdfs: int = 0
+    unique_pdfs: int = 0
+    # packages whose OCR came from the persistent OCR cache rather than the model
+    ocr_cache_hits: int = 0
+
+    @property
+    def image_hits(self) -> int:
+        return self.images - self.unique_images
+
+    @property
+    def pdf_hits(self) -> int:
+        return self.pdfs - self.unique_pdfs
+
+    def count(self, refs: list[PackageRef]) -> None:
+        self.packages = len(refs)
+        reviewable = [ref for ref in refs if ref.response is None]
+        self.not_reviewable = len(refs) - len(reviewable)
+        self.images = self.pdfs = len(reviewable)
+        self.unique_images = len({ref.image_key for ref in reviewable})
+        self.unique_pdfs = len({ref.pdf_key for ref in reviewable})
+
+    def as_dict(self) -> dict[str, Any]:
+        out = asdict(self)
+        out["image_hits"] = self.image_hits
+        out["pdf_hits"] = self.pdf_hits
+        return out
+
+
+def archive_entries(outer_zip: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    return [info for info in outer_zip.infolist() if not info.is_dir()]
+
+
+def fingerprint_archive(outer_zip: zipfile.ZipFile) -> list[PackageRef]:
+    """
+    Hash the image and PDF of every nested package. Only the hashes are kept, so this
+    reads the whole archive once without holding it in memory. Blocking.
+    """
+    refs = []
+    for index, info in enumerate(archive_entries(outer_zip)):
+        name = info.filename
+        if not name.lower().endswith(".zip"):
+            refs.append(PackageRef(index, name, response=skipped_entry(name)))
+            continue
+        try:
+            unpacked = pipeline.unpack_package(name, outer_zip.read(info))
+        except Exception as err:
+            unpacked = pipeline.error_response(err)
+            unpacked["package"] = name
+        if isinstance(unpacked, dict):
+            refs.append(PackageRef(index, name, response=unpacked))
+            continue
+        image_bytes, pdf_bytes = unpacked
+        refs.append(PackageRef(
+            index,
+            name,
+            image_key=hashlib.sha256(image_bytes).hexdigest(),
+            pdf_key=hashlib.sha256(pdf_bytes).hexdigest(),
+        ))
+    return refs
+
+
+async def review_archive(
+    outer_zip: zipfile.ZipFile,
+    *,
+    ordered: bool = True,
+    summary: ArchiveSummary | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Review every nested zip of a bulk archive and yield each package's result as soon as
+    it is ready.
+
+    The archive is fingerprinted first, so each distinct image is OCRed and each distinct
+    PDF is read once, however many packages reuse it; only the rules run per package.
+    Shared results are dropped as soon as the last package using them is done.
+
+    One package per executor worker is kept in flight, so their pages reach the OCR
+    batcher together while only a handful of nested zips sit in memory at a time.
+    With ordered=True results come out in archive order, otherwise in completion order.
+    Raises QueueFullError when the executor has no room, rather than failing package by package.
+    """
+    executor = get_executor()
+    summary = summary if summary is not None else ArchiveSummary()
+    entries = archive_entries(outer_zip)
+    refs = await asyncio.to_thread(fingerprint_archive, outer_zip)
+    summary.count(refs)
+    remaining = Counter(ref.image_key for ref in refs if ref.response is None)
+    remaining.update(ref.pdf_key for ref in refs if ref.response is None)
+    ocr_runs: dict[str, asyncio.Future] = {}
+    form_runs: dict[str, asyncio.Future] = {}
+
+    def shared(runs: dict[str, asyncio.Future], key: str, fn: Any, data: bytes | None) -> tuple[asyncio.Future, bool]:
+        """The run of fn for this payload, started now if no earlier package started it; and whether it was reused."""
+        if key in runs:
+            return runs[key], True
+        runs[key] = asyncio.ensure_future(executor.run(fn, data))
+        return runs[key], False
+
+    def release(runs: dict[str, asyncio.Future], key: str) -> None:
+        remaining[key] -= 1
+        if remaining[key] <= 0:
+            runs.pop(key, None)
+
+    def read_package(ref: PackageRef) -> tuple[bytes, bytes]:
+        return pipeline.unpack_package(ref.name, outer_zip.read(entries[ref.index]))
+
+    async def review_ref(ref: PackageRef) -> dict[str, Any]:
+        timings = Timings()
+        image_bytes = pdf_bytes = None
+        try:
+            if ref.image_key not in ocr_runs or ref.pdf_key not in form_runs:
+                # only the first package with a given image or PDF needs its bytes again
+                with timings.stage("package_read"):
+                    image_bytes, pdf_bytes = await asyncio.to_thread(read_package, ref)
+            ocr_run, ocr_reused = shared(ocr_runs, ref.image_key, pipeline.ocr_label, image_bytes)
+            form_run, form_reused = shared(form_runs, ref.pdf_key, pipeline.read_form, pdf_bytes)
+            del image_bytes, pdf_bytes
+            try:
+                # both awaited, so a failed run's exception is always retrieved
+                ocr, form = await asyncio.gather(
+                    asyncio.shield(ocr_run), asyncio.shield(form_run), return_exceptions=True
+                )
+            finally:
+                release(ocr_runs, ref.image_key)
+                release(form_runs, ref.pdf_key)
+            for outcome in (ocr, form):
+                if isinstance(outcome, (QueueFullError, asyncio.CancelledError)):
+                    raise outcome
+            if isinstance(ocr, BaseException):
+                raise ocr
+            if not ocr_reused and ocr.timings.tags.get("ocr_cache") == "hit":
+                summary.ocr_cache_hits += 1
+            response = await executor.run(pipeline.review_shared, ocr, form, timings, ocr_reused, form_reused)
+        except QueueFullError:
+            # the server is overloaded, not this package: the request as a whole gets the 503
+            raise
+        except Exception as err:
+            response = pipeline.error_response(err)
+        response["package"] = ref.name
+        return response
+
+    pending: dict[asyncio.Future, int] = {}
+    ready: dict[int, dict[str, Any]] = {}
+    next_index = 0
+
+    def collect(done: set[asyncio.Future]) -> None:
+        for future in done:
+            ready[pending.pop(future)] = metrics.record_review(future.result())
+
+    def flush() -> list[dict[str, Any]]:
+        nonlocal next_index
+        if not ordered:
+            out = list(ready.values())
+            ready.clear()
+            return out
+        out = []
+        while next_index in ready:
+            out.append(ready.pop(next_index))
+            next_index += 1
+        return out
+
+    try:
+        for ref in refs:
+            if ref.response is not None:
+                ready[ref.index] = ref.response
+            else:
+                while len(pending) >= executor.workers:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done)
+                pending[asyncio.ensure_future(review_ref(ref))] = ref.index
+            for result in flush():
+                yield result
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            collect(done)
+            for result in flush():
+                yield result
+    finally:
+        # the client went away or something failed: don't leave queued packages behind
+        for future in [*pending, *ocr_runs.values(), *form_runs.values()]:
+            future.cancel()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from logic.settings import Settings, get_settings
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the review executor already holds its maximum amount of work."""
+
+
+def set_torch_threads(torch_threads: int) -> None:
+    """Cap torch's intra-op threads in this process; 0 leaves torch's default."""
+    if torch_threads <= 0:
+        return
+    import torch
+
+    torch.set_num_threads(torch_threads)
+
+
+# set in each worker process by _init_process_worker
+_warmup_barrier: Any = None
+
+
+def _init_process_worker(torch_threads: int, warmup_barrier: Any) -> None:
+    global _warmup_barrier
+    set_torch_threads(torch_threads)
+    _warmup_barrier = warmup_barrier
+
+
+def _warm_process_worker(timeout: float) -> int:
+    """
+    Warm the model in this worker process, then wait for every other worker to do the
+    same. A worker blocked here can't take a second warmup task, so the pool's workers
+    each get exactly one.
+    """
+    from logic.ocr import OCR
+
+    try:
+        OCR.warmup()
+    finally:
+        _warmup_barrier.wait(timeout)
+    return os.getpid()
+
+
+class ReviewExecutor:
+    """
+    Bounded pool that runs the blocking parts of a review (OCR, PDF parsing, rules)
+    off the event loop.
+
+    At most `workers` tasks run at once and at most `queue_depth` more wait for a
+    worker; anything beyond that is refused with QueueFullError so a burst cannot
+    pile up unbounded work (and decoded images) in memory.
+    """
+
+    # how long a process worker waits for the others to finish warming up
+    WARMUP_TIMEOUT: float = 600.0
+
+    def __init__(
+        self,
+        workers: int = 1,
+        kind: str = "thread",
+        torch_threads: int = 0,
+        queue_depth: int = 8,
+        shared_model: bool = False,
+    ):
+        self.workers = workers
+        self.kind = kind
+        self.torch_threads = torch_threads
+        self.queue_depth = queue_depth
+        self.shared_model = shared_model and kind == "process"
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._pool: Executor
+        if kind == "process":
+            mp_context = multiprocessing.get_context()
+            if self.shared_model:
+                # pre-fork: load once here, the forked workers share the weights copy-on-write
+                from logic.ocr import OCR
+
+                OCR.load_for_workers()
+                mp_context = multiprocessing.get_context("fork")
+            # handed to the workers when they start, synchronization primitives can't be pickled into tasks
+            self._warmup_barrier = mp_context.Barrier(workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=mp_context,
+                initializer=_init_process_worker,
+                initargs=(torch_threads, self._warmup_barrier),
+            )
+        else:
+            # torch's intra-op pool is process wide, so threads share one setting
+            set_torch_threads(torch_threads)
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="review")
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> ReviewExecutor:
+        return cls(
+            workers=settings.ocr_workers,
+            kind=settings.ocr_executor,
+            torch_threads=settings.ocr_torch_threads,
+            queue_depth=settings.ocr_queue_depth,
+            shared_model=settings.ocr_shared_model,
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                raise QueueFullError(
+                    f"Review queue is full ({self._in_flight} tasks in flight, capacity {self.capacity})"
+                )
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def warmup(self) -> list[Future]:
+        """
+        Load and warm the OCR model where reviews will run: once for the thread pool
+        (threads share the model), once in every worker process otherwise. All the
+        futures are done only once every worker is warm.
+        """
+        from logic.ocr import OCR
+
+        if self.kind != "process":
+            return [self._pool.submit(OCR.warmup)]
+        return [self._pool.submit(_warm_process_worker, self.WARMUP_TIMEOUT) for _ in range(self.workers)]
+
+    def worker_pids(self) -> list[int]:
+        """Process ids of the pool's worker processes (none for the thread pool)."""
+        processes = getattr(self._pool, "_processes", None) or {}
+        return sorted(processes)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+
+_executor: ReviewExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ReviewExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ReviewExecutor.from_settings(get_settings())
+        return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 from io import BytesIO
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -7,14 +8,24 @@ from typing import Any, ClassVar
 
 from pypdf import PdfReader
 
+from logic.timings import Timings
+
 
 @dataclass
 class TTBForm510031Reader:
-    """Read TTB F 5100.31 and expose values by PDF and YAML field names."""
+    """
+    Read TTB F 5100.31 and expose values by PDF and YAML field names.
+
+    With mapped_only=True only the fields named in PDF_TO_YAML_FIELD_MAPPING are resolved,
+    by walking the AcroForm field tree from the document catalog; pages and content
+    streams are never read. available_pdf_field_names() then lists just those fields.
+    """
 
     pdf_file: bytes | str | Path
 
     field_mapping: list[str] = field(default_factory=list)
+    mapped_only: bool = False
+    timings: Timings = field(default_factory=Timings, repr=False)
     pdf_fields: dict[str, dict[str, Any]] = field(init=False, default_factory=dict)
     field_values: dict[str, str | None] = field(init=False, default_factory=dict)
 
@@ -56,22 +67,58 @@ class TTBForm510031Reader:
     }
 
     def __post_init__(self) -> None:
-        self.pdf_fields = self._load_pdf_fields()
-        self.field_values = {
-            pdf_name: self._extract_field_value(field_obj)
-            for pdf_name, field_obj in self.pdf_fields.items()
-        }
+        with self.timings.stage("pdf_fields"):
+            self.pdf_fields = self._load_mapped_pdf_fields() if self.mapped_only else self._load_pdf_fields()
+            self.field_values = {
+                pdf_name: self._extract_field_value(field_obj)
+                for pdf_name, field_obj in self.pdf_fields.items()
+            }
         if not self.field_mapping:
             self.field_mapping = list(self.DEFAULT_YAML_FIELD_MAPPING)
 
-    def _load_pdf_fields(self) -> dict[str, dict[str, Any]]:
+    def _open_reader(self) -> PdfReader:
         if isinstance(self.pdf_file, bytes):
             reader = PdfReader(BytesIO(self.pdf_file))
         else:
             reader = PdfReader(str(self.pdf_file))
         if reader.is_encrypted:
             reader.decrypt("")
-        return reader.get_fields() or {}
+        return reader
+
+    def _load_pdf_fields(self) -> dict[str, dict[str, Any]]:
+        return self._open_reader().get_fields() or {}
+
+    def _load_mapped_pdf_fields(self) -> dict[str, dict[str, Any]]:
+        reader = self._open_reader()
+        acroform = reader.trailer["/Root"].get("/AcroForm")
+        if acroform is None:
+            return {}
+        acroform = acroform.get_object()
+        wanted, prefixes = self._mapped_pdf_field_names()
+
+        found: dict[str, dict[str, Any]] = {}
+        # (field, parent's fully qualified name, inherited /FT and /V)
+        stack = [(ref.get_object(), "", {}) for ref in reversed(acroform.get("/Fields", []) or [])]
+        while stack and len(found) < len(wanted):
+            field_obj, parent_name, inherited = stack.pop()
+            partial = field_obj.get("/T")
+            if partial is None:
+                continue  # a widget annotation, not a field
+            name = f"{parent_name}.{partial}" if parent_name else str(partial)
+            # /FT and /V are inheritable, like get_fields() we resolve them from the parents
+            values = dict(inherited)
+            for key in ("/FT", "/V"):
+                if key in field_obj:
+                    values[key] = field_obj[key]
+            if name in wanted:
+                entry = dict(values)
+                if "/Kids" in field_obj:
+                    entry["/Kids"] = field_obj["/Kids"]
+                found[name] = entry
+            elif name in prefixes:
+                for kid_ref in reversed(field_obj.get("/Kids", []) or []):
+                    stack.append((kid_ref.get_object(), name, values))
+        return found
 
     def available_pdf_field_names(self) -> list[str]:
         return sorted(self.pdf_fields.keys())
@@ -101,19 +148,32 @@ class TTBForm510031Reader:
         return value
 
     @classmethod
-    def _yaml_to_pdf_field_mapping(cls) -> dict[str, list[str]]:
+    @functools.cache
+    def _yaml_to_pdf_field_mapping(cls) -> dict[str, tuple[str, ...]]:
+        """Reverse of PDF_TO_YAML_FIELD_MAPPING, built once per class."""
         out: dict[str, list[str]] = {}
         for pdf_field_name, yaml_names in cls.PDF_TO_YAML_FIELD_MAPPING.items():
             for yaml_name in yaml_names:
                 out.setdefault(yaml_name, []).append(pdf_field_name)
-        return out
+        return {yaml_name: tuple(pdf_names) for yaml_name, pdf_names in out.items()}
+
+    @classmethod
+    @functools.cache
+    def _mapped_pdf_field_names(cls) -> tuple[frozenset[str], frozenset[str]]:
+        """The mapped PDF field names, and every parent name leading to them in the field tree."""
+        wanted = frozenset(cls.PDF_TO_YAML_FIELD_MAPPING)
+        prefixes = set()
+        for name in wanted:
+            parts = name.split(".")
+            prefixes.update(".".join(parts[:i]) for i in range(1, len(parts)))
+        return wanted, frozenset(prefixes)
 
     def get_value_by_pdf_field_name(self, pdf_field_name: str) -> str | None:
         return self.field_values.get(pdf_field_name)
 
     def get_value_by_field_mapping_name(self, mapping_name: str) -> str | None:
         yaml_to_pdf = self._yaml_to_pdf_field_mapping()
-        pdf_names = yaml_to_pdf.get(mapping_name, [])
+        pdf_names = yaml_to_pdf.get(mapping_name, ())
         if not pdf_names:
             return None
 
@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import json
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from pathlib import Path
+from typing import IO, Any
+
+from logic import bulk
+from logic import review as pipeline
+from logic.executor import QueueFullError, get_executor
+from logic.metrics import metrics
+from logic.settings import get_settings
+
+
+class JobNotFoundError(KeyError):
+    """Raised for an unknown job id."""
+
+
+class JobStore:
+    """
+    SQLite-backed queue of bulk jobs. Every nested package is a row that is marked done
+    (with its result) the moment it finishes, so a restart only re-runs what was pending.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.archives = self.directory / "archives"
+        self.archives.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.directory / "jobs.sqlite3"), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " filename TEXT NOT NULL,"
+                " archive TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " total INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " updated REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS packages ("
+                " job_id TEXT NOT NULL,"
+                " idx INTEGER NOT NULL,"
+                " name TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " result TEXT,"
+                " PRIMARY KEY (job_id, idx))"
+            )
+
+    def create(self, archive: IO[bytes], filename: str) -> dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        archive_path = self.archives / f"{job_id}.zip"
+        with archive_path.open("wb") as fh:
+            shutil.copyfileobj(archive, fh)
+
+        rows: list[tuple[Any, ...]] = []
+        try:
+            with zipfile.ZipFile(archive_path) as outer_zip:
+                entries = bulk.archive_entries(outer_zip)
+        except zipfile.BadZipFile:
+            archive_path.unlink(missing_ok=True)
+            raise
+        for index, info in enumerate(entries):
+            if info.filename.lower().endswith(".zip"):
+                rows.append((job_id, index, info.filename, "pending", None))
+            else:
+                rows.append((job_id, index, info.filename, "done", json.dumps(bulk.skipped_entry(info.filename))))
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, filename, archive, status, total, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, filename, str(archive_path), "queued", len(rows), now, now),
+            )
+            self._conn.executemany(
+                "INSERT INTO packages (job_id, idx, name, status, result) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        return self.progress(job_id)
+
+    def progress(self, job_id: str) -> dict[str, Any]:
+        with self._lock:
+            job = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                raise JobNotFoundError(job_id)
+            packages = self._conn.execute(
+                "SELECT idx, name, status, json_extract(result, '$.decision') AS decision"
+                " FROM packages WHERE job_id = ? ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+        counts = {"pending": 0, "done": 0, "cancelled": 0, "failed": 0}
+        for package in packages:
+            counts[package["status"]] += 1
+        return {
+            "job_id": job["id"],
+            "filename": job["filename"],
+            "status": job["status"],
+            "total": job["total"],
+            "done": counts["done"],
+            "pending": counts["pending"],
+            "cancelled": counts["cancelled"],
+            "failed": counts["failed"],
+            "packages": [
+                {
+                    "index": package["idx"],
+                    "package": package["name"],
+                    "status": package["status"],
+                    "decision": package["decision"],
+                }
+                for package in packages
+            ],
+        }
+
+    def results(self, job_id: str, offset: int = 0) -> list[dict[str, Any]]:
+        """Finished (or failed) package results in archive order, starting at the given package index."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is None:
+                raise JobNotFoundError(job_id)
+            rows = self._conn.execute(
+                "SELECT result FROM packages WHERE job_id = ? AND status IN ('done', 'failed') AND idx >= ?"
+                " ORDER BY idx",
+                (job_id, offset),
+            ).fetchall()
+        return [json.loads(row["result"]) for row in rows]
+
+    def cancel(self, job_id: str) -> dict[str, Any]:
+        with self._lock, self._conn:
+            job = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                raise JobNotFoundError(job_id)
+            if job["status"] in ("queued", "running"):
+                self._conn.execute(
+                    "UPDATE packages SET status = 'cancelled' WHERE job_id = ? AND status = 'pending'", (job_id,)
+                )
+                self._set_status(job_id, "cancelled")
+        self.remove_archive(job_id)
+        return self.progress(job_id)
+
+    def remove_archive(self, job_id: str) -> None:
+        """Results live in the database, the uploaded archive is only needed while packages are pending."""
+        (self.archives / f"{job_id}.zip").unlink(missing_ok=True)
+
+    def next_job(self) -> sqlite3.Row | None:
+        """Oldest job that still has pending packages."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created LIMIT 1"
+            ).fetchone()
+
+    def pending_packages(self, job_id: str) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT idx, name FROM packages WHERE job_id = ? AND status = 'pending' ORDER BY idx", (job_id,)
+            ).fetchall()
+
+    def status(self, job_id: str) -> str:
+        with self._lock:
+            return self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()["status"]
+
+    def mark_running(self, job_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ? AND status = 'queued'",
+                               (time.time(), job_id))
+
+    def finish_package(self, job_id: str, index: int, result: dict[str, Any]) -> None:
+        # a package that was already running when its job got cancelled still keeps its result
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE packages SET status = 'done', result = ? WHERE job_id = ? AND idx = ?",
+                (json.dumps(result), job_id, index),
+            )
+
+    def finish_job(self, job_id: str, status: str) -> None:
+        with self._lock, self._conn:
+            job = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job["status"] != "cancelled":
+                self._set_status(job_id, status)
+
+    def fail_job(self, job_id: str, err: Exception) -> None:
+        """
+        The job can't go on: every package still pending gets an error result, so
+        progress stops reporting work that will never run, and the archive goes.
+        """
+        with self._lock, self._conn:
+            pending = self._conn.execute(
+                "SELECT idx, name FROM packages WHERE job_id = ? AND status = 'pending'", (job_id,)
+            ).fetchall()
+            failed = []
+            for package in pending:
+                result = pipeline.error_response(err)
+                result["package"] = package["name"]
+                failed.append((json.dumps(result), job_id, package["idx"]))
+            self._conn.executemany(
+                "UPDATE packages SET status = 'failed', result = ? WHERE job_id = ? AND idx = ?", failed
+            )
+            job = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job["status"] != "cancelled":
+                self._set_status(job_id, "failed")
+        self.remove_archive(job_id)
+
+    def _set_status(self, job_id: str, status: str) -> None:
+        self._conn.execute("UPDATE jobs SET status = ?, updated = ? WHERE id = ?", (status, time.time(), job_id))
+
+
+class JobRunner:
+    """
+    Background thread that works through pending packages one job at a time, feeding
+    them to the review executor. Starting it picks up whatever a previous process left
+    unfinished.
+    """
+
+    POLL_SECONDS = 1.0
+
+    def __init__(self, store: JobStore):
+        self.store = store
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-runner", daemon=True)
+        self._thread.start()
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            job = self.store.next_job()
+            if job is None:
+                self._wake.wait(self.POLL_SECONDS)
+                self._wake.clear()
+                continue
+            try:
+                self._run_job(job)
+            except Exception as err:
+                self.store.fail_job(job["id"], err)
+
+    def _run_job(self, job: sqlite3.Row) -> None:
+        job_id = job["id"]
+        self.store.mark_running(job_id)
+        executor = get_executor()
+        in_flight: dict[Future, tuple[int, str]] = {}
+        with zipfile.ZipFile(job["archive"]) as outer_zip:
+            # by position, like the package rows: entry names aren't necessarily unique
+            entries = bulk.archive_entries(outer_zip)
+            for package in self.store.pending_packages(job_id):
+                if self._stop.is_set() or self.store.status(job_id) == "cancelled":
+                    break
+                try:
+                    nested_bytes = outer_zip.read(entries[package["idx"]])
+                except Exception as err:
+                    # a corrupt entry fails its own package, not the rest of the job
+                    result = pipeline.error_response(err)
+                    result["package"] = package["name"]
+                    self.store.finish_package(job_id, package["idx"], result)
+                    continue
+                future = None
+                while future is None and not self._stop.is_set():
+                    while len(in_flight) >= executor.workers:
+                        self._collect(job_id, in_flight, wait(in_flight, return_when=FIRST_COMPLETED).done)
+                    try:
+                        future = executor.submit(pipeline.review_package, package["name"], nested_bytes)
+                    except QueueFullError:
+                        # interactive requests have the executor busy, let them go first;
+                        # stop() cuts the wait short so shutdown isn't held up
+                        self._stop.wait(self.POLL_SECONDS)
+                if future is None:
+                    break
+                in_flight[future] = (package["idx"], package["name"])
+            if in_flight:
+                self._collect(job_id, in_flight, wait(in_flight).done)
+        if not self._stop.is_set():
+            self.store.finish_job(job_id, "done")
+            self.store.remove_archive(job_id)
+
+    def _collect(self, job_id: str, in_flight: dict[Future, tuple[int, str]], done: set[Future]) -> None:
+        for future in done:
+            index, name = in_flight.pop(future)
+            try:
+                result = metrics.record_review(future.result())
+            except Exception as err:
+                result = pipeline.error_response(err)
+                result["package"] = name
+            self.store.finish_package(job_id, index, result)
+
+
+_store: JobStore | None = None
+_runner: JobRunner | None = None
+_jobs_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Shared job store; the first call also starts the runner, resuming unfinished jobs."""
+    global _store, _runner
+    with _jobs_lock:
+        if _store is None:
+            _store = JobStore(get_settings().jobs_dir)
+        if _runner is None:
+            _runner = JobRunner(_store)
+        return _store
+
+
+def notify_job_runner() -> None:
+    with _jobs_lock:
+        if _runner is not None:
+            _runner.notify()
+
+
+def shutdown_jobs() -> None:
+    global _runner
+    with _jobs_lock:
+        runner, _runner = _runner, None
+    if runner is not None:
+        runner.stop()
@@ -1,74 +1,181 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
 from logic.ocr import OCR
-from logic.required_text import RequiredText
+from logic.quantities import expected_alcohol, expected_volumes
+from logic.required_text import RequiredText, RuleSet, RuleSpec
+from logic.rule_engine import FAIL, Check, Verdict, run_rules
+from logic.settings import get_settings
+from logic.text_index import tokenize
+
+# company suffixes and filler words applications carry and labels often leave out
+IGNORED_TOKENS = frozenset({"inc", "llc", "ltd", "co", "corp", "company", "the", "of", "and"})
+
+
+@dataclass
+class Label:
+    """What the checks look at: the OCRed label, the application's fields and the type's requirements."""
+
+    ocr: OCR
+    fields: dict[str, Any]
+    requirements: RequiredText
+
+
+def text_present(rule: RuleSpec, label: Label) -> Verdict:
+    """The rule's `text` appears on the label (fuzzy)."""
+    text = str(rule.params["text"])
+    found = label.ocr.has_text(text)
+    return Verdict(found["ok"], found["confidence"], f"'{text}' {'found' if found['ok'] else 'not found'}")
 
 
-def check_rules(ocr: OCR, fields: dict):
+def required_text(rule: RuleSpec, label: Label) -> Verdict:
+    """Every required text of the product type appears on the label (fuzzy)."""
+    scores = {item: label.ocr.has_text(item) for item in label.requirements.as_required_list()}
+    missing = [item for item, found in scores.items() if not found["ok"]]
+    confidence = min((found["confidence"] for found in scores.values()), default=100.0)
+    if missing:
+        return Verdict(False, confidence, f"{len(missing)} of {len(scores)} required texts not found", {"missing": missing})
+    return Verdict(True, confidence, f"All {len(scores)} required texts found")
+
+
+def type_designation(rule: RuleSpec, label: Label) -> Verdict:
+    """One of the product type's designations appears on the label; the whole list is scored in one batch."""
+    matches = label.ocr.get_index().best_matches(label.requirements.rules.type_matcher)
+    designation = {
+        "designation": matches[0][0] if matches else None,
+        "score": matches[0][1] if matches else 0.0,
+        "runners_up": [{"designation": item, "score": score} for item, score in matches[1:]],
+    }
+    if not matches:
+        return Verdict(False, 0.0, "Type Designation not found", {"type_designation": designation})
+    return Verdict(True, matches[0][1], f"Type Designation '{matches[0][0]}' found", {"type_designation": designation})
+
+
+def application_fields(rule: RuleSpec, label: Label) -> Verdict:
+    """
+    The application's fields appear on the label. The rule lists them by kind:
+    text_fields are matched word by word against the label's word index (a field
+    passes when its words score min_score on average, weighted by length),
+    volume_fields and alcohol_fields by value, whatever the unit (ml/cl/L/fl oz/pints,
+    % or proof), within volume_tolerance (relative) and alcohol_tolerance (% ABV).
+    A value with no unit to go by is matched as text. Every field is looked up in the
+    same index: one batched fuzzy call for all the text, one parse of the quantities.
+    """
+    params = rule.params
+    min_score = float(params.get("min_score", 80))
+    volume_tolerance = float(params.get("volume_tolerance", 0.01))
+    alcohol_tolerance = float(params.get("alcohol_tolerance", 0.1))
+    index = label.ocr.get_index()
+    quantities = index.quantities()
+
+    results: dict[str, dict[str, Any]] = {}
+    as_text: dict[str, list[str]] = {}
+    for kind in ("text", "volume", "alcohol"):
+        for name in params.get(f"{kind}_fields", []) or []:
+            value = label.fields.get(name)
+            value = str(value).strip() if value is not None else ""
+            if not value:
+                results[name] = {"kind": kind, "status": "not_provided"}
+                continue
+            expected = expected_volumes(value) if kind == "volume" else expected_alcohol(value) if kind == "alcohol" else []
+            if not expected:
+                words = tokenize(value)
+                as_text[name] = [word for word in words if word not in IGNORED_TOKENS] or words
+                results[name] = {"kind": "text", "expected": value}
+                continue
+            on_label = quantities.volumes if kind == "volume" else quantities.alcohol
+            # the label amount closest to any of the application's
+            distance, found, target = min(
+                ((abs(amount - target), amount, target) for target in expected for amount in on_label),
+                default=(0.0, None, expected[0]),
+            )
+            matched = found is not None and distance <= (volume_tolerance * target if kind == "volume" else alcohol_tolerance)
+            results[name] = {
+                "kind": kind,
+                "expected": value,
+                "status": "match" if matched else "mismatch",
+                "score": 100.0 if matched else 0.0,
+                "found": round(found, 2) if found is not None else None,
+            }
+
+    scores = index.token_scores(word for words in as_text.values() for word in words)
+    for name, words in as_text.items():
+        weight = sum(len(word) for word in words)
+        score = sum(len(word) * scores[word] for word in words) / weight if weight else 0.0
+        results[name].update(status="match" if score >= min_score else "mismatch", score=round(score, 1))
+
+    checked = {name: result for name, result in results.items() if result["status"] != "not_provided"}
+    mismatched = [name for name, result in checked.items() if result["status"] == "mismatch"]
+    confidence = min((result["score"] for result in checked.values()), default=100.0)
+    if mismatched:
+        detail = f"{', '.join(mismatched)} not matched on the label"
+    elif checked:
+        detail = f"All {len(checked)} application fields matched on the label"
+    else:
+        detail = "No application fields to check"
+    return Verdict(not mismatched, confidence, detail, {"fields": results})
+
+
+# check names usable in the rules of required_text.yaml
+CHECKS: dict[str, Check] = {
+    "text_present": text_present,
+    "required_text": required_text,
+    "type_designation": type_designation,
+    "application_fields": application_fields,
+}
+
+
+def validate_checks(rule_set: RuleSet) -> None:
+    """Every rule of every type names a known check, so a typo fails at startup rather than per review."""
+    for type_rules in (*rule_set.types.values(), rule_set.fallback):
+        for rule in type_rules.rules:
+            if rule.check not in CHECKS:
+                raise ValueError(f"rule '{rule.name}' (type '{type_rules.type}') uses unknown check '{rule.check}'")
+
+
+def check_rules(ocr: OCR, fields: dict, stop_on_reject: bool | None = None):
+    """
+    Run the product type's rules against the label. The label is rejected when a fatal
+    rule fails and goes to human review otherwise; every rule's outcome and time is in
+    the response's "rules".
+    """
     try:
         # @TODO: we should start by checking that the application is actually what we want to test.
-
         if ocr.processed_img is None:
-            response = {
+            return {
                 "decision": "Human Review",
                 "confidence": 0.0,
                 "full_text": "",
                 "findings": ocr.findings
             }
-        # Given this exact text must appear always, let's check for it and reject if it's not there
-        basic_check = ocr.has_text('GOVERNMENT WARNING')
-        if not basic_check['ok']:
-            ocr.findings.append('GOVERNMENT WARNING header not found')
-            response = {
-                "decision": "Reject",
-                "confidence": basic_check['confidence'],
-                "full_text": ocr.text,
-                "findings": ocr.findings
-            }
-        else:
-            ocr.findings.append('GOVERNMENT WARNING header found')
-            # read the form and determine what fields we need to check for
-            bevg_type = fields["Product Type"]
-            if bevg_type:
-                requirements = RequiredText(type=bevg_type.lower())
-            else:
-                requirements = RequiredText(type="all")
-            # for now, we're just reading the required fields
-            for item in requirements.as_required_list():
-                found = ocr.has_text(item)
-                if found:
-                    ocr.findings.append(f"Required text '{item}' found")
-                else:
-                    ocr.findings.append(f"Required text '{item}' not found")
-                    response = {
-                        "decision": "Reject",
-                        "confidence": found['confidence'],
-                        "full_text": ocr.text,
-                        "findings": ocr.findings
-                    }
-                    return response
-            # Get type designation
-            type = None
-            for item in requirements.as_type_list():
-                found = ocr.has_text(item)
-                if found:
-                    type = item
-                    ocr.findings.append(f"Type Designation '{type}' found")
-                    break
-            if type is None:
-                ocr.findings.append(f"Type Designation not found")
-                response = {
-                    "decision": "Reject",
-                    "confidence": 0.0,
-                    "full_text": ocr.text,
-                    "findings": ocr.findings
-                }
-            else:
-                response = {
-                    "decision": "Human Review",
-                    "confidence": 0.0,
-                    "full_text": ocr.text,
-                    "findings": ocr.findings
-                }
-            # @TODO: continue testing other requirements here
+
+        settings = get_settings()
+        bevg_type = fields["Product Type"]
+        requirements = RequiredText(type=bevg_type.lower() if bevg_type else "all")
+        # built up front so rules running side by side don't race to build it
+        ocr.get_index()
+        outcomes = run_rules(
+            requirements.rules.rules,
+            CHECKS,
+            Label(ocr=ocr, fields=fields, requirements=requirements),
+            stop_on_reject=settings.rules_stop_on_reject if stop_on_reject is None else stop_on_reject,
+            max_workers=settings.rules_workers,
+            timings=ocr.timings,
+        )
+
+        rejected = next((outcome for outcome in outcomes if outcome.fatal and outcome.status == FAIL), None)
+        response = {
+            "decision": "Reject" if rejected else "Human Review",
+            "confidence": rejected.confidence if rejected else 0.0,
+            "full_text": ocr.text,
+            "findings": ocr.findings,
+            "rules": [outcome.as_dict() for outcome in outcomes],
+        }
+        for outcome in outcomes:
+            if outcome.data and "type_designation" in outcome.data:
+                response["type_designation"] = outcome.data["type_designation"]
     except Exception as err:
         response = {
             "decision": "Human Review",
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import cv2
+import numpy
+
+if TYPE_CHECKING:
+    from doctr.io.elements import Document
+
+# character height (px) we aim for at the working resolution: enough for the 32px
+# recognition crops, small enough that denoising and cropping stay cheap
+TARGET_TEXT_HEIGHT = 16
+MAX_UPSCALE = 2.0
+# docTR resizes every page to this for detection, shrinking further buys nothing there
+DETECTOR_SIZE = 1024
+MIN_LONG_SIDE = 1024
+MAX_LONG_SIDE = 4096
+# below this character height in the detector's input, words start to go missing
+MIN_DETECTOR_TEXT_HEIGHT = 6
+# only wraparound/panoramic labels are tiled, everything else goes in as one page
+PANORAMA_RATIO = 2.5
+MAX_TILES = 8
+# text height is measured on a thumbnail this big
+ANALYSIS_SIZE = 2048
+
+
+def estimate_text_height(gray: numpy.ndarray) -> float | None:
+    """
+    Typical character height (px, at the image's own resolution) on the label, from
+    connected components of an adaptive threshold. None when too few character-like
+    components were found to tell.
+    """
+    scale = min(1.0, ANALYSIS_SIZE / max(gray.shape))
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    heights = []
+    # dark text on light, then light text on dark
+    for threshold_type, offset in ((cv2.THRESH_BINARY_INV, 15), (cv2.THRESH_BINARY, -15)):
+        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, threshold_type, 25, offset)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        w = stats[1:, cv2.CC_STAT_WIDTH].astype(numpy.float32)
+        h = stats[1:, cv2.CC_STAT_HEIGHT].astype(numpy.float32)
+        fill = stats[1:, cv2.CC_STAT_AREA] / numpy.maximum(w * h, 1)
+        glyph = (h >= 6) & (h <= 0.25 * gray.shape[0]) & (w / h >= 0.1) & (w / h <= 1.5) & (fill > 0.1) & (fill < 0.95)
+        heights.append(h[glyph])
+    heights = numpy.concatenate(heights)
+    if len(heights) < 15:
+        return None
+    return float(numpy.median(heights)) / scale
+
+
+@dataclass(frozen=True)
+class Layout:
+    """How an image is scaled, and possibly tiled, before it reaches the model."""
+
+    original_shape: tuple[int, int]
+    scale: float
+    shape: tuple[int, int]
+    # (x0, y0, x1, y1) in working pixels; empty when the whole page goes in at once
+    tiles: tuple[tuple[int, int, int, int], ...] = ()
+    text_height: float | None = None
+
+    @property
+    def resized(self) -> bool:
+        return self.shape != self.original_shape
+
+    def describe(self) -> str:
+        h, w = self.original_shape
+        out = f"{w}x{h}"
+        if self.resized:
+            out += f" -> {self.shape[1]}x{self.shape[0]} (scale {self.scale:.2f})"
+        if self.tiles:
+            out += f", {len(self.tiles)} tiles"
+        if self.text_height:
+            out += f", text height ~{self.text_height:.0f}px"
+        return out
+
+
+def _positions(length: int, tile: int, overlap: int) -> list[int]:
+    if length <= tile:
+        return [0]
+    count = math.ceil((length - overlap) / (tile - overlap))
+    return [round(i * (length - tile) / (count - 1)) for i in range(count)]
+
+
+def plan_layout(shape: tuple[int, int], text_height: float | None) -> Layout:
+    """
+    Shrink photos whose text is larger than TARGET_TEXT_HEIGHT (never below MIN_LONG_SIDE),
+    enlarge small images up to MIN_LONG_SIDE (at most MAX_UPSCALE), and cap everything at
+    MAX_LONG_SIDE. Panoramic labels whose text would end up below MIN_DETECTOR_TEXT_HEIGHT
+    in the detector's 1024px view of the whole page are tiled with overlap instead.
+    """
+    h, w = shape[:2]
+    long_side, short_side = max(h, w), min(h, w)
+    scale = 1.0
+    if text_height and text_height > TARGET_TEXT_HEIGHT:
+        scale = max(TARGET_TEXT_HEIGHT / text_height, min(1.0, MIN_LONG_SIDE / long_side))
+    elif long_side < MIN_LONG_SIDE:
+        scale = min(MAX_UPSCALE, MIN_LONG_SIDE / long_side)
+    scale = min(scale, MAX_LONG_SIDE / long_side)
+    if abs(scale - 1.0) < 0.15:
+        scale = 1.0
+    work_h, work_w = max(1, round(h * scale)), max(1, round(w * scale))
+
+    tiles: tuple[tuple[int, int, int, int], ...] = ()
+    if text_height and long_side >= PANORAMA_RATIO * short_side:
+        work_text = text_height * scale
+        if work_text * DETECTOR_SIZE / max(work_h, work_w) < MIN_DETECTOR_TEXT_HEIGHT:
+            tile = max(DETECTOR_SIZE, int(work_text * DETECTOR_SIZE / MIN_DETECTOR_TEXT_HEIGHT))
+            overlap = int(max(64, 4 * work_text))
+            while True:
+                xs, ys = _positions(work_w, tile, overlap), _positions(work_h, tile, overlap)
+                if len(xs) * len(ys) <= MAX_TILES:
+                    break
+                tile = int(tile * 1.25)
+            if len(xs) * len(ys) > 1:
+                tiles = tuple(
+                    (x, y, min(x + tile, work_w), min(y + tile, work_h)) for y in ys for x in xs
+                )
+    return Layout(original_shape=(h, w), scale=scale, shape=(work_h, work_w), tiles=tiles, text_height=text_height)
+
+
+def tile_pages(page: numpy.ndarray, layout: Layout) -> list[numpy.ndarray]:
+    if not layout.tiles:
+        return [page]
+    return [numpy.ascontiguousarray(page[y0:y1, x0:x1]) for x0, y0, x1, y1 in layout.tiles]
+
+
+def restore_layout(document: Document, layout: Layout) -> Document:
+    """
+    Put a prediction back into the original image's frame. Word geometry is relative,
+    so scaling needs nothing but the page dimensions. Tiled predictions are merged into
+    one page: words cut off by an edge shared with another tile are dropped (the overlap
+    lets the neighbour see them whole), and of the words both tiles saw, the more
+    confident one is kept.
+    """
+    from doctr.io.elements import Block, Document, Line, Page, Word
+
+    if not layout.tiles:
+        for page in document.pages:
+            page.dimensions = layout.original_shape
+        return document
+
+    work_h, work_w = layout.shape
+    # (block key, line key, word, global points) for every word that survived the edge check
+    found: list[tuple[tuple[int, int], tuple[int, int, int], Word, numpy.ndarray]] = []
+    for tile_index, ((x0, y0, x1, y1), page) in enumerate(zip(layout.tiles, document.pages)):
+        tile_w, tile_h = x1 - x0, y1 - y0
+        # within 2px of the edge
+        edge_x, edge_y = 2 / tile_w, 2 / tile_h
+        inner = (x0 > 0, y0 > 0, x1 < work_w, y1 < work_h)
+        for block_index, block in enumerate(page.blocks):
+            for line_index, line in enumerate(block.lines):
+                for word in line.words:
+                    points = numpy.asarray(word.geometry, dtype=numpy.float64).reshape(-1, 2)
+                    lo, hi = points.min(axis=0), points.max(axis=0)
+                    if (inner[0] and lo[0] <= edge_x) or (inner[1] and lo[1] <= edge_y) or \
+                            (inner[2] and hi[0] >= 1 - edge_x) or (inner[3] and hi[1] >= 1 - edge_y):
+                        continue
+                    points = (points * (tile_w, tile_h) + (x0, y0)) / (work_w, work_h)
+                    found.append(((tile_index, block_index), (tile_index, block_index, line_index), word, points))
+
+    keep = numpy.ones(len(found), dtype=bool)
+    if found:
+        boxes = numpy.array([[*points.min(axis=0), *points.max(axis=0)] for *_, points in found])
+        confidence = numpy.array([word.confidence for _, _, word, _ in found])
+        area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        for i in numpy.argsort(-confidence, kind="stable"):
+            if not keep[i]:
+                continue
+            ix = numpy.clip(numpy.minimum(boxes[i, 2], boxes[:, 2]) - numpy.maximum(boxes[i, 0], boxes[:, 0]), 0, None)
+            iy = numpy.clip(numpy.minimum(boxes[i, 3], boxes[:, 3]) - numpy.maximum(boxes[i, 1], boxes[:, 1]), 0, None)
+            iou = ix * iy / numpy.maximum(area[i] + area - ix * iy, 1e-12)
+            duplicate = iou > 0.5
+            duplicate[i] = False
+            keep &= ~duplicate
+
+    blocks: dict[tuple[int, int], dict[tuple[int, int, int], list[Word]]] = {}
+    for (block_key, line_key, word, points), kept in zip(found, keep):
+        if kept:
+            blocks.setdefault(block_key, {}).setdefault(line_key, []).append(Word(
+                word.value,
+                word.confidence,
+                tuple(tuple(float(v) for v in point) for point in points),
+                word.objectness_score,
+                word.crop_orientation,
+            ))
+    merged = Page(
+        page=numpy.zeros((0, 0, 3), dtype=numpy.uint8),
+        blocks=[Block([Line(words) for words in lines.values()]) for lines in blocks.values()],
+        page_idx=0,
+        dimensions=layout.original_shape,
+    )
+    return Document(pages=[merged])
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+# seconds; OCR on CPU runs from tens of milliseconds (cache hits, rules) to tens of seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else f"{int(value)}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.values: dict[tuple[tuple[str, str], ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # per label set: [count per bucket..., +Inf count], sum
+        self.values: dict[tuple[tuple[str, str], ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-1] += 1
+        self.values[key] = (counts, total + value)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_labels(key + (('le', _number(bound)),))} {count}")
+            lines.append(f"{self.name}_bucket{_labels(key + (('le', '+Inf'),))} {counts[-1]}")
+            lines.append(f"{self.name}_sum{_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(key)} {counts[-1]}")
+        return lines
+
+
+class ReviewMetrics:
+    """
+    Process-wide review metrics in the Prometheus text format.
+
+    Everything is recorded in the web process from the timings block a review returns,
+    so it works the same whether reviews ran in threads or in worker processes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reviews = Histogram("label_verification_review_seconds", "End-to-end time of one label review.")
+        self.stages = Histogram("label_verification_stage_seconds", "Time spent in one review pipeline stage.")
+        self.decisions = Counter("label_verification_decisions_total", "Reviews by decision.")
+        self.ocr_paths = Counter(
+            "label_verification_ocr_path_total",
+            "OCR runs by preprocessing path; raw+preprocessed means the raw pass failed the quality gate and was retried.",
+        )
+        self.ocr_cache = Counter("label_verification_ocr_cache_total", "OCR result cache lookups by outcome.")
+        self.admissions = Counter(
+            "label_verification_admission_total",
+            "Review requests by admission outcome: admitted, rejected_full (429), rejected_timeout (503) or too_large (413).",
+        )
+        self.failures = Counter(
+            "label_verification_review_failures_total",
+            "Review requests that ended without a review: busy (503, review queue full) or error (exception).",
+        )
+
+    def observe_review(self, response: dict[str, Any]) -> None:
+        timings = response.get("timings") or {}
+        stages = timings.get("stages", {})
+        tags = timings.get("tags", {})
+        with self._lock:
+            self.decisions.inc(decision=str(response.get("decision", "unknown")))
+            if "total_ms" in timings:
+                self.reviews.observe(timings["total_ms"] / 1000)
+            for stage, ms in stages.items():
+                self.stages.observe(ms / 1000, stage=stage)
+            if "ocr_path" in tags:
+                self.ocr_paths.inc(path=tags["ocr_path"])
+            if "ocr_cache" in tags:
+                self.ocr_cache.inc(result=tags["ocr_cache"])
+
+    def record_review(
+        self,
+        response: dict[str, Any],
+        *,
+        extra_stages: dict[str, float] | None = None,
+        keep_timings: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Fold stages measured in the web process (extra_stages, in seconds) into the
+        review's timings, record it, and drop the timings block unless the caller asked for it.
+        """
+        timings = response.get("timings")
+        if timings is not None and extra_stages:
+            for stage, seconds in extra_stages.items():
+                ms = round(seconds * 1000, 3)
+                timings["stages"][stage] = timings["stages"].get(stage, 0.0) + ms
+                timings["total_ms"] = round(timings["total_ms"] + ms, 3)
+        self.observe_review(response)
+        if not keep_timings:
+            response.pop("timings", None)
+        return response
+
+    def record_failure(self, endpoint: str, outcome: str) -> None:
+        """Count a request that produced no review, so failures show up next to the decisions."""
+        with self._lock:
+            self.failures.inc(endpoint=endpoint, outcome=outcome)
+
+    def preprocessing_retry_ratio(self) -> float:
+        runs = self.ocr_paths.total()
+        if not runs:
+            return 0.0
+        return self.ocr_paths.values.get((("path", "raw+preprocessed"),), 0.0) / runs
+
+    def render(self) -> str:
+        with self._lock:
+            lines = (
+                self.reviews.render()
+                + self.stages.render()
+                + self.decisions.render()
+                + self.ocr_paths.render()
+                + self.ocr_cache.render()
+                + self.admissions.render()
+                + self.failures.render()
+            )
+            lines += [
+                "# HELP label_verification_preprocessing_retry_ratio Share of OCR runs that needed a second, preprocessed pass.",
+                "# TYPE label_verification_preprocessing_retry_ratio gauge",
+                f"label_verification_preprocessing_retry_ratio {_number(self.preprocessing_retry_ratio())}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = ReviewMetrics()
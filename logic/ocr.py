@@ -1,36 +1,270 @@
-import os
-import re
-import tempfile
+import copy
+import threading
 from dataclasses import dataclass, field
-from typing import Any, ClassVar
+from typing import Any, Callable, ClassVar
 
 import cv2
 import numpy
-from doctr.io import DocumentFile
-from doctr.models import ocr_predictor
 from rapidfuzz import fuzz
 
-
-@dataclass
-class OCR(object):
-    file_contents: bytes
-    model: ClassVar[Any] = ocr_predictor(
+from logic.batching import BatchingPredictor
+from logic.layout import Layout, estimate_text_height, plan_layout, restore_layout, tile_pages
+from logic.orientation import (
+    MIN_SKEW,
+    MIN_TURN_CONFIDENCE,
+    deskew,
+    estimate_skew,
+    normalize_angle,
+    rotated_shape,
+    thumbnail,
+)
+from logic.ocr_cache import OCRCache
+from logic.ocr_result import OCRResult
+from logic.roi import RegionFirstPredictor
+from logic.settings import get_settings
+from logic.subsequence import SubsequenceMatcher
+from logic.text_index import TextIndex
+from logic.timings import Timings
+
+
+def build_default_model():
+    # imported here so that importing this module doesn't pull in torch
+    from doctr.models import ocr_predictor
+
+    return ocr_predictor(
         det_arch="db_resnet50",
         reco_arch="vitstr_small",
         pretrained=True
     )
-    processed_img: dict[str, Any] | None = field(init=False, default=None)
+
+
+def build_default_orientation_model():
+    from doctr.models import page_orientation_predictor
+
+    return page_orientation_predictor(pretrained=True)
+
+
+@dataclass
+class OCR(object):
+    file_contents: bytes
+    timings: Timings = field(default_factory=Timings, repr=False)
+    # built on first use (or at startup by warmup()); set_model() swaps in another predictor
+    model: ClassVar[Any] = None
+    model_factory: ClassVar[Callable[[], Any]] = staticmethod(build_default_model)
+    # classifies pages as turned 0, 90, 180 or -90 degrees, built alongside the model
+    orientation_model: ClassVar[Any] = None
+    orientation_model_factory: ClassVar[Callable[[], Any]] = staticmethod(build_default_orientation_model)
+    warmed_up: ClassVar[bool] = False
+    _model_lock: ClassVar[threading.Lock] = threading.Lock()
+    # bump PIPELINE_VERSION whenever preprocessing changes what the model sees,
+    # it is part of the cache key
+    MODEL_VERSION: ClassVar[str] = "db_resnet50+vitstr_small"
+    PIPELINE_VERSION: ClassVar[str] = "7"
+    NOISE_KERNEL: ClassVar[numpy.ndarray] = numpy.array([[1, -2, 1],
+                                                         [-2, 4, -2],
+                                                         [1, -2, 1]], dtype=numpy.float32)
+    batcher: ClassVar[BatchingPredictor | None] = None
+    # off in processes where one review runs at a time (batch.py workers)
+    batching: ClassVar[bool] = True
+    _batcher_lock: ClassVar[threading.Lock] = threading.Lock()
+    cache: ClassVar[OCRCache | None] = None
+    _cache_lock: ClassVar[threading.Lock] = threading.Lock()
+    processed_img: OCRResult | None = field(init=False, default=None)
+    quality_metrics: dict[str, Any] | None = field(init=False, default=None)
+    image_quality: dict[str, Any] | None = field(init=False, default=None)
+    preprocessing_path: str | None = field(init=False, default=None)
+    layout: Layout | None = field(init=False, default=None, repr=False)
+    # estimated text skew in degrees, the image was rotated by it when |skew| >= MIN_SKEW
+    skew_angle: float | None = field(init=False, default=None)
+    # quarter turn (degrees, counter-clockwise) the page orientation classifier undid
+    page_turn: int = field(init=False, default=0)
+    # detected/recognised word counts when the region-first (OCR_ROI) pass ran
+    roi_stats: dict[str, Any] | None = field(init=False, default=None)
     text: str | None = field(init=False, default=None)
+    index: TextIndex | None = field(init=False, default=None, repr=False)
     findings: list[str] = field(init=False, default_factory=list)
 
     def __post_init__(self):
+        cache = self.get_cache()
+        if cache is None:
+            self.processed_img = self.doctr_ocr_from_bytes()
+            self.timings.tag("ocr_path", self.preprocessing_path or "failed")
+            return
+
+        with self.timings.stage("cache_lookup"):
+            key = cache.key(self.file_contents, self.cache_version())
+            cached = cache.get(key)
+        if cached is not None:
+            self.timings.tag("ocr_cache", "hit")
+            self.processed_img = OCRResult.from_dict(cached["result"]) if cached["result"] else None
+            self.quality_metrics = cached["quality_metrics"]
+            self.image_quality = cached.get("image_quality")
+            self.preprocessing_path = cached.get("preprocessing_path")
+            self.roi_stats = cached.get("roi_stats")
+            self.skew_angle = cached.get("skew_angle")
+            self.page_turn = cached.get("page_turn", 0)
+            self.findings = cached["findings"] + ["OCR result served from cache"]
+            return
+
+        self.timings.tag("ocr_cache", "miss")
         self.processed_img = self.doctr_ocr_from_bytes()
+        self.timings.tag("ocr_path", self.preprocessing_path or "failed")
+        cache.put(key, {
+            "result": self.processed_img.to_dict() if self.processed_img is not None else None,
+            "quality_metrics": self.quality_metrics,
+            "image_quality": self.image_quality,
+            "preprocessing_path": self.preprocessing_path,
+            "roi_stats": self.roi_stats,
+            "skew_angle": self.skew_angle,
+            "page_turn": self.page_turn,
+            "findings": self.findings,
+        })
+
+    @classmethod
+    def cache_version(cls) -> str:
+        """Everything besides the image bytes that changes the OCR result."""
+        version = f"{cls.MODEL_VERSION}/{cls.PIPELINE_VERSION}"
+        if get_settings().ocr_roi:
+            version += "/roi"
+        return version
+
+    @classmethod
+    def get_cache(cls) -> OCRCache | None:
+        """Shared on-disk result cache, or None when OCR_CACHE_MAX_MB is 0."""
+        with cls._cache_lock:
+            if cls.cache is None:
+                settings = get_settings()
+                if settings.ocr_cache_max_mb > 0:
+                    cls.cache = OCRCache(settings.ocr_cache_path, settings.ocr_cache_max_mb * 1024 * 1024)
+            return cls.cache
+
+    @classmethod
+    def get_model(cls):
+        with cls._model_lock:
+            if cls.model is None:
+                cls.model = cls.model_factory()
+            return cls.model
+
+    @classmethod
+    def get_orientation_model(cls):
+        with cls._model_lock:
+            if cls.orientation_model is None:
+                cls.orientation_model = cls.orientation_model_factory()
+            return cls.orientation_model
+
+    @classmethod
+    def set_model(cls, model: Any) -> None:
+        """Inject a predictor (tests, alternative architectures, a model loaded elsewhere)."""
+        with cls._model_lock:
+            cls.model = model
+            cls.warmed_up = False
+
+    @classmethod
+    def warmup(cls) -> None:
+        """Build the models and push a synthetic label through them so the first real review isn't slow."""
+        if cls.warmed_up:
+            return
+        canvas = numpy.full((512, 1024, 3), 255, dtype=numpy.uint8)
+        for row, line in enumerate(("GOVERNMENT WARNING: (1) ACCORDING TO THE SURGEON GENERAL",
+                                    "WOMEN SHOULD NOT DRINK ALCOHOLIC BEVERAGES",
+                                    "12 FL OZ  5.0% ALC/VOL")):
+            cv2.putText(canvas, line, (24, 80 + row * 60), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 0), 2)
+        cls.predict_pages([canvas])
+        cls.get_orientation_model()([canvas])
+        cls.warmed_up = True
+
+    @classmethod
+    def load_for_workers(cls) -> None:
+        """
+        Build the model in this process ahead of forking worker processes, which then
+        share its weights copy-on-write instead of each loading a copy: inference only
+        reads them, so their pages are never copied.
+
+        No inference runs here: the workers warm up themselves, and a torch thread pool
+        started before the fork is not safe to use after it.
+        """
+        cls.get_model()
+        cls.get_orientation_model()
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        """The model is loaded in this process, by warmup or lazily by a first review."""
+        return cls.model is not None
 
-    def upscale_for_detection(self, bgr):
+    @classmethod
+    def predict_pages(cls, pages: list[numpy.ndarray]):
+        return cls.get_model()(pages)
+
+    @classmethod
+    def get_batcher(cls) -> BatchingPredictor | None:
+        """
+        Shared micro-batcher in front of the model, or None when OCR_BATCH_SIZE is 1 or
+        only one thread calls the model (a single thread worker, or a process worker),
+        where batching would only add its wait to every pass.
+        """
+        with cls._batcher_lock:
+            if cls.batcher is None:
+                settings = get_settings()
+                concurrent = cls.batching and settings.ocr_executor == "thread" and settings.ocr_workers > 1
+                if settings.ocr_batch_size > 1 and concurrent:
+                    cls.batcher = BatchingPredictor(
+                        cls.predict_pages,
+                        max_batch_size=settings.ocr_batch_size,
+                        max_wait_ms=settings.ocr_batch_wait_ms,
+                    )
+            return cls.batcher
+
+    @classmethod
+    def shutdown_batcher(cls) -> None:
+        with cls._batcher_lock:
+            if cls.batcher is not None:
+                cls.batcher.shutdown()
+                cls.batcher = None
+
+    def run_model(self, pages: list[numpy.ndarray]):
+        batcher = self.get_batcher()
+        if batcher is None:
+            return self.predict_pages(pages)
+        return batcher(pages)
+
+    def use_region_first(self) -> bool:
+        return get_settings().ocr_roi and RegionFirstPredictor.supports(self.get_model())
+
+    def run_model_region_first(self, pages: list[numpy.ndarray], stage: str):
+        """Detect, recognise the warning header candidates, and the rest only if the header is there."""
+        predictor = RegionFirstPredictor(self.get_model())
+        result, self.roi_stats = predictor(pages, stage=lambda name: self.timings.stage(f"{stage}.{name}"))
+        return result
+
+    def estimate_page_turn(self, rgb: numpy.ndarray) -> tuple[int, float]:
+        """Quarter turn (counter-clockwise) that puts the page's text upright, and the classifier's confidence."""
+        _, turns, confidences = self.get_orientation_model()([rgb])
+        return int(normalize_angle(turns[0])), float(confidences[0])
+
+    def copy_for_review(self, timings: Timings) -> "OCR":
+        """
+        Shallow copy sharing this OCR result, with its own findings and timings, so the
+        same label can be checked against several forms without the rules' findings mixing.
+        """
+        label = copy.copy(self)
+        label.findings = list(self.findings)
+        label.timings = timings
+        return label
+
+    def upscale_for_detection(self, bgr, scale: float = 2.0):
         h, w = bgr.shape[:2]
-        scale = 2.0
         return cv2.resize(bgr, (int(w*scale), int(h*scale)), interpolation=cv2.INTER_CUBIC)
 
+    def resize_for_ocr(self, bgr: numpy.ndarray, layout: Layout) -> numpy.ndarray:
+        """Bring the image to the layout's working scale before any full-size processing."""
+        if not layout.resized:
+            return bgr
+        if layout.scale > 1.0:
+            return self.upscale_for_detection(bgr, layout.scale)
+        h, w = bgr.shape[:2]
+        size = (max(1, round(w * layout.scale)), max(1, round(h * layout.scale)))
+        return cv2.resize(bgr, size, interpolation=cv2.INTER_AREA)
+
     def is_bold_and_all_caps(self, text: str, box: list) -> bool:
         """Simple proxy for bold/all-caps: check text.isupper() + box height variance (taller for bold)."""
         if not text.strip().upper().startswith("GOVERNMENT WARNING:"):
@@ -53,15 +287,12 @@ class OCR(object):
         Return: BGR uint8 image (HxWx3) suitable for docTR.
         Avoid hard thresholding here; it hurts the detector.
         """
-        # Contrast boost in LAB (safe for colored labels)
+        # Contrast boost in LAB (safe for colored labels); one LAB buffer is reused
+        # for every step so a 12MP photo doesn't get copied per channel
         lab = cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB)
-        l, a, bb = cv2.split(lab)
-
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        l2 = clahe.apply(l)
-
-        lab2 = cv2.merge([l2, a, bb])
-        bgr2 = cv2.cvtColor(lab2, cv2.COLOR_LAB2BGR)
+        cv2.insertChannel(clahe.apply(cv2.extractChannel(lab, 0)), lab, 0)
+        bgr2 = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=lab)
 
         # Mild denoise (don’t overdo or you smear small fonts)
         bgr2 = cv2.fastNlMeansDenoisingColored(bgr2, None, 5, 5, 7, 21)
@@ -70,185 +301,265 @@ class OCR(object):
         kernel = numpy.array([[0, -1, 0],
                            [-1,  5, -1],
                            [0, -1, 0]], dtype=numpy.float32)
-        bgr2 = cv2.filter2D(bgr2, -1, kernel)
+        bgr2 = cv2.filter2D(bgr2, -1, kernel, dst=bgr2)
 
-        # rgb = cv2.cvtColor(bgr2, cv2.COLOR_BGR2RGB)
         return bgr2
 
-    def doctr_ocr_from_bytes(self) -> dict:
-        doc = DocumentFile.from_images(self.file_contents)
-        result = self.model(doc)
-        metrics = self.ocr_quality_metrics(result)
-        if metrics['ok']:
-            self.findings.append("OCR processing successful")
-            self.findings.append("OCR no preprocessing required")
-            return result.export()
+    def estimate_image_quality(self, bgr: numpy.ndarray) -> dict[str, Any]:
+        """
+        Cheap pre-inference look at the image, used to choose between the raw and the
+        preprocessed OCR path so we only pay for one model pass.
+        Brightness/contrast/dynamic range are 0..1, blur is the Laplacian variance
+        (lower is blurrier) and noise is an estimated sigma in grey levels.
+        """
+        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        text_height = estimate_text_height(gray)
+        # the statistics don't need full resolution, a ~1MP thumbnail is plenty
+        scale = min(1.0, 1024 / max(gray.shape))
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        brightness = float(gray.mean()) / 255
+        contrast = float(gray.std()) / 255
+        p5, p95 = numpy.percentile(gray, [5, 95])
+        dynamic_range = float(p95 - p5) / 255
+        blur = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        # Immerkaer's fast noise estimate: the kernel cancels image structure, leaving noise
+        h, w = gray.shape
+        residual = cv2.filter2D(gray.astype(numpy.float32), -1, self.NOISE_KERNEL)[1:-1, 1:-1]
+        noise = float(numpy.sqrt(numpy.pi / 2) * numpy.abs(residual).sum() / (6 * max(w - 2, 1) * max(h - 2, 1)))
+
+        # Very simple routing rules (tune later)
+        reasons = []
+        if brightness < 0.35 and dynamic_range < 0.7:
+            reasons.append("dim")
+        if contrast < 0.15:
+            reasons.append("low_contrast")
+        if blur < 50:
+            reasons.append("blurry")
+        if noise > 6:
+            reasons.append("noisy")
+
+        return {
+            "preprocess": bool(reasons),
+            "reasons": reasons,
+            "brightness": round(brightness, 3),
+            "contrast": round(contrast, 3),
+            "dynamic_range": round(dynamic_range, 3),
+            "blur": round(blur, 1),
+            "noise": round(noise, 2),
+            "text_height": round(text_height, 1) if text_height else None,
+        }
+
+    def model_input(self, bgr: numpy.ndarray) -> list[numpy.ndarray]:
+        """
+        docTR wants RGB pages; swap the channels in place rather than allocating another copy.
+        Oversized panoramic labels are split into the layout's overlapping tiles.
+        """
+        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=bgr)
+        return tile_pages(rgb, self.layout) if self.layout is not None else [rgb]
+
+    def ocr_pass(self, pages: list[numpy.ndarray], preprocessed: bool, stage: str = "ocr_pass_1"):
+        region_first = len(pages) == 1 and self.use_region_first()
+        with self.timings.stage(stage):
+            if region_first:
+                # the region-first pass talks to the model directly, so it isn't micro-batched
+                result = self.run_model_region_first(pages, stage)
+            else:
+                result = self.run_model(pages)
+            if self.layout is not None:
+                result = restore_layout(result, self.layout)
+        with self.timings.stage("quality_gate"):
+            # a region-first pass that stopped early only recognised a few words, the word
+            # count that matters for the gate is what the detector found
+            detected = self.roi_stats["detected"] if region_first else None
+            # and one that stopped early only holds the header candidates, too few words to
+            # judge the recognition by; a retry would cost more than the pass it saved
+            partial = region_first and self.roi_stats["recognized"] < self.roi_stats["detected"]
+            result = OCRResult.from_document(result)
+            metrics = self.ocr_quality_metrics(result, detected_words=detected, partial=partial)
+        self.quality_metrics = metrics
+        if not metrics['ok']:
+            return None
+        self.findings.append("OCR processing successful")
+        if preprocessed:
+            self.findings.append("OCR preprocessing required")
         else:
+            self.findings.append("OCR no preprocessing required")
+        if region_first:
+            stats = self.roi_stats
+            if stats["header_found"]:
+                self.findings.append(
+                    f"OCR region-first: warning header found among {stats['candidates']} candidate words, "
+                    f"recognized all {stats['recognized']} words"
+                )
+            else:
+                self.findings.append(
+                    f"OCR region-first: warning header not among {stats['candidates']} candidate words, "
+                    f"skipped recognition of {stats['detected'] - stats['recognized']} words"
+                )
+        return result
+
+    def doctr_ocr_from_bytes(self) -> OCRResult | None:
+        with self.timings.stage("decode"):
             bgr = self.decode_bytes_to_bgr(self.file_contents)
-            bgr = self.preprocess_for_doctr(bgr)
-            success, encoded = cv2.imencode(".png", bgr)
-            if not success:
-                raise ValueError("Image encoding failed")
-            doc = DocumentFile.from_images([encoded])
-            result = self.model(doc)
-            metrics = self.ocr_quality_metrics(result)
-            if metrics['ok']:
-                self.findings.append("OCR processing successful")
-                self.findings.append("OCR preprocessing required")
-                return result.export()
+        with self.timings.stage("quality_estimate"):
+            quality = self.estimate_image_quality(bgr)
+        self.image_quality = quality
+        self.findings.append(
+            "Image quality estimate: "
+            f"brightness={quality['brightness']} contrast={quality['contrast']} "
+            f"dynamic_range={quality['dynamic_range']} blur={quality['blur']} noise={quality['noise']}"
+        )
+
+        # straighten tilted and upside-down labels once up front instead of hoping a second
+        # pass reads them; the angles come from a thumbnail, the rotation itself waits for
+        # the resize below
+        with self.timings.stage("deskew"):
+            small = thumbnail(bgr)
+            self.skew_angle = estimate_skew(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+        skewed = self.skew_angle is not None and abs(self.skew_angle) >= MIN_SKEW
+        if self.skew_angle is None:
+            self.findings.append("OCR skew estimate: no text lines found")
+        elif skewed:
+            self.findings.append(f"OCR skew estimate: {self.skew_angle:+.1f} degrees, deskewed")
+        else:
+            self.findings.append(f"OCR skew estimate: {self.skew_angle:+.1f} degrees, left as is")
+
+        # skew is only known up to a quarter turn, the classifier looks at the straightened
+        # thumbnail to tell which way up the text is
+        with self.timings.stage("page_orientation"):
+            if skewed:
+                small = deskew(small, self.skew_angle)
+            turn, confidence = self.estimate_page_turn(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+        if turn and confidence >= MIN_TURN_CONFIDENCE:
+            self.page_turn = turn
+            self.findings.append(f"OCR page orientation: turned {turn:+d} degrees (confidence {confidence:.2f})")
+        elif turn:
+            self.findings.append(f"OCR page orientation: {turn:+d} degrees (confidence {confidence:.2f}), left as is")
+        angle = normalize_angle((self.skew_angle if skewed else 0.0) + self.page_turn)
+
+        # bound the cost of everything below (rotation, denoising, crops, the model) by
+        # working at the resolution the text needs rather than whatever the camera produced.
+        # The layout is planned for the straightened image, which is rotated at working size.
+        with self.timings.stage("resize"):
+            shape = rotated_shape(bgr.shape[:2], angle) if angle else bgr.shape[:2]
+            self.layout = plan_layout(shape, quality["text_height"])
+            bgr = self.resize_for_ocr(bgr, self.layout)
+        if angle:
+            with self.timings.stage("deskew"):
+                bgr = deskew(bgr, angle, shape=self.layout.shape)
+        if self.layout.resized or self.layout.tiles:
+            self.findings.append(f"OCR layout: {self.layout.describe()}")
+
+        # the image is decoded once above; from here on the same buffer goes through
+        # preprocessing straight into the predictor, no re-encoding
+        if quality['preprocess']:
+            self.preprocessing_path = "preprocessed"
+            self.findings.append(f"OCR preprocessing path: preprocessed ({', '.join(quality['reasons'])})")
+            with self.timings.stage("preprocess"):
+                pages = self.model_input(self.preprocess_for_doctr(bgr))
+            result = self.ocr_pass(pages, preprocessed=True)
+        else:
+            self.preprocessing_path = "raw"
+            self.findings.append("OCR preprocessing path: raw")
+            result = self.ocr_pass(self.model_input(bgr), preprocessed=False)
+            if result is None:
+                # the estimate got it wrong, this is the only case that pays for a second pass
+                self.preprocessing_path = "raw+preprocessed"
+                self.findings.append("OCR preprocessing path: preprocessed (raw pass failed the quality gate)")
+                with self.timings.stage("preprocess"):
+                    bgr = cv2.cvtColor(bgr, cv2.COLOR_RGB2BGR, dst=bgr)
+                    pages = self.model_input(self.preprocess_for_doctr(bgr))
+                result = self.ocr_pass(pages, preprocessed=True, stage="ocr_pass_2")
+
+        if result is not None:
+            return result
         self.findings.append("OCR processing failed")
         return None
 
-    def iter_words(self, doctr_doc):
-        # doctr_doc.pages -> blocks -> lines -> words
-        for page in doctr_doc.pages:
-            for block in page.blocks:
-                for line in block.lines:
-                    for word in line.words:
-                        yield word
-
-    def looks_garbage(self, token: str) -> bool:
-        VOWEL_RE = re.compile(r"[aeiouAEIOU]")
-        ALNUM_RE = re.compile(r"[A-Za-z0-9]")
-        t = token.strip()
-        if not t:
-            return True
-        if len(t) == 1 and not t.isalnum(): # lone punctuation like "-" "&"
-            return True
-        if not ALNUM_RE.search(t): # no letters/digits
-            return True
-        if len(t) >= 6 and not VOWEL_RE.search(t):  # "FTSXZP" or other junk that's not a word
-            return True
-        return False
-
-    def ocr_quality_metrics(self, doctr_result):
-        words = list(self.iter_words(doctr_result))
-        if not words:
+    def ocr_quality_metrics(self, result: OCRResult, detected_words: int | None = None, partial: bool = False):
+        """
+        Whether the pass read the label well enough to keep. With partial (only some of
+        the detected words were recognized) just the word count is checked, the
+        confidence and garbage figures are reported but don't fail the gate.
+        """
+        if not len(result):
             return {"ok": False, "reason": "no_words", "word_count": 0}
 
-        confs = []
-        weights = []
-        garbage = 0
-        low_conf = 0
-
-        for w in words:
-            txt = w.value or ""
-            conf = float(getattr(w, "confidence", 0.0))
-            length = max(len(txt.strip()), 1)
-
-            confs.append(conf)
-            weights.append(length)
-
-            if conf < 0.6:
-                low_conf += 1
-            if self.looks_garbage(txt):
-                garbage += 1
-
-        weight = sum(weights)
-        mean_conf = sum(c * wt for c, wt in zip(confs, weights)) / weight
-        low_conf_frac = low_conf / len(words)
-        garbage_frac = garbage / len(words)
+        counts = result.char_counts()
+        confs = result.confidences.astype(numpy.float64)
+        weights = numpy.maximum(counts["length"], 1)
+        mean_conf = float((confs * weights).sum() / weights.sum())
+        low_conf_frac = float((confs < 0.6).mean())
+        garbage_frac = float(result.garbage(counts).mean())
 
         # Very simple gate rules (tune later)
         ok = True
         reasons = []
 
-        if len(words) < 30:
+        if (detected_words if detected_words is not None else len(result)) < 30:
             ok = False; reasons.append("too_few_words")
-        if garbage_frac > 0.35:
+        if garbage_frac > 0.35 and not partial:
             ok = False; reasons.append("too_much_garbage")
-        if mean_conf < 0.75 and garbage_frac > 0.20:
+        if mean_conf < 0.75 and garbage_frac > 0.20 and not partial:
             ok = False; reasons.append("low_conf_and_garbage")
 
         return {
             "ok": ok,
             "reasons": reasons,
-            "word_count": len(words),
+            "word_count": len(result),
             "mean_conf": round(mean_conf, 3),
             "low_conf_frac": round(low_conf_frac, 3),
             "garbage_frac": round(garbage_frac, 3),
+            "partial": partial,
         }
 
-    def doctr_export_to_text(
-            self,
-            export: dict[str, Any],
-            *,
-            min_word_conf: float = 0.0,
-            drop_single_char_below: float = 0.0,
-    ) -> str:
-        """
-        Convert docTR result.export() dict -> plain text.
-
-        Args:
-          min_word_conf: drop any word with confidence below this.
-          drop_single_char_below: if a word is 1 char long and confidence is below this, drop it
-                                  (useful for stray '-' '>' etc).
-        """
-        lines_out: list[tuple[float, float, str]] = []  # (y, x, text)
-
-        for page in export.get("pages", []):
-            for block in page.get("blocks", []):
-                for line in block.get("lines", []):
-                    # line geometry: ((x0, y0), (x1, y1)) normalized 0..1
-                    (x0, y0), (x1, y1) = line.get("geometry", ((0.0, 0.0), (0.0, 0.0)))
-
-                    words = []
-                    for w in line.get("words", []):
-                        val = (w.get("value") or "").strip()
-                        if not val:
-                            continue
-                        conf = float(w.get("confidence", 0.0))
-
-                        if conf < min_word_conf:
-                            continue
-                        if len(val) == 1 and conf < drop_single_char_below:
-                            continue
-
-                        words.append(val)
-
-                    if not words:
-                        continue
-
-                    text = " ".join(words)
-                    lines_out.append((float(y0), float(x0), text))
-
-        # reading order: top-to-bottom, then left-to-right
-        lines_out.sort(key=lambda t: (t[0], t[1]))
-        return "\n".join(t[2] for t in lines_out)
-
     def fuzzy_contains(self, haystack, needle):
         score = fuzz.partial_ratio(needle, haystack)
         return score
 
     def subsequence_contains(self, haystack: str, needle: str, case_sensitive=False) -> bool:
         """
-        True if all needle_tokens appear in order in haystack_tokens (not necessarily contiguous).
-        This would not work on gigantic text arrays, but most label text is relatively short
+        True if all of the needle's characters appear in order in the haystack (not
+        necessarily contiguous), whitespace ignored. For the label's own text the
+        stripped haystack is prepared once, in the index.
         """
-        file_contents = re.sub(r'\s+', '', haystack)
-        search_text = re.sub(r'\s+', '', needle)
-        j = 0
-        for h in range(len(file_contents)):
-            hay = file_contents[h]
-            if j >= len(search_text):
-                break
-            if not case_sensitive and hay.lower() == search_text[j].lower():
-                j += 1
-            elif hay == search_text[j]:
-                j += 1
-        return j == len(search_text)
+        return self.subsequence_span(haystack, needle, case_sensitive) is not None
+
+    def subsequence_span(self, haystack: str, needle: str, case_sensitive=False) -> tuple[int, int] | None:
+        """Where in the haystack subsequence_contains found the needle, from its first to its last character."""
+        if haystack is self.text:
+            matcher = self.get_index().subsequence(case_sensitive)
+        else:
+            matcher = SubsequenceMatcher(haystack, case_sensitive=case_sensitive)
+        return matcher.find(needle)
+
+    def get_text(self) -> str:
+        """Plain-text rendering of the OCR result, computed once."""
+        if self.text is None:
+            self.text = self.processed_img.render_text() if self.processed_img is not None else ""
+        return self.text
+
+    def get_index(self) -> TextIndex:
+        """Token/n-gram index over get_text(), built once."""
+        if self.index is None:
+            self.index = TextIndex(self.get_text())
+        return self.index
 
     def has_text(self, text_to_find, exact=False):
-        self.text = self.doctr_export_to_text(self.processed_img)
+        text = self.get_text()
 
         if exact:
-            ok = self.subsequence_contains(self.text, text_to_find, case_sensitive=True)
+            span = self.subsequence_span(text, text_to_find, case_sensitive=True)
+            ok = span is not None
             return {
                 "ok": ok,
-                "reason": None if ok else "missing_required_tokens"
+                "reason": None if ok else "missing_required_tokens",
+                "span": span,
             }
         else:
-            score = self.fuzzy_contains(self.text, text_to_find)
+            score = self.get_index().fuzzy_score(text_to_find)
             ok = score > 70
             return {
                 "ok": ok,
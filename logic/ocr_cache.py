@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any
+
+
+class OCRCache:
+    """
+    Content-addressed, size-bounded store of finished OCR results in SQLite.
+
+    Entries are keyed by a hash of the image bytes plus the model/pipeline version, so
+    a resubmitted label skips inference entirely, including across restarts. When the
+    stored payloads grow past max_bytes the least recently used entries are dropped.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_results ("
+                " key TEXT PRIMARY KEY,"
+                " payload BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ocr_results_last_access ON ocr_results (last_access)"
+            )
+
+    @staticmethod
+    def key(image_bytes: bytes, version: str) -> str:
+        digest = hashlib.sha256(image_bytes)
+        digest.update(b"\0")
+        digest.update(version.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT payload FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE ocr_results SET last_access = ? WHERE key = ?", (time.time(), key))
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, payload, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time()),
+            )
+            self._evict()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM ocr_results ORDER BY last_access ASC").fetchall()
+        stale: list[tuple[str]] = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM ocr_results WHERE key = ?", stale)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
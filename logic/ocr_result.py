@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import numpy
+
+if TYPE_CHECKING:
+    from doctr.io.elements import Document
+
+# per-character class bits for ASCII, everything else has none
+SPACE, ALNUM, VOWEL = 1, 2, 4
+_ASCII_CLASSES = numpy.zeros(128, dtype=numpy.uint8)
+for _char in " \t\n\r\x0b\x0c":
+    _ASCII_CLASSES[ord(_char)] |= SPACE
+for _char in "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz":
+    _ASCII_CLASSES[ord(_char)] |= ALNUM
+for _char in "aeiouAEIOU":
+    _ASCII_CLASSES[ord(_char)] |= VOWEL
+
+
+def _segment_sums(flags: numpy.ndarray, offsets: numpy.ndarray) -> numpy.ndarray:
+    """Per-word sums of a per-character array, words being offsets[i]:offsets[i + 1]."""
+    cumulative = numpy.concatenate([[0], numpy.cumsum(flags, dtype=numpy.int64)])
+    return cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+
+
+class OCRResult:
+    """
+    Compact OCR output: every word's text in one string with offsets into it, and
+    confidences, boxes and line membership in parallel NumPy arrays.
+
+    Replaces docTR's nested export() dict (a dict and a handful of Python floats per
+    word) for everything the pipeline reads: the quality gate, reading order and the
+    rendered text are array operations over it. Boxes are relative (xmin, ymin, xmax,
+    ymax); rotated word polygons are reduced to their bounding box.
+    """
+
+    __slots__ = ("chars", "offsets", "confidences", "boxes", "word_lines", "line_boxes", "line_pages", "dimensions")
+
+    def __init__(
+        self,
+        chars: str,
+        offsets: numpy.ndarray,
+        confidences: numpy.ndarray,
+        boxes: numpy.ndarray,
+        word_lines: numpy.ndarray,
+        line_boxes: numpy.ndarray,
+        line_pages: numpy.ndarray,
+        dimensions: list[tuple[int, int]],
+    ):
+        self.chars = chars
+        self.offsets = numpy.asarray(offsets, dtype=numpy.int32)
+        self.confidences = numpy.asarray(confidences, dtype=numpy.float32)
+        self.boxes = numpy.asarray(boxes, dtype=numpy.float32).reshape(-1, 4)
+        self.word_lines = numpy.asarray(word_lines, dtype=numpy.int32)
+        self.line_boxes = numpy.asarray(line_boxes, dtype=numpy.float32).reshape(-1, 4)
+        self.line_pages = numpy.asarray(line_pages, dtype=numpy.int16)
+        self.dimensions = [tuple(int(v) for v in shape) for shape in dimensions]
+
+    @classmethod
+    def from_document(cls, document: Document) -> OCRResult:
+        values: list[str] = []
+        confidences: list[float] = []
+        boxes: list[tuple[float, float, float, float]] = []
+        word_lines: list[int] = []
+        line_boxes: list[tuple[float, float, float, float]] = []
+        line_pages: list[int] = []
+
+        def bbox(geometry: Any) -> tuple[float, float, float, float]:
+            points = numpy.asarray(geometry, dtype=numpy.float32).reshape(-1, 2)
+            (x0, y0), (x1, y1) = points.min(axis=0), points.max(axis=0)
+            return float(x0), float(y0), float(x1), float(y1)
+
+        for page_index, page in enumerate(document.pages):
+            for block in page.blocks:
+                for line in block.lines:
+                    line_index = len(line_boxes)
+                    line_boxes.append(bbox(line.geometry))
+                    line_pages.append(page_index)
+                    for word in line.words:
+                        values.append(word.value or "")
+                        confidences.append(float(word.confidence or 0.0))
+                        boxes.append(bbox(word.geometry))
+                        word_lines.append(line_index)
+
+        offsets = numpy.zeros(len(values) + 1, dtype=numpy.int32)
+        numpy.cumsum([len(value) for value in values], out=offsets[1:])
+        return cls(
+            "".join(values),
+            offsets,
+            numpy.array(confidences, dtype=numpy.float32),
+            numpy.array(boxes, dtype=numpy.float32),
+            numpy.array(word_lines, dtype=numpy.int32),
+            numpy.array(line_boxes, dtype=numpy.float32),
+            numpy.array(line_pages, dtype=numpy.int16),
+            [tuple(page.dimensions) for page in document.pages],
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate payload size (text plus arrays), for comparing against the export dict."""
+        arrays = (self.offsets, self.confidences, self.boxes, self.word_lines, self.line_boxes, self.line_pages)
+        return len(self.chars.encode("utf-8")) + sum(array.nbytes for array in arrays)
+
+    def words(self) -> list[str]:
+        return [self.chars[start:end] for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())]
+
+    def char_classes(self) -> numpy.ndarray:
+        """SPACE/ALNUM/VOWEL bits of every character."""
+        codes = numpy.frombuffer(self.chars.encode("utf-32-le"), dtype=numpy.uint32)
+        return numpy.where(codes < 128, _ASCII_CLASSES[numpy.minimum(codes, 127)], 0)
+
+    def stripped_spans(self, classes: numpy.ndarray | None = None) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """Start and end offsets of every word without its leading and trailing whitespace."""
+        classes = self.char_classes() if classes is None else classes
+        starts, ends = self.offsets[:-1], self.offsets[1:]
+        solid = numpy.flatnonzero((classes & SPACE) == 0)
+        if not len(solid):
+            return starts, starts
+        # first non-space character at or after each start, last one before each end
+        first = solid[numpy.minimum(numpy.searchsorted(solid, starts), len(solid) - 1)]
+        last = solid[numpy.maximum(numpy.searchsorted(solid, ends) - 1, 0)]
+        empty = (first >= ends) | (last < starts)
+        return numpy.where(empty, starts, first), numpy.where(empty, starts, last + 1)
+
+    def char_counts(self) -> dict[str, numpy.ndarray]:
+        """
+        Per-word stripped length and counts of ASCII letter/digit and vowel characters,
+        all words at once from one pass over the character codes.
+        """
+        classes = self.char_classes()
+        starts, ends = self.stripped_spans(classes)
+        return {
+            "length": ends - starts,
+            "alnum": _segment_sums((classes & ALNUM) != 0, self.offsets),
+            "vowels": _segment_sums((classes & VOWEL) != 0, self.offsets),
+        }
+
+    def garbage(self, counts: dict[str, numpy.ndarray] | None = None) -> numpy.ndarray:
+        """
+        Words that can't be real label text: empty, no ASCII letters or digits (lone
+        punctuation included), or six and more characters without a vowel ("FTSXZP").
+        """
+        counts = counts or self.char_counts()
+        return (counts["length"] == 0) | (counts["alnum"] == 0) | ((counts["length"] >= 6) & (counts["vowels"] == 0))
+
+    def reading_order(self) -> numpy.ndarray:
+        """Line indexes top-to-bottom, then left-to-right by each line's top-left corner."""
+        return numpy.lexsort((self.line_boxes[:, 0], self.line_boxes[:, 1]))
+
+    def render_text(self, *, min_word_conf: float = 0.0, drop_single_char_below: float = 0.0) -> str:
+        """
+        Plain text, one OCR line per text line in reading order.
+
+        Args:
+          min_word_conf: drop any word with confidence below this.
+          drop_single_char_below: if a word is 1 char long and confidence is below this, drop it
+                                  (useful for stray '-' '>' etc).
+        """
+        if not len(self):
+            return ""
+        starts, ends = self.stripped_spans()
+        length = ends - starts
+        keep = (length > 0) & (self.confidences >= min_word_conf)
+        keep &= ~((length == 1) & (self.confidences < drop_single_char_below))
+        kept = numpy.flatnonzero(keep)
+        if not len(kept):
+            return ""
+
+        rank = numpy.empty(len(self.line_boxes), dtype=numpy.int64)
+        rank[self.reading_order()] = numpy.arange(len(self.line_boxes))
+        kept = kept[numpy.argsort(rank[self.word_lines[kept]], kind="stable")]
+        lines = self.word_lines[kept]
+        breaks = numpy.flatnonzero(lines[1:] != lines[:-1]) + 1
+
+        chars = self.chars
+        words = [chars[start:end] for start, end in zip(starts[kept].tolist(), ends[kept].tolist())]
+        bounds = [0, *breaks.tolist(), len(words)]
+        return "\n".join(" ".join(words[a:b]) for a, b in zip(bounds[:-1], bounds[1:]))
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-friendly form, for the OCR cache."""
+        return {
+            "chars": self.chars,
+            "offsets": self.offsets.tolist(),
+            "confidences": self.confidences.round(4).tolist(),
+            "boxes": self.boxes.round(5).tolist(),
+            "word_lines": self.word_lines.tolist(),
+            "line_boxes": self.line_boxes.round(5).tolist(),
+            "line_pages": self.line_pages.tolist(),
+            "dimensions": [list(shape) for shape in self.dimensions],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> OCRResult:
+        return cls(
+            data["chars"],
+            numpy.array(data["offsets"], dtype=numpy.int32),
+            numpy.array(data["confidences"], dtype=numpy.float32),
+            numpy.array(data["boxes"], dtype=numpy.float32),
+            numpy.array(data["word_lines"], dtype=numpy.int32),
+            numpy.array(data["line_boxes"], dtype=numpy.float32),
+            numpy.array(data["line_pages"], dtype=numpy.int16),
+            [tuple(shape) for shape in data["dimensions"]],
+        )
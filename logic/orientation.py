@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import cv2
+import numpy
+
+# skew is searched within +-SEARCH_RANGE degrees: horizontal and vertical text lines both
+# count, so anything further off is the same skew a quarter turn away
+SEARCH_RANGE = 45.0
+COARSE_STEP = 1.0
+FINE_STEP = 0.1
+# docTR reads slightly tilted text fine, rotating for less isn't worth the resampling
+MIN_SKEW = 2.0
+# the estimate runs on a thumbnail this big
+ANALYSIS_SIZE = 512
+# best angle's score over the median one; below this there are no clear text lines to align
+MIN_PEAK_RATIO = 2.0
+# the page orientation classifier's quarter turn is applied from this confidence on,
+# the same bar docTR's own page straightening uses
+MIN_TURN_CONFIDENCE = 0.5
+QUARTER_TURNS = {90: cv2.ROTATE_90_COUNTERCLOCKWISE, 180: cv2.ROTATE_180, -90: cv2.ROTATE_90_CLOCKWISE}
+
+
+def text_mask(gray: numpy.ndarray) -> numpy.ndarray:
+    """Thumbnail-sized 0/1 mask of dark-on-light and light-on-dark strokes."""
+    scale = min(1.0, ANALYSIS_SIZE / max(gray.shape))
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    dark = cv2.adaptiveThreshold(gray, 1, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 25, 15)
+    light = cv2.adaptiveThreshold(gray, 1, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 25, -15)
+    return (dark | light).astype(numpy.float32)
+
+
+def profile_scores(mask: numpy.ndarray, angles: numpy.ndarray) -> numpy.ndarray:
+    """
+    Projection-profile sharpness of mask rotated by each angle: the summed squared
+    differences of neighbouring row sums plus those of column sums. Text lines aligned
+    with either axis make the profile alternate between full and empty, so it peaks
+    when the text is straight.
+    """
+    h, w = mask.shape
+    center = (w / 2, h / 2)
+    scores = numpy.empty(len(angles))
+    for i, angle in enumerate(angles):
+        rotated = cv2.warpAffine(mask, cv2.getRotationMatrix2D(center, float(angle), 1.0), (w, h), flags=cv2.INTER_NEAREST)
+        rows = rotated.sum(axis=1, dtype=numpy.float64)
+        cols = rotated.sum(axis=0, dtype=numpy.float64)
+        scores[i] = numpy.square(numpy.diff(rows)).sum() + numpy.square(numpy.diff(cols)).sum()
+    return scores
+
+
+def estimate_skew(gray: numpy.ndarray) -> float | None:
+    """
+    Angle (degrees, counter-clockwise as in cv2.getRotationMatrix2D) that straightens
+    the text, or None when the image has no text lines to go by. A coarse search over
+    +-SEARCH_RANGE is refined around its best angle.
+    """
+    mask = text_mask(gray)
+    if not mask.any():
+        return None
+    coarse = numpy.arange(-SEARCH_RANGE, SEARCH_RANGE, COARSE_STEP)
+    scores = profile_scores(mask, coarse)
+    if scores.max() < MIN_PEAK_RATIO * numpy.median(scores):
+        return None
+    best = coarse[scores.argmax()]
+    fine = numpy.arange(best - COARSE_STEP, best + COARSE_STEP + FINE_STEP / 2, FINE_STEP)
+    angle = float(fine[profile_scores(mask, fine).argmax()])
+    return round(angle, 1) + 0.0
+
+
+def thumbnail(bgr: numpy.ndarray) -> numpy.ndarray:
+    """ANALYSIS_SIZE thumbnail to estimate skew and orientation on, instead of the full-size image."""
+    scale = min(1.0, ANALYSIS_SIZE / max(bgr.shape[:2]))
+    if scale < 1.0:
+        bgr = cv2.resize(bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return bgr
+
+
+def normalize_angle(angle: float) -> float:
+    """The same rotation within (-180, 180]."""
+    angle = angle % 360.0
+    return angle - 360.0 if angle > 180.0 else angle
+
+
+def rotated_shape(shape: tuple[int, int], angle: float) -> tuple[int, int]:
+    """(height, width) of the canvas deskew(image of this shape, angle) returns."""
+    h, w = shape[:2]
+    radians = numpy.deg2rad(angle)
+    cos, sin = abs(float(numpy.cos(radians))), abs(float(numpy.sin(radians)))
+    return int(round(h * cos + w * sin)), int(round(h * sin + w * cos))
+
+
+def deskew(bgr: numpy.ndarray, angle: float, shape: tuple[int, int] | None = None) -> numpy.ndarray:
+    """
+    Rotate by angle around the centre onto a canvas large enough to keep the corners
+    (or of the given (height, width)), filling the new area with the image's median
+    border colour. Quarter and half turns that keep the whole image are done exactly.
+    """
+    h, w = bgr.shape[:2]
+    if angle in QUARTER_TURNS and (shape is None or tuple(shape) == rotated_shape((h, w), angle)):
+        return cv2.rotate(bgr, QUARTER_TURNS[angle])
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    new_h, new_w = shape if shape is not None else rotated_shape((h, w), angle)
+    matrix[0, 2] += (new_w - w) / 2
+    matrix[1, 2] += (new_h - h) / 2
+    border = numpy.concatenate([bgr[0], bgr[-1], bgr[:, 0], bgr[:, -1]])
+    fill = tuple(float(v) for v in numpy.median(border, axis=0))
+    return cv2.warpAffine(bgr, matrix, (new_w, new_h), flags=cv2.INTER_LINEAR, borderValue=fill)
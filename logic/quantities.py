@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+# millilitres per unit, keyed by how the unit is written (casefolded)
+ML_PER_UNIT = {
+    "ml": 1.0,
+    "milliliter": 1.0,
+    "milliliters": 1.0,
+    "millilitre": 1.0,
+    "millilitres": 1.0,
+    "cl": 10.0,
+    "l": 1000.0,
+    "liter": 1000.0,
+    "liters": 1000.0,
+    "litre": 1000.0,
+    "litres": 1000.0,
+    "fl oz": 29.5735,
+    "fluid ounce": 29.5735,
+    "fluid ounces": 29.5735,
+    "oz": 29.5735,
+    "pt": 473.176,
+    "pint": 473.176,
+    "pints": 473.176,
+    "qt": 946.353,
+    "quart": 946.353,
+    "quarts": 946.353,
+    "gal": 3785.41,
+    "gallon": 3785.41,
+    "gallons": 3785.41,
+}
+# units a smaller one can follow, as in "1 PINT 8 FL OZ"
+COMPOUND_UNITS = {"pt", "pint", "pints", "qt", "quart", "quarts", "gal", "gallon", "gallons"}
+
+NUMBER = r"(\d+(?:[.,]\d+)?)"
+VOLUME_RE = re.compile(
+    NUMBER + r"\s*(fl\.?\s*oz|fluid\s+ounces?|millilit(?:er|re)s?|lit(?:er|re)s?|ml|cl|l|oz|pints?|pt|quarts?|qt|gallons?|gal)\.?(?![a-z])"
+)
+PERCENT_RE = re.compile(NUMBER + r"\s*%")
+PROOF_RE = re.compile(NUMBER + r"\s*°?\s*proof(?![a-z])")
+BARE_NUMBER_RE = re.compile(r"^\s*" + NUMBER + r"\s*$")
+
+
+def _number(text: str) -> float:
+    return float(text.replace(",", "."))
+
+
+def _unit(text: str) -> str:
+    unit = " ".join(text.replace(".", " ").split())
+    return "fl oz" if unit.startswith("fl") else unit
+
+
+def parse_volumes(text: str) -> list[float]:
+    """Every volume in the (casefolded) text, in millilitres: "12 fl. oz.", "355ml", "0,75 L", "1 pint 8 fl oz"."""
+    volumes: list[float] = []
+    previous_end, previous_unit = -1, ""
+    for match in VOLUME_RE.finditer(text):
+        unit = _unit(match.group(2))
+        ml = _number(match.group(1)) * ML_PER_UNIT[unit]
+        between = text[previous_end:match.start()]
+        if volumes and previous_unit in COMPOUND_UNITS and not between.strip(" .,"):
+            volumes[-1] += ml
+        else:
+            volumes.append(ml)
+        previous_end, previous_unit = match.end(), unit
+    return volumes
+
+
+def parse_alcohol(text: str) -> list[float]:
+    """Every alcohol content in the (casefolded) text, as % by volume: "5.0% alc/vol", "80 proof" (= 40%)."""
+    found = [_number(match.group(1)) for match in PERCENT_RE.finditer(text)]
+    found += [_number(match.group(1)) / 2 for match in PROOF_RE.finditer(text)]
+    return found
+
+
+@dataclass(frozen=True)
+class Quantities:
+    """The volumes (ml) and alcohol contents (% ABV) printed on a label."""
+
+    volumes: tuple[float, ...]
+    alcohol: tuple[float, ...]
+
+    @classmethod
+    def parse(cls, text: str) -> Quantities:
+        return cls(volumes=tuple(parse_volumes(text)), alcohol=tuple(parse_alcohol(text)))
+
+
+def expected_volumes(value: str) -> list[float]:
+    return parse_volumes(value.casefold())
+
+
+def expected_alcohol(value: str) -> list[float]:
+    """Like parse_alcohol, but a bare number ("5.0") is taken as a percentage."""
+    bare = BARE_NUMBER_RE.match(value)
+    if bare:
+        return [_number(bare.group(1))]
+    return parse_alcohol(value.casefold())
@@ -1,30 +1,196 @@
 from __future__ import annotations
 
+import os
+import threading
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from types import MappingProxyType
+from typing import Any, ClassVar, Mapping
 
 import yaml
 
+from logic.settings import get_settings
+from logic.text_index import QuerySet
+
+DEFAULT_YAML_PATH = Path(__file__).with_name("required_text.yaml")
+# seconds between mtime checks when hot reload is on
+HOT_RELOAD_INTERVAL = 1.0
+
+
+@dataclass(frozen=True)
+class RuleSpec:
+    """
+    One entry of a type's `rules` list: which check to run, what it costs relative to
+    the others, the rules it needs to have passed first, and whether failing it rejects
+    the label. Keys besides those are passed to the check as params.
+    """
+
+    name: str
+    check: str
+    cost: float = 1.0
+    fatal: bool = False
+    depends_on: tuple[str, ...] = ()
+    params: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}), compare=False)
+
+    KEYS: ClassVar[tuple[str, ...]] = ("name", "check", "cost", "fatal", "depends_on")
+
+    @classmethod
+    def from_entry(cls, entry: Any, text_type: str) -> RuleSpec:
+        if not isinstance(entry, dict) or not isinstance(entry.get("name"), str):
+            raise ValueError(f"every rule for type '{text_type}' needs a string 'name'")
+        name = entry["name"]
+        cost = entry.get("cost", 1.0)
+        if isinstance(cost, bool) or not isinstance(cost, (int, float)) or cost < 0:
+            raise ValueError(f"rule '{name}': cost must be a non-negative number")
+        if not isinstance(entry.get("fatal", False), bool):
+            raise ValueError(f"rule '{name}': fatal must be true or false")
+        depends_on = entry.get("depends_on", []) or []
+        if not isinstance(depends_on, list):
+            raise ValueError(f"rule '{name}': depends_on must be a list of rule names")
+        return cls(
+            name=name,
+            check=str(entry.get("check", name)),
+            cost=float(cost),
+            fatal=entry.get("fatal", False),
+            depends_on=tuple(str(dependency) for dependency in depends_on),
+            params=MappingProxyType({key: value for key, value in entry.items() if key not in cls.KEYS}),
+        )
+
+
+@dataclass(frozen=True)
+class TypeRules:
+    """Requirements for one product type, already merged with the "all" entries."""
+
+    type: str
+    required: tuple[str, ...]
+    field_mapping: tuple[str, ...]
+    type_list: tuple[str, ...]
+    # the checks run against a label, see logic/label_rules.py
+    rules: tuple[RuleSpec, ...]
+    type_matcher: QuerySet = field(compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """required_text.yaml validated and compiled into per-type lookups."""
+
+    path: Path
+    mtime: float
+    types: Mapping[str, TypeRules]
+    fallback: TypeRules
+
+    def for_type(self, text_type: str) -> TypeRules:
+        return self.types.get(text_type, self.fallback)
+
+    @classmethod
+    def compile(cls, path: Path) -> RuleSet:
+        mtime = path.stat().st_mtime
+        entries = RequiredText._load_yaml(path)
+        types = {entry["type"] for entry in entries}
+        types.add("all")
+        compiled = {text_type: cls._compile_type(entries, text_type) for text_type in types}
+        # unknown product types only get the "all" requirements, like before
+        fallback = cls._compile_type(entries, "")
+        return cls(path=path, mtime=mtime, types=MappingProxyType(compiled), fallback=fallback)
+
+    @staticmethod
+    def _compile_type(entries: list[dict[str, Any]], text_type: str) -> TypeRules:
+        required = RequiredText._required_by_type(entries, "all")
+        field_mapping = RequiredText._field_mapping_by_type(entries, "all")
+        if text_type != "all":
+            required = RequiredText._required_by_type(entries, text_type) + required
+            field_mapping = RequiredText._field_mapping_by_type(entries, text_type) + field_mapping
+        type_list = RequiredText._type_list_by_type(entries, text_type)
+        rules = RequiredText._rules_by_type(entries, "all")
+        if text_type != "all":
+            # a type's own rule replaces the "all" rule of the same name
+            own = RequiredText._rules_by_type(entries, text_type)
+            names = {rule.name for rule in own}
+            rules = own + [rule for rule in rules if rule.name not in names]
+        validate_rules(rules, text_type)
+        return TypeRules(
+            type=text_type,
+            required=tuple(required),
+            field_mapping=tuple(field_mapping),
+            type_list=tuple(type_list),
+            rules=tuple(rules),
+            type_matcher=QuerySet(type_list),
+        )
+
+
+def validate_rules(rules: list[RuleSpec], text_type: str) -> None:
+    """Rule names are unique and dependencies name rules of the same type, without cycles."""
+    by_name: dict[str, RuleSpec] = {}
+    for rule in rules:
+        if rule.name in by_name:
+            raise ValueError(f"rule '{rule.name}' is declared twice for type '{text_type}'")
+        by_name[rule.name] = rule
+    for rule in rules:
+        for dependency in rule.depends_on:
+            if dependency not in by_name:
+                raise ValueError(f"rule '{rule.name}' depends on unknown rule '{dependency}' (type '{text_type}')")
+
+    done: set[str] = set()
+    visiting: set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"rule '{name}' depends on itself (type '{text_type}')")
+        visiting.add(name)
+        for dependency in by_name[name].depends_on:
+            visit(dependency)
+        visiting.discard(name)
+        done.add(name)
+
+    for rule in rules:
+        visit(rule.name)
+
+
+_rule_sets: dict[Path, RuleSet] = {}
+_rule_sets_checked: dict[Path, float] = {}
+_rule_sets_lock = threading.Lock()
+
+
+def load_rule_set(path: Path = DEFAULT_YAML_PATH, hot_reload: bool | None = None) -> RuleSet:
+    """
+    Compiled rule set for a YAML file. It is compiled on first use and then served from
+    memory; with hot reload on, the file's mtime is checked (at most every
+    HOT_RELOAD_INTERVAL seconds) and the rule set recompiled when it changed.
+    """
+    if hot_reload is None:
+        hot_reload = get_settings().required_text_hot_reload
+    path = Path(path)
+    with _rule_sets_lock:
+        rule_set = _rule_sets.get(path)
+        if rule_set is not None and not hot_reload:
+            return rule_set
+        now = time.monotonic()
+        if rule_set is not None and now - _rule_sets_checked.get(path, 0.0) < HOT_RELOAD_INTERVAL:
+            return rule_set
+        _rule_sets_checked[path] = now
+        if rule_set is None or os.stat(path).st_mtime != rule_set.mtime:
+            rule_set = RuleSet.compile(path)
+            _rule_sets[path] = rule_set
+        return rule_set
+
 
 @dataclass
 class RequiredText:
     type: str = "all"
-    yaml_path: Path = field(default_factory=lambda: Path(__file__).with_name("required_text.yaml"))
+    yaml_path: Path = field(default_factory=lambda: DEFAULT_YAML_PATH)
     required: list[str] = field(init=False, default_factory=list)
     field_mapping: list[str] = field(init=False, default_factory=list)
     type_list: list[str] = field(init=False, default_factory=list)
+    rules: TypeRules = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
-        entries = self._load_yaml_entries()
-        type_required = self._required_by_type(entries, self.type)
-        all_required = self._required_by_type(entries, "all")
-        self.required = type_required + all_required
-        type_field_mapping = self._field_mapping_by_type(entries, self.type)
-        all_field_mapping = self._field_mapping_by_type(entries, "all")
-        self.field_mapping = type_field_mapping + all_field_mapping
-        type_type_list = self._type_list_by_type(entries, self.type)
-        self.type_list = type_type_list
+        self.rules = load_rule_set(self.yaml_path).for_type(self.type)
+        self.required = list(self.rules.required)
+        self.field_mapping = list(self.rules.field_mapping)
+        self.type_list = list(self.rules.type_list)
 
     def as_required_list(self) -> list[str]:
         return self.required
@@ -36,11 +202,22 @@ class RequiredText:
         return self.type_list
 
     def _load_yaml_entries(self) -> list[dict[str, Any]]:
-        with self.yaml_path.open("r", encoding="utf-8") as fh:
+        return self._load_yaml(self.yaml_path)
+
+    @staticmethod
+    def _load_yaml(yaml_path: Path) -> list[dict[str, Any]]:
+        with yaml_path.open("r", encoding="utf-8") as fh:
             data = yaml.safe_load(fh) or []
         if not isinstance(data, list):
-            raise ValueError(f"{self.yaml_path} must be a YAML list of type entries")
-        return data
+            raise ValueError(f"{yaml_path} must be a YAML list of type entries")
+        entries: list[dict[str, Any]] = []
+        for entry in data:
+            if not isinstance(entry, dict):
+                continue
+            if not isinstance(entry.get("type"), str):
+                raise ValueError(f"{yaml_path}: every entry needs a string 'type'")
+            entries.append(entry)
+        return entries
 
     @staticmethod
     def _required_by_type(entries: list[dict[str, Any]], text_type: str) -> list[str]:
@@ -70,6 +247,20 @@ class RequiredText:
             mapped_fields.extend(str(value) for value in values)
         return mapped_fields
 
+    @staticmethod
+    def _rules_by_type(entries: list[dict[str, Any]], text_type: str) -> list[RuleSpec]:
+        rules: list[RuleSpec] = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            if entry.get("type") != text_type:
+                continue
+            values = entry.get("rules", []) or []
+            if not isinstance(values, list):
+                raise ValueError(f"rules for type '{text_type}' must be a list")
+            rules.extend(RuleSpec.from_entry(value, text_type) for value in values)
+        return rules
+
     @staticmethod
     def _type_list_by_type(entries: list[dict[str, Any]], text_type: str) -> list[str]:
         product_types: list[str] = []
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import zipfile
+from io import BytesIO
+from typing import Any
+
+from logic import label_rules
+from logic.form510031_reader import TTBForm510031Reader
+from logic.ocr import OCR
+from logic.timings import Timings
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+
+def human_review(findings: list[str]) -> dict[str, Any]:
+    return {
+        "decision": "Human Review",
+        "confidence": 0.0,
+        "full_text": "",
+        "findings": findings,
+    }
+
+
+def error_response(err: Exception) -> dict[str, Any]:
+    return human_review(["Error Occurred", f"Exception: {err}"])
+
+
+def review_label(image_bytes: bytes, pdf_bytes: bytes, timings: Timings | None = None) -> dict[str, Any]:
+    """
+    OCR the label, read the application form and evaluate the rules. Blocking.
+    The response carries a "timings" block with the time spent per stage.
+    """
+    timings = timings or Timings()
+    # if we crash at OCR, let's do it early
+    ocr = OCR(file_contents=image_bytes, timings=timings)
+    if ocr.processed_img is None:
+        response = human_review(ocr.findings)
+    else:
+        form = TTBForm510031Reader(pdf_bytes, mapped_only=True, timings=timings)
+        fields = form.get_values_by_field_mapping()
+        response = label_rules.check_rules(ocr, fields)
+    response["timings"] = timings.as_dict()
+    return response
+
+
+def review_label_with_fields(image_bytes: bytes, fields: dict[str, Any]) -> dict[str, Any]:
+    """Like review_label, but with application fields supplied by the caller. Blocking."""
+    timings = Timings()
+    ocr = OCR(file_contents=image_bytes, timings=timings)
+    if ocr.processed_img is None:
+        response = human_review(ocr.findings)
+    else:
+        response = label_rules.check_rules(ocr, fields)
+    response["timings"] = timings.as_dict()
+    return response
+
+
+def unpack_package(package_name: str, nested_bytes: bytes) -> tuple[bytes, bytes] | dict[str, Any]:
+    """
+    The (image, PDF) bytes of one nested zip from a bulk archive, or, when it isn't
+    exactly 1 PDF + 1 image, the human review response saying so. Blocking.
+    """
+    if not zipfile.is_zipfile(BytesIO(nested_bytes)):
+        response = human_review(["Invalid nested zip file."])
+        response["package"] = package_name
+        return response
+
+    with zipfile.ZipFile(BytesIO(nested_bytes)) as nested_zip:
+        files = [f for f in nested_zip.infolist() if not f.is_dir()]
+
+        pdf_entries = [f for f in files if f.filename.lower().endswith(".pdf")]
+        image_entries = [f for f in files if f.filename.lower().endswith(IMAGE_EXTENSIONS)]
+
+        if len(pdf_entries) != 1 or len(image_entries) != 1:
+            response = human_review(
+                [
+                    "Each nested zip must contain exactly 1 PDF and exactly 1 image (non-PDF).",
+                    f"Found pdf={len(pdf_entries)} image={len(image_entries)}",
+                ]
+            )
+            response["package"] = package_name
+            return response
+
+        return nested_zip.read(image_entries[0]), nested_zip.read(pdf_entries[0])
+
+
+def review_package(package_name: str, nested_bytes: bytes) -> dict[str, Any]:
+    """Review one nested zip from a bulk archive (exactly 1 PDF + 1 image). Blocking."""
+    timings = Timings()
+    try:
+        with timings.stage("package_read"):
+            unpacked = unpack_package(package_name, nested_bytes)
+        if isinstance(unpacked, dict):
+            return unpacked
+        image_bytes, pdf_bytes = unpacked
+        response = review_label(image_bytes, pdf_bytes, timings)
+    except Exception as err:
+        response = error_response(err)
+    response["package"] = package_name
+    return response
+
+
+def ocr_label(image_bytes: bytes) -> OCR:
+    """OCR one label on its own Timings, to be shared by every package using the image. Blocking."""
+    ocr = OCR(file_contents=image_bytes, timings=Timings())
+    # the result is all that's shared, don't carry (or pickle) the image along with it
+    ocr.file_contents = b""
+    if ocr.processed_img is not None:
+        # built once here, the copies each package's rules run on inherit it
+        ocr.get_index()
+    return ocr
+
+
+def read_form(pdf_bytes: bytes) -> tuple[dict[str, Any], Timings]:
+    """The mapped application fields of one form and the time it took to read them. Blocking."""
+    timings = Timings()
+    fields = TTBForm510031Reader(pdf_bytes, mapped_only=True, timings=timings).get_values_by_field_mapping()
+    return fields, timings
+
+
+def review_shared(
+    ocr: OCR,
+    form: tuple[dict[str, Any], Timings] | Exception,
+    timings: Timings,
+    ocr_reused: bool,
+    form_reused: bool,
+) -> dict[str, Any]:
+    """
+    Evaluate the rules for one package from an OCR result and a form read that other
+    packages of the same archive may share. The stages of shared work are only counted
+    for the package that paid for them; the others are tagged as archive hits. Blocking.
+    """
+    if ocr_reused:
+        timings.tag("archive_dedup_image", "hit")
+    else:
+        for name, seconds in ocr.timings.stages.items():
+            timings.add(name, seconds)
+        timings.tags.update(ocr.timings.tags)
+    label = ocr.copy_for_review(timings)
+    if label.processed_img is None:
+        response = human_review(label.findings)
+    elif isinstance(form, Exception):
+        response = error_response(form)
+    else:
+        fields, form_timings = form
+        if form_reused:
+            timings.tag("archive_dedup_pdf", "hit")
+        else:
+            for name, seconds in form_timings.stages.items():
+                timings.add(name, seconds)
+        response = label_rules.check_rules(label, fields)
+    response["timings"] = timings.as_dict()
+    return response
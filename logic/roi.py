@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+import numpy
+
+from logic.text_index import TextIndex
+
+if TYPE_CHECKING:
+    from doctr.io.elements import Document
+
+WARNING_HEADER = "GOVERNMENT WARNING"
+# "GOVERNMENT" vs "WARNING"/"WARNING:", the widths of the two header words are roughly in this ratio
+HEADER_WIDTH_RATIO = 1.35
+
+
+def header_candidates(boxes: numpy.ndarray, page_shape: tuple[int, int], limit: int = 8) -> numpy.ndarray:
+    """
+    Pairs of word boxes (i, j) that could read "GOVERNMENT WARNING", best first.
+
+    boxes are relative (xmin, ymin, xmax, ymax). j is either i's right-hand neighbour on
+    the same line, or, when i ends its line, the first word of the next line. Pairs are
+    ranked by how close their width ratio and height match are to the two header words.
+    """
+    if len(boxes) < 2:
+        return numpy.empty((0, 2), dtype=numpy.intp)
+    page_h, page_w = page_shape
+    x0, x1 = boxes[:, 0] * page_w, boxes[:, 2] * page_w
+    y0, y1 = boxes[:, 1] * page_h, boxes[:, 3] * page_h
+    w = numpy.maximum(x1 - x0, 1.0)
+    h = numpy.maximum(y1 - y0, 1.0)
+    cy = (y0 + y1) / 2
+
+    min_h = numpy.minimum(h[:, None], h[None, :])
+    dy = cy[None, :] - cy[:, None]
+    gap = x0[None, :] - x1[:, None]
+    same_line = (numpy.abs(dy) < 0.5 * min_h) & (gap > -0.3 * min_h)
+    numpy.fill_diagonal(same_line, False)
+
+    # right-hand neighbour: the closest box starting to the right on the same line
+    right_gap = numpy.where(same_line, gap, numpy.inf)
+    right = right_gap.argmin(axis=1)
+    has_right = numpy.isfinite(right_gap.min(axis=1)) & (right_gap.min(axis=1) < 2.0 * h)
+
+    # line wrap: the leftmost box of the line just below
+    next_line = (dy > 0.6 * min_h) & (dy < 2.5 * min_h)
+    wrap_x = numpy.where(next_line, x0[None, :], numpy.inf)
+    wrap = wrap_x.argmin(axis=1)
+    has_wrap = ~has_right & numpy.isfinite(wrap_x.min(axis=1))
+
+    first = numpy.concatenate([numpy.flatnonzero(has_right), numpy.flatnonzero(has_wrap)])
+    second = numpy.concatenate([right[has_right], wrap[has_wrap]])
+    if not len(first):
+        return numpy.empty((0, 2), dtype=numpy.intp)
+
+    # "GOVERNMENT" is ten capitals, so its box is several times wider than tall
+    aspect = w[first] / h[first]
+    # (up to a merged "GOVERNMENT WARNING:" box)
+    plausible = (aspect > 2.5) & (aspect < 30)
+    cost = (
+        numpy.abs(numpy.log(w[first] / w[second] / HEADER_WIDTH_RATIO))
+        + numpy.abs(numpy.log(h[first] / h[second]))
+        + numpy.where(plausible, 0.0, 10.0)
+    )
+    order = numpy.argsort(cost, kind="stable")[:limit]
+    return numpy.stack([first[order], second[order]], axis=1)
+
+
+@dataclass
+class RegionFirstPredictor:
+    """
+    Two-stage docTR inference for single straight pages: detect every word, recognise
+    only the likeliest "GOVERNMENT WARNING" pairs, and recognise the rest of the label
+    only when the header turned up among them.
+
+    Labels without the header (rejected by check_rules on that alone) thus skip most of
+    recognition; their document only holds the candidate words. The model must be a
+    docTR OCRPredictor with assume_straight_pages=True.
+    """
+
+    model: Any
+    header: str = WARNING_HEADER
+    threshold: float = 70.0
+    max_pairs: int = 8
+
+    @staticmethod
+    def supports(model: Any) -> bool:
+        return all(hasattr(model, name) for name in ("det_predictor", "reco_predictor", "doc_builder")) and bool(
+            getattr(model, "assume_straight_pages", False)
+        )
+
+    def __call__(
+        self,
+        pages: list[numpy.ndarray],
+        stage: Callable[[str], AbstractContextManager[Any]] | None = None,
+    ) -> tuple[Document, dict[str, Any]]:
+        """The document plus counts of detected, candidate and recognised words; stage() times the steps."""
+        from doctr.utils.geometry import detach_scores, extract_crops
+
+        stage = stage or (lambda _: nullcontext())
+        if len(pages) != 1:
+            raise ValueError("RegionFirstPredictor works on one page at a time")
+        page = pages[0]
+
+        with stage("detect"):
+            loc_preds = self.model.det_predictor(pages)
+            boxes, scores = detach_scores([next(iter(pred.values())) for pred in loc_preds])
+            for hook in getattr(self.model, "hooks", []):
+                boxes = hook(boxes)
+            page_boxes, page_scores = boxes[0], scores[0]
+            crops = extract_crops(page, page_boxes[:, :4])
+            kept = numpy.array([all(s > 0 for s in crop.shape) for crop in crops], dtype=bool)
+            crops = [crop for crop, keep in zip(crops, kept) if keep]
+            page_boxes, page_scores = page_boxes[kept], page_scores[kept]
+
+        with stage("recognize_roi"):
+            pairs = header_candidates(page_boxes, page.shape[:2], self.max_pairs)
+            roi = list(dict.fromkeys(int(i) for i in pairs.ravel()))
+            words: dict[int, tuple[str, float]] = dict(zip(roi, self.model.reco_predictor([crops[i] for i in roi])))
+            lines = "\n".join(f"{words[i][0]} {words[j][0]}" for i, j in pairs)
+            score = TextIndex(lines).fuzzy_score(self.header) if lines else 0.0
+
+        found = score > self.threshold
+        if found:
+            with stage("recognize"):
+                rest = [i for i in range(len(crops)) if i not in words]
+                words.update(zip(rest, self.model.reco_predictor([crops[i] for i in rest])))
+
+        selected = sorted(words)
+        document = self.model.doc_builder(
+            pages,
+            [page_boxes[selected]],
+            [page_scores[selected]],
+            [[words[i] for i in selected]],
+            [page.shape[:2]],
+            [[{"value": 0, "confidence": None} for _ in selected]],
+        )
+        return document, {
+            "detected": len(crops),
+            "candidates": len(roi),
+            "recognized": len(selected),
+            "header_found": found,
+            "header_score": round(float(score), 1),
+        }
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Sequence
+
+from logic.required_text import RuleSpec
+from logic.timings import Timings
+
+PASS, FAIL, ERROR, SKIPPED = "pass", "fail", "error", "skipped"
+
+
+@dataclass
+class Verdict:
+    """What a check found: whether the label passed, how sure it is, a one-line detail and any structured data."""
+
+    ok: bool
+    confidence: float = 0.0
+    detail: str = ""
+    data: dict[str, Any] | None = None
+
+
+Check = Callable[[RuleSpec, Any], Verdict]
+
+
+@dataclass
+class RuleOutcome:
+    rule: str
+    status: str
+    fatal: bool
+    cost: float
+    confidence: float = 0.0
+    detail: str = ""
+    seconds: float = 0.0
+    data: dict[str, Any] | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """JSON-friendly form used in responses; time is in milliseconds."""
+        outcome = {
+            "rule": self.rule,
+            "status": self.status,
+            "fatal": self.fatal,
+            "confidence": round(float(self.confidence), 3),
+            "detail": self.detail,
+            "ms": round(self.seconds * 1000, 3),
+        }
+        if self.data is not None:
+            outcome["data"] = self.data
+        return outcome
+
+
+def evaluate(rule: RuleSpec, checks: Mapping[str, Check], context: Any) -> RuleOutcome:
+    """Run one rule's check, turning a missing check or an exception into an error outcome."""
+    outcome = RuleOutcome(rule=rule.name, status=ERROR, fatal=rule.fatal, cost=rule.cost)
+    check = checks.get(rule.check)
+    start = time.perf_counter()
+    try:
+        if check is None:
+            outcome.detail = f"Unknown check '{rule.check}'"
+        else:
+            verdict = check(rule, context)
+            outcome.status = PASS if verdict.ok else FAIL
+            outcome.confidence = verdict.confidence
+            outcome.detail = verdict.detail
+            outcome.data = verdict.data
+    except Exception as err:
+        outcome.detail = f"Exception: {err}"
+    outcome.seconds = time.perf_counter() - start
+    return outcome
+
+
+def run_rules(
+    rules: Sequence[RuleSpec],
+    checks: Mapping[str, Check],
+    context: Any,
+    *,
+    stop_on_reject: bool = True,
+    max_workers: int = 1,
+    timings: Timings | None = None,
+) -> list[RuleOutcome]:
+    """
+    Evaluate rules in dependency order and return their outcomes in the order they were
+    decided, those never reached last.
+
+    Of the rules whose dependencies are done, fatal ones run first, one at a time and
+    cheapest first; with stop_on_reject the first one to fail ends the run. Non-fatal
+    rules wait until no fatal rule is ready, then run together on up to max_workers
+    threads. A rule whose dependency didn't pass is skipped. Each rule's time is also
+    recorded as a "rule.<name>" stage.
+    """
+    # declaration order breaks cost ties
+    position = {rule.name: index for index, rule in enumerate(rules)}
+    pending = sorted(rules, key=lambda rule: (not rule.fatal, rule.cost, position[rule.name]))
+    outcomes: dict[str, RuleOutcome] = {}
+    stopped_by: str | None = None
+
+    def record(outcome: RuleOutcome) -> None:
+        outcomes[outcome.rule] = outcome
+        if timings is not None and outcome.status != SKIPPED:
+            timings.add(f"rule.{outcome.rule}", outcome.seconds)
+
+    while pending and stopped_by is None:
+        ready = []
+        decided = len(outcomes)
+        for rule in pending:
+            if not all(dependency in outcomes for dependency in rule.depends_on):
+                continue
+            blocked = [dependency for dependency in rule.depends_on if outcomes[dependency].status != PASS]
+            if blocked:
+                record(RuleOutcome(rule.name, SKIPPED, rule.fatal, rule.cost, detail=f"Needs '{blocked[0]}' to pass"))
+            else:
+                ready.append(rule)
+        if not ready:
+            pending = [rule for rule in pending if rule.name not in outcomes]
+            if len(outcomes) == decided:
+                break
+            continue
+
+        # pending is in priority order, so a fatal rule that is ready comes first
+        if ready[0].fatal:
+            outcome = evaluate(ready[0], checks, context)
+            record(outcome)
+            if outcome.status == FAIL and stop_on_reject:
+                stopped_by = outcome.rule
+        elif max_workers > 1 and len(ready) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(ready)), thread_name_prefix="rule") as pool:
+                for outcome in pool.map(lambda rule: evaluate(rule, checks, context), ready):
+                    record(outcome)
+        else:
+            for rule in ready:
+                record(evaluate(rule, checks, context))
+        pending = [rule for rule in pending if rule.name not in outcomes]
+
+    for rule in pending:
+        detail = f"Not run, '{stopped_by}' rejected the label" if stopped_by else "Not run"
+        record(RuleOutcome(rule.name, SKIPPED, rule.fatal, rule.cost, detail=detail))
+    return list(outcomes.values())
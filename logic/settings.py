@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_str(name: str, default: str) -> str:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip()
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Runtime tuning knobs, read from environment variables (see README)."""
+
+    ocr_executor: str = "thread"
+    ocr_workers: int = 1
+    ocr_torch_threads: int = 0
+    ocr_shared_model: bool = False
+    ocr_queue_depth: int = 8
+    ocr_warmup: bool = True
+    ocr_batch_size: int = 4
+    ocr_batch_wait_ms: float = 10.0
+    ocr_roi: bool = False
+    ocr_cache_path: str = str(Path.home() / ".cache" / "label-verification" / "ocr_cache.sqlite3")
+    ocr_cache_max_mb: int = 512
+    review_max_in_flight: int = 4
+    review_queue_size: int = 16
+    review_queue_timeout_s: float = 30.0
+    max_upload_mb: int = 25
+    max_bulk_upload_mb: int = 1024
+    required_text_hot_reload: bool = False
+    rules_stop_on_reject: bool = True
+    rules_workers: int = 1
+    jobs_dir: str = str(Path.home() / ".cache" / "label-verification" / "jobs")
+
+    @classmethod
+    def from_env(cls) -> Settings:
+        settings = cls(
+            ocr_executor=_env_str("OCR_EXECUTOR", cls.ocr_executor).lower(),
+            ocr_workers=_env_int("OCR_WORKERS", cls.ocr_workers),
+            ocr_torch_threads=_env_int("OCR_TORCH_THREADS", cls.ocr_torch_threads),
+            ocr_shared_model=_env_bool("OCR_SHARED_MODEL", cls.ocr_shared_model),
+            ocr_queue_depth=_env_int("OCR_QUEUE_DEPTH", cls.ocr_queue_depth),
+            ocr_warmup=_env_bool("OCR_WARMUP", cls.ocr_warmup),
+            ocr_batch_size=_env_int("OCR_BATCH_SIZE", cls.ocr_batch_size),
+            ocr_batch_wait_ms=_env_float("OCR_BATCH_WAIT_MS", cls.ocr_batch_wait_ms),
+            ocr_roi=_env_bool("OCR_ROI", cls.ocr_roi),
+            ocr_cache_path=_env_str("OCR_CACHE_PATH", cls.ocr_cache_path),
+            ocr_cache_max_mb=_env_int("OCR_CACHE_MAX_MB", cls.ocr_cache_max_mb),
+            review_max_in_flight=_env_int("REVIEW_MAX_IN_FLIGHT", cls.review_max_in_flight),
+            review_queue_size=_env_int("REVIEW_QUEUE_SIZE", cls.review_queue_size),
+            review_queue_timeout_s=_env_float("REVIEW_QUEUE_TIMEOUT_S", cls.review_queue_timeout_s),
+            max_upload_mb=_env_int("MAX_UPLOAD_MB", cls.max_upload_mb),
+            max_bulk_upload_mb=_env_int("MAX_BULK_UPLOAD_MB", cls.max_bulk_upload_mb),
+            required_text_hot_reload=_env_bool("REQUIRED_TEXT_HOT_RELOAD", cls.required_text_hot_reload),
+            rules_stop_on_reject=_env_bool("RULES_STOP_ON_REJECT", cls.rules_stop_on_reject),
+            rules_workers=_env_int("RULES_WORKERS", cls.rules_workers),
+            jobs_dir=_env_str("JOBS_DIR", cls.jobs_dir),
+        )
+        if settings.ocr_executor not in ("thread", "process"):
+            raise ValueError("OCR_EXECUTOR must be 'thread' or 'process'")
+        if settings.ocr_workers < 1:
+            raise ValueError("OCR_WORKERS must be at least 1")
+        if settings.ocr_queue_depth < 0:
+            raise ValueError("OCR_QUEUE_DEPTH must not be negative")
+        if settings.ocr_batch_size < 1:
+            raise ValueError("OCR_BATCH_SIZE must be at least 1")
+        if settings.ocr_batch_wait_ms < 0:
+            raise ValueError("OCR_BATCH_WAIT_MS must not be negative")
+        if settings.review_max_in_flight < 1:
+            raise ValueError("REVIEW_MAX_IN_FLIGHT must be at least 1")
+        if settings.review_queue_size < 0:
+            raise ValueError("REVIEW_QUEUE_SIZE must not be negative")
+        if settings.review_queue_timeout_s < 0:
+            raise ValueError("REVIEW_QUEUE_TIMEOUT_S must not be negative")
+        if settings.max_upload_mb < 0 or settings.max_bulk_upload_mb < 0:
+            raise ValueError("MAX_UPLOAD_MB and MAX_BULK_UPLOAD_MB must not be negative")
+        if settings.rules_workers < 1:
+            raise ValueError("RULES_WORKERS must be at least 1")
+        if settings.ocr_cache_max_mb < 0:
+            raise ValueError("OCR_CACHE_MAX_MB must not be negative")
+        return settings
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings.from_env()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Iterable
+
+import numpy
+
+# every code point str.isspace() (and so the regex \s) counts as whitespace; none is above U+3000
+WHITESPACE = numpy.array([code for code in range(0x3001) if chr(code).isspace()], dtype=numpy.uint32)
+
+
+def fold(text: str, case_sensitive: bool) -> str:
+    """Lowercased text with one character per input character, so offsets still line up."""
+    if case_sensitive:
+        return text
+    folded = text.lower()
+    if len(folded) != len(text):
+        # a few characters lowercase to two ("İ"), keep the first
+        folded = "".join(char.lower()[:1] for char in text)
+    return folded
+
+
+def strip_whitespace(text: str) -> tuple[str, numpy.ndarray]:
+    """The text without whitespace, and the offset in text of each character kept."""
+    codes = numpy.frombuffer(text.encode("utf-32-le"), dtype=numpy.uint32)
+    keep = ~numpy.isin(codes, WHITESPACE)
+    return codes[keep].tobytes().decode("utf-32-le"), numpy.flatnonzero(keep)
+
+
+@lru_cache(maxsize=1024)
+def subsequence_pattern(needle: str) -> re.Pattern[str]:
+    """
+    Regex (for re.match) finding the needle's characters in order at their earliest
+    positions, the span from the first to the last in group 1. Each "[^c]*+c" jumps
+    possessively to the next c, so a match, or a miss, is a single left-to-right scan
+    with no backtracking. Needles come from a small fixed set, so patterns are cached.
+    """
+    chars = [re.escape(char) for char in needle]
+    steps = [f"[^{char}]*+{char}" for char in chars]
+    return re.compile(f"[^{chars[0]}]*+(" + chars[0] + "".join(steps[1:]) + ")")
+
+
+class SubsequenceMatcher:
+    """
+    Exact, in-order character matching of needles against one text, ignoring all
+    whitespace and, unless case_sensitive, case: "GOVERNMENT WARNING: (1) According..."
+    matches a label that reads the same statement over several lines, with words split
+    or run together by OCR, and any other characters in between.
+
+    The whitespace-stripped (and lowercased) text is prepared once, forwards and
+    reversed; each needle is then a compiled-regex scan of it, plus one back from the
+    end of the match to tighten where it starts.
+    """
+
+    def __init__(self, text: str, case_sensitive: bool = False):
+        self.case_sensitive = case_sensitive
+        self.haystack, self.offsets = strip_whitespace(fold(text, case_sensitive))
+        self.reversed = self.haystack[::-1]
+
+    def find(self, needle: str) -> tuple[int, int] | None:
+        """
+        (start, end) offsets in the text of the shortest stretch ending where the needle
+        first completes that holds it, or None.
+        """
+        wanted, _ = strip_whitespace(fold(needle, self.case_sensitive))
+        if not wanted:
+            return (0, 0)
+        match = subsequence_pattern(wanted).match(self.haystack)
+        if match is None:
+            return None
+        end = match.end(1)
+        # the needle backwards from there finds its latest possible start
+        back = subsequence_pattern(wanted[::-1]).match(self.reversed, len(self.haystack) - end)
+        start = len(self.haystack) - back.end(1)
+        return int(self.offsets[start]), int(self.offsets[end - 1]) + 1
+
+    def find_all(self, needles: Iterable[str]) -> list[tuple[int, int] | None]:
+        return [self.find(needle) for needle in needles]
+
+    def contains(self, needle: str) -> bool:
+        return self.find(needle) is not None
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Iterable
+
+import numpy
+from rapidfuzz import fuzz, process, utils
+
+from logic.quantities import Quantities
+from logic.subsequence import SubsequenceMatcher
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Casefolded NFKC text, used for index keys and lookups."""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(normalize(text))
+
+
+class TextIndex:
+    """
+    Search index over the rendered text of one OCR result.
+
+    Built once per label: a token -> positions map answers exact phrase lookups, and a
+    character n-gram -> lines map narrows fuzzy lookups down to the few lines that can
+    actually match, so each rule costs roughly the same no matter how dense the label is.
+    """
+
+    def __init__(self, text: str, ngram: int = 3, max_candidates: int = 5):
+        self.text = text
+        self.ngram = ngram
+        self.max_candidates = max_candidates
+        self.lines = text.split("\n") if text else []
+        # char offset of every line in self.text, to cut windows without re-joining
+        self.line_starts: list[int] = []
+        offset = 0
+        for line in self.lines:
+            self.line_starts.append(offset)
+            offset += len(line) + 1
+
+        # every line plus every pair of neighbouring lines, so phrases wrapped onto
+        # two lines are still matched by the batched scorers
+        self.windows = self.lines + [f"{a} {b}" for a, b in zip(self.lines, self.lines[1:])]
+        self.processed_windows: list[str] | None = None
+        self.vocabulary: list[str] | None = None
+        self._quantities: Quantities | None = None
+        self._subsequence: dict[bool, SubsequenceMatcher] = {}
+
+        self.tokens: list[str] = []
+        self.token_lines: list[int] = []
+        self.positions: dict[str, list[int]] = defaultdict(list)
+        self.ngram_lines: dict[str, set[int]] = defaultdict(set)
+        for line_no, line in enumerate(self.lines):
+            for token in tokenize(line):
+                self.positions[token].append(len(self.tokens))
+                self.tokens.append(token)
+                self.token_lines.append(line_no)
+            for gram in self._ngrams(normalize(line)):
+                self.ngram_lines[gram].add(line_no)
+
+    def _ngrams(self, text: str) -> set[str]:
+        text = " ".join(text.split())
+        if len(text) <= self.ngram:
+            return {text} if text else set()
+        return {text[i:i + self.ngram] for i in range(len(text) - self.ngram + 1)}
+
+    def contains(self, phrase: str) -> bool:
+        """True if the phrase's tokens appear contiguously (case and punctuation insensitive)."""
+        return self.find(phrase) is not None
+
+    def find(self, phrase: str) -> int | None:
+        """Token position where the phrase starts, or None."""
+        wanted = tokenize(phrase)
+        if not wanted:
+            return None
+        for start in self.positions.get(wanted[0], ()):
+            if self.tokens[start:start + len(wanted)] == wanted:
+                return start
+        return None
+
+    def token_scores(self, tokens: Iterable[str]) -> dict[str, float]:
+        """
+        How well each token appears on the label: 100 for a token the label has, else
+        its best fuzz.ratio against the label's distinct tokens, all of those scored in
+        one batched rapidfuzz call however many tokens are asked about.
+        """
+        wanted = set(tokens)
+        scores = {token: 100.0 for token in wanted if token in self.positions}
+        missing = sorted(wanted - scores.keys())
+        if not missing:
+            return scores
+        if self.vocabulary is None:
+            self.vocabulary = list(self.positions)
+        if not self.vocabulary:
+            return {**scores, **dict.fromkeys(missing, 0.0)}
+        best = process.cdist(missing, self.vocabulary, scorer=fuzz.ratio).max(axis=1)
+        scores.update(zip(missing, best.astype(float).tolist()))
+        return scores
+
+    def quantities(self) -> Quantities:
+        """Volumes and alcohol contents on the label, parsed once; wrapped lines are joined first."""
+        if self._quantities is None:
+            self._quantities = Quantities.parse(normalize(" ".join(self.lines)))
+        return self._quantities
+
+    def subsequence(self, case_sensitive: bool = False) -> SubsequenceMatcher:
+        """Exact in-order character matcher over the text, prepared once per case mode."""
+        if case_sensitive not in self._subsequence:
+            self._subsequence[case_sensitive] = SubsequenceMatcher(self.text, case_sensitive=case_sensitive)
+        return self._subsequence[case_sensitive]
+
+    def candidate_lines(self, needle: str) -> list[int]:
+        """Lines sharing the most n-grams with the needle, best first."""
+        counts: Counter[int] = Counter()
+        for gram in self._ngrams(normalize(needle)):
+            for line_no in self.ngram_lines.get(gram, ()):
+                counts[line_no] += 1
+        return [line_no for line_no, _ in counts.most_common(self.max_candidates)]
+
+    def window(self, line_no: int, span: int) -> str:
+        """Text around a line, wide enough that a needle of `span` chars touching it fits."""
+        start = max(self.line_starts[line_no] - span, 0)
+        end = self.line_starts[line_no] + len(self.lines[line_no]) + span
+        return self.text[start:end]
+
+    def fuzzy_score(self, needle: str) -> float:
+        """
+        fuzz.partial_ratio of the needle against the text, evaluated only on windows
+        around the candidate lines instead of the whole label.
+        """
+        if not needle or not self.text:
+            return 0.0
+        if needle in self.text:
+            return 100.0
+        best = 0.0
+        for line_no in self.candidate_lines(needle):
+            score = fuzz.partial_ratio(needle, self.window(line_no, len(needle)), score_cutoff=best)
+            best = max(best, score)
+        return best
+
+    def best_matches(
+            self,
+            queries: list[str] | QuerySet,
+            *,
+            score_cutoff: float = 70,
+            limit: int = 3,
+    ) -> list[tuple[str, float]]:
+        """
+        Score every query against every line window in one batched rapidfuzz call
+        (spread over all cores) and return the best `limit` queries scoring above
+        score_cutoff, best first. Ties go to the longer, more specific query.
+
+        A query may list alternative spellings separated by "/" (e.g. "Lager/Lager Beer");
+        the best alternative counts for the query. Pass a prebuilt QuerySet to skip
+        preparing the queries on every call.
+        """
+        if not isinstance(queries, QuerySet):
+            queries = QuerySet(queries)
+        if not queries.variants or not self.windows:
+            return []
+        if self.processed_windows is None:
+            self.processed_windows = [utils.default_process(window) for window in self.windows]
+
+        scores = process.cdist(
+            queries.variants,
+            self.processed_windows,
+            scorer=fuzz.partial_ratio,
+            score_cutoff=score_cutoff,
+            workers=-1,
+        )
+        best_by_variant = scores.max(axis=1)
+        best_by_query = numpy.zeros(len(queries.queries), dtype=best_by_variant.dtype)
+        numpy.maximum.at(best_by_query, queries.owners, best_by_variant)
+
+        matched = [
+            (queries.queries[query_no], float(score))
+            for query_no, score in enumerate(best_by_query)
+            if score > score_cutoff
+        ]
+        matched.sort(key=lambda item: (-item[1], -len(item[0])))
+        return matched[:limit]
+
+
+class QuerySet:
+    """
+    Queries prepared once for TextIndex.best_matches: split into their "/" alternatives
+    and run through rapidfuzz's default processor.
+    """
+
+    def __init__(self, queries: Iterable[str]):
+        self.queries = tuple(queries)
+        variants: list[str] = []
+        owners: list[int] = []
+        for query_no, query in enumerate(self.queries):
+            for variant in query.split("/"):
+                processed = utils.default_process(variant)
+                if processed:
+                    variants.append(processed)
+                    owners.append(query_no)
+        self.variants = tuple(variants)
+        self.owners = numpy.asarray(owners, dtype=numpy.intp)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+
+class Timings:
+    """
+    Wall-clock time spent per pipeline stage for one review.
+
+    Stages are named by the code that runs them ("decode", "ocr_pass_1", "rule.required_text", ...);
+    entering the same stage twice adds up. Tags carry the few non-timing facts the
+    metrics need, like which OCR path a review took.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.tags: dict[str, str] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def tag(self, name: str, value: str) -> None:
+        self.tags[name] = value
+
+    def as_dict(self) -> dict[str, Any]:
+        """JSON-friendly form used in responses; times are in milliseconds."""
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages": {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+            "tags": dict(self.tags),
+        }
@@ -1,29 +1,82 @@
-import os
-import tempfile
-import unicodedata
-from typing import Any, List
 import json
-from io import BytesIO
-import zipfile
 import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import IO
 
 import uvicorn
 from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse, HTMLResponse
-import cv2
-import numpy as np
-from PIL import Image
-from doctr.io import DocumentFile
-from doctr.models import ocr_predictor
-import re
-
-from logic import label_rules
-from logic.form510031_reader import TTBForm510031Reader
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse, StreamingResponse
+
+from logic import bulk as bulk_review
+from logic.admission import AdmissionMiddleware, get_admission_controller
+from logic import review as pipeline
+from logic.executor import QueueFullError, get_executor, shutdown_executor
+from logic.jobs import JobNotFoundError, get_job_store, notify_job_runner, shutdown_jobs
+from logic.label_rules import validate_checks
+from logic.metrics import metrics
 from logic.ocr import OCR
-from logic.required_text import RequiredText
+from logic.required_text import load_rule_set
+from logic.settings import get_settings
+
+warmup_futures: list[Future] = []
+
 
-app = FastAPI(title="Alcohol Label Warning Checker")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # compile required_text.yaml now so a broken file fails the deploy, not the first review
+    validate_checks(load_rule_set())
+    if get_settings().ocr_warmup:
+        # runs in the background: /healthz answers right away, /readyz once this is done
+        warmup_futures.extend(get_executor().warmup())
+    # resume bulk jobs a previous process left unfinished
+    get_job_store()
+    yield
+    shutdown_jobs()
+    shutdown_executor()
+    OCR.shutdown_batcher()
+
+
+app = FastAPI(title="Alcohol Label Warning Checker", lifespan=lifespan)
+# concurrency cap, wait queue and upload limits for the review endpoints, applied before the body is read
+app.add_middleware(AdmissionMiddleware)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def busy_response(err: QueueFullError) -> JSONResponse:
+    return JSONResponse(
+        pipeline.human_review(["Server busy, try again later", f"Exception: {err}"]),
+        status_code=503,
+        headers={"Retry-After": str(get_admission_controller().retry_after())},
+    )
+
+
+async def spool_upload(upload: UploadFile) -> IO[bytes]:
+    """Copy an upload to an anonymous temp file in chunks so big archives never sit in RAM."""
+    spool = tempfile.TemporaryFile()
+    try:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            spool.write(chunk)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+def not_a_zip_response() -> JSONResponse:
+    return JSONResponse(
+        {
+            "findings": ["Uploaded file must be a zip archive containing nested zip files."]
+        },
+        status_code=400,
+    )
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -34,200 +87,196 @@ async def home() -> HTMLResponse:
     return HTMLResponse(html)
 
 
+@app.get("/healthz")
+async def healthz():
+    """The process is up and serving requests."""
+    return JSONResponse({"status": "ok"})
+
+
+@app.get("/readyz")
+async def readyz():
+    """
+    The OCR model is loaded and warmed up, so reviews won't pay the startup cost. With
+    OCR_WARMUP=0 the model loads on the first review wherever it runs, so there is
+    nothing to wait for.
+    """
+    if not get_settings().ocr_warmup:
+        return JSONResponse({"status": "ready", "warmup": "disabled"})
+    if not warmup_futures:
+        ready = OCR.is_ready()
+    else:
+        if not all(future.done() for future in warmup_futures):
+            return JSONResponse({"status": "warming up"}, status_code=503)
+        errors = [str(future.exception()) for future in warmup_futures if future.exception() is not None]
+        if errors:
+            return JSONResponse({"status": "warmup failed", "findings": errors}, status_code=503)
+        ready = True
+    if not ready:
+        return JSONResponse({"status": "model not loaded"}, status_code=503)
+    return JSONResponse({"status": "ready"})
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Review latency per stage, decisions and OCR path counts in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/review")
-async def review(image_file: UploadFile = File(...), pdf_file: UploadFile = File(...)):
-    response = {}
+async def review(image_file: UploadFile = File(...), pdf_file: UploadFile = File(...), timings: bool = False):
     try:
-        # if we crash at OCR, let's do it early
+        read_start = time.perf_counter()
         contents = await image_file.read()
-        ocr = OCR(file_contents=contents)
-        if ocr.processed_img is None:
-            response = {
-                "decision": "Human Review",
-                "confidence": 0.0,
-                "full_text": "",
-                "findings": ocr.findings
-            }
-            return response
         form_bytes = await pdf_file.read()
-        form = TTBForm510031Reader(form_bytes)
-        fields = form.get_values_by_field_mapping()
-        response = label_rules.check_rules(ocr, fields)
+        read_seconds = time.perf_counter() - read_start
+        # OCR, PDF parsing and rules are blocking, keep them off the event loop
+        response = await get_executor().run(pipeline.review_label, contents, form_bytes)
+        response = metrics.record_review(response, extra_stages={"request_read": read_seconds}, keep_timings=timings)
+    except QueueFullError as err:
+        metrics.record_failure("/review", "busy")
+        return busy_response(err)
     except Exception as err:
-        response = {
-            "decision": "Human Review",
-            "confidence": 0.0,
-            "full_text": "",
-            "findings": ["Error Occurred", f"Exception: {err}"]
-        }
-    finally:
-        return JSONResponse(response)
+        metrics.record_failure("/review", "error")
+        response = pipeline.error_response(err)
+    return JSONResponse(response)
 
 
 @app.post("/review_with_fields")
-async def review_with_fields(image_file: UploadFile = File(...), fields_json: str = Form(...)):
+async def review_with_fields(image_file: UploadFile = File(...), fields_json: str = Form(...), timings: bool = False):
     try:
         try:
             fields = json.loads(fields_json)
         except json.JSONDecodeError:
             return JSONResponse(
-                {
-                    "decision": "Human Review",
-                    "confidence": 0.0,
-                    "full_text": "",
-                    "findings": ["Invalid fields_json. Expected a JSON array of YAML field names."],
-                },
+                pipeline.human_review(["Invalid fields_json. Expected a JSON array of YAML field names."]),
                 status_code=400,
             )
         if not isinstance(fields, dict):
             return JSONResponse(
-                {
-                    "decision": "Human Review",
-                    "confidence": 0.0,
-                    "full_text": "",
-                    "findings": ["Invalid fields_json. Expected a JSON dictionary."],
-                },
+                pipeline.human_review(["Invalid fields_json. Expected a JSON dictionary."]),
                 status_code=400,
             )
+        read_start = time.perf_counter()
         contents = await image_file.read()
-        ocr = OCR(file_contents=contents)
-        if ocr.processed_img is None:
-            return JSONResponse(
-                {
-                    "decision": "Human Review",
-                    "confidence": 0.0,
-                    "full_text": "",
-                    "findings": ocr.findings,
-                }
-            )
-
-        response = label_rules.check_rules(ocr, fields)
+        read_seconds = time.perf_counter() - read_start
+        response = await get_executor().run(pipeline.review_label_with_fields, contents, fields)
+        response = metrics.record_review(response, extra_stages={"request_read": read_seconds}, keep_timings=timings)
         return JSONResponse(response)
+    except QueueFullError as err:
+        metrics.record_failure("/review_with_fields", "busy")
+        return busy_response(err)
     except Exception as err:
-        response = {
-            "decision": "Human Review",
-            "confidence": 0.0,
-            "full_text": "",
-            "findings": ["Error Occurred", f"Exception: {err}"],
-        }
-        return JSONResponse(response)
+        metrics.record_failure("/review_with_fields", "error")
+        return JSONResponse(pipeline.error_response(err))
 
 
 @app.post("/bulk")
-async def bulk(zip_file: UploadFile = File(...)):
+async def bulk(zip_file: UploadFile = File(...), summary: bool = Form(False)):
+    """
+    Review every nested package of a zip archive. With summary=true the response is an
+    object with the results plus how many images and PDFs were shared between packages.
+    """
     try:
-        outer_bytes = await zip_file.read()
-        outer_buffer = BytesIO(outer_bytes)
-        if not zipfile.is_zipfile(outer_buffer):
-            return JSONResponse(
-                {
-                    "findings": ["Uploaded file must be a zip archive containing nested zip files."]
-                },
-                status_code=400,
-            )
+        with await spool_upload(zip_file) as spool:
+            if not zipfile.is_zipfile(spool):
+                return not_a_zip_response()
 
-        results: list[dict[str, Any]] = []
-        with zipfile.ZipFile(BytesIO(outer_bytes)) as outer_zip:
-            for nested_info in outer_zip.infolist():
-                if nested_info.is_dir():
-                    continue
-
-                nested_name = nested_info.filename
-                if not nested_name.lower().endswith(".zip"):
-                    results.append(
-                        {
-                            "package": nested_name,
-                            "decision": "Human Review",
-                            "confidence": 0.0,
-                            "full_text": "",
-                            "findings": ["Skipped: top-level entry is not a zip file."],
-                        }
-                    )
-                    continue
-
-                nested_bytes = outer_zip.read(nested_info)
-                nested_buffer = BytesIO(nested_bytes)
-                if not zipfile.is_zipfile(nested_buffer):
-                    results.append(
-                        {
-                            "package": nested_name,
-                            "decision": "Human Review",
-                            "confidence": 0.0,
-                            "full_text": "",
-                            "findings": ["Invalid nested zip file."],
-                        }
-                    )
-                    continue
-
-                try:
-                    with zipfile.ZipFile(BytesIO(nested_bytes)) as nested_zip:
-                        files = [f for f in nested_zip.infolist() if not f.is_dir()]
-
-                        pdf_entries = [f for f in files if f.filename.lower().endswith(".pdf")]
-                        image_entries = [
-                            f for f in files if f.filename.lower().endswith((".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp"))
-                        ]
-
-                        if len(pdf_entries) != 1 or len(image_entries) != 1:
-                            results.append(
-                                {
-                                    "package": nested_name,
-                                    "decision": "Human Review",
-                                    "confidence": 0.0,
-                                    "full_text": "",
-                                    "findings": [
-                                        "Each nested zip must contain exactly 1 PDF and exactly 1 image (non-PDF).",
-                                        f"Found pdf={len(pdf_entries)} image={len(image_entries)}",
-                                    ],
-                                }
-                            )
-                            continue
-
-                        pdf_bytes = nested_zip.read(pdf_entries[0])
-                        image_bytes = nested_zip.read(image_entries[0])
-
-                        ocr = OCR(file_contents=image_bytes)
-                        if ocr.processed_img is None:
-                            results.append(
-                                {
-                                    "package": nested_name,
-                                    "decision": "Human Review",
-                                    "confidence": 0.0,
-                                    "full_text": "",
-                                    "findings": ocr.findings,
-                                }
-                            )
-                            continue
-
-                        form = TTBForm510031Reader(pdf_bytes)
-                        fields = form.get_values_by_field_mapping()
-                        response = label_rules.check_rules(ocr, fields)
-                        response["package"] = nested_name
-                        results.append(response)
-                except Exception as err:
-                    results.append(
-                        {
-                            "package": nested_name,
-                            "decision": "Human Review",
-                            "confidence": 0.0,
-                            "full_text": "",
-                            "findings": ["Error Occurred", f"Exception: {err}"],
-                        }
-                    )
+            archive_summary = bulk_review.ArchiveSummary()
+            with zipfile.ZipFile(spool) as outer_zip:
+                results = [result async for result in bulk_review.review_archive(outer_zip, summary=archive_summary)]
 
+        if summary:
+            return JSONResponse({"results": results, "summary": archive_summary.as_dict()})
         return JSONResponse(results)
+    except QueueFullError as err:
+        metrics.record_failure("/bulk", "busy")
+        return busy_response(err)
     except Exception as err:
-        return JSONResponse(
-            [
-                {
-                    "package": getattr(zip_file, "filename", "unknown"),
-                    "decision": "Human Review",
-                    "confidence": 0.0,
-                    "full_text": "",
-                    "findings": ["Error Occurred", f"Exception: {err}"],
-                }
-            ]
-        )
+        metrics.record_failure("/bulk", "error")
+        response = pipeline.error_response(err)
+        response["package"] = getattr(zip_file, "filename", "unknown")
+        return JSONResponse([response])
+
+
+@app.post("/bulk_stream")
+async def bulk_stream(zip_file: UploadFile = File(...), ordered: bool = Form(False), summary: bool = Form(False)):
+    """
+    Same input as /bulk, but the response is newline-delimited JSON with one line per
+    nested package, written as soon as that package finishes. With summary=true a last
+    {"summary": ...} line follows.
+    """
+    spool = await spool_upload(zip_file)
+    if not zipfile.is_zipfile(spool):
+        spool.close()
+        return not_a_zip_response()
+    outer_zip = zipfile.ZipFile(spool)
+    archive_name = getattr(zip_file, "filename", "unknown")
+
+    async def lines():
+        archive_summary = bulk_review.ArchiveSummary()
+        try:
+            async for result in bulk_review.review_archive(outer_zip, ordered=ordered, summary=archive_summary):
+                yield json.dumps(result) + "\n"
+            if summary:
+                yield json.dumps({"summary": archive_summary.as_dict()}) + "\n"
+        except Exception as err:
+            metrics.record_failure("/bulk_stream", "error")
+            response = pipeline.error_response(err)
+            response["package"] = archive_name
+            yield json.dumps(response) + "\n"
+        finally:
+            outer_zip.close()
+            spool.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def job_not_found_response(job_id: str) -> JSONResponse:
+    return JSONResponse({"findings": [f"Unknown job '{job_id}'."]}, status_code=404)
+
+
+@app.post("/jobs")
+async def submit_job(zip_file: UploadFile = File(...)):
+    """
+    Queue a bulk archive (same format as /bulk) for background processing.
+    Returns the job id and initial progress straight away.
+    """
+    with await spool_upload(zip_file) as spool:
+        if not zipfile.is_zipfile(spool):
+            return not_a_zip_response()
+        spool.seek(0)
+        store = get_job_store()
+        try:
+            progress = await run_in_threadpool(store.create, spool, getattr(zip_file, "filename", None) or "upload.zip")
+        except zipfile.BadZipFile:
+            # looked like a zip, but its central directory doesn't hold up
+            return not_a_zip_response()
+    notify_job_runner()
+    return JSONResponse(progress, status_code=202)
+
+
+@app.get("/jobs/{job_id}")
+async def job_progress(job_id: str):
+    try:
+        return JSONResponse(get_job_store().progress(job_id))
+    except JobNotFoundError:
+        return job_not_found_response(job_id)
+
+
+@app.get("/jobs/{job_id}/results")
+async def job_results(job_id: str, offset: int = 0):
+    try:
+        return JSONResponse(get_job_store().results(job_id, offset=offset))
+    except JobNotFoundError:
+        return job_not_found_response(job_id)
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    try:
+        return JSONResponse(get_job_store().cancel(job_id))
+    except JobNotFoundError:
+        return job_not_found_response(job_id)
 
 
 if __name__ == '__main__':
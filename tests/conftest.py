@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic import jobs
+from logic.ocr import OCR
+from logic.settings import get_settings
+
+
+class UprightPages:
+    """Page orientation classifier that finds every page upright, so tests never load its weights."""
+
+    def __call__(self, pages):
+        return [[0] * len(pages), [0] * len(pages), [1.0] * len(pages)]
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch):
+    """
+    Keep the OCR cache and the job queue out of the home directory, and start every test
+    from fresh settings, cache and job store: a cache left over from an earlier run
+    would answer the e2e reviews without running OCR at all. Pages are taken to be
+    upright unless a test swaps in its own orientation model.
+    """
+    state = tmp_path_factory.mktemp("label-verification")
+    monkeypatch.setenv("OCR_CACHE_PATH", str(state / "ocr_cache.sqlite3"))
+    monkeypatch.setenv("JOBS_DIR", str(state / "jobs"))
+    get_settings.cache_clear()
+    monkeypatch.setattr(OCR, "cache", None)
+    monkeypatch.setattr(OCR, "orientation_model", UprightPages())
+    jobs.shutdown_jobs()
+    monkeypatch.setattr(jobs, "_store", None)
+    yield
+    jobs.shutdown_jobs()
+    get_settings.cache_clear()
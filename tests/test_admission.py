@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic import admission
+from logic.admission import AdmissionController, AdmissionMiddleware, AdmissionRejected
+from logic.settings import Settings
+
+
+def test_controller_queues_then_rejects() -> None:
+    async def scenario() -> None:
+        controller = AdmissionController(limit=1, queue_size=1, queue_timeout=5)
+        controller.hold_seconds = 4.0
+        await controller.acquire()
+        waiting = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.waiting == 1
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.status_code == 429
+        # one request ahead in the queue, one slot, ~4s per request
+        assert rejected.value.retry_after == 8
+
+        controller.release(4.0)
+        await waiting
+        assert controller.active == 1 and controller.waiting == 0
+        controller.release(4.0)
+        assert controller.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_controller_times_out_waiters() -> None:
+    async def scenario() -> None:
+        controller = AdmissionController(limit=1, queue_size=4, queue_timeout=0.01)
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.status_code == 503
+        assert rejected.value.retry_after >= 1
+        controller.release()
+        # the timed-out waiter doesn't get the slot
+        assert controller.active == 0 and controller.waiting == 0
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch):
+    settings = replace(Settings(), max_upload_mb=1)
+    monkeypatch.setattr(admission, "get_settings", lambda: settings)
+    monkeypatch.setattr(admission, "_controller", AdmissionController(limit=1, queue_size=0, queue_timeout=1))
+
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware)
+
+    @app.post("/review")
+    async def review(image_file: UploadFile = File(...)):
+        return {"size": len(await image_file.read())}
+
+    return TestClient(app)
+
+
+def test_upload_limit_while_streaming(client) -> None:
+    small = client.post("/review", files={"image_file": ("a.png", b"x" * 1000)})
+    assert small.status_code == 200 and small.json() == {"size": 1000}
+
+    declared = client.post("/review", files={"image_file": ("a.png", b"x" * (2 * 1024 * 1024))})
+    assert declared.status_code == 413
+
+    # no Content-Length: cut off once the streamed body passes the limit
+    def chunks():
+        yield b'--b\r\nContent-Disposition: form-data; name="image_file"; filename="a.png"\r\n\r\n'
+        for _ in range(4):
+            yield b"x" * (512 * 1024)
+        yield b"\r\n--b--\r\n"
+
+    streamed = client.post("/review", content=chunks(), headers={"content-type": "multipart/form-data; boundary=b"})
+    assert streamed.status_code == 413
+
+
+def test_full_queue_answers_429_with_retry_after(client) -> None:
+    admission._controller.active = 1
+    response = client.post("/review", files={"image_file": ("a.png", b"x")})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import batch
+from logic.ocr import OCR
+from test_bulk import CountingModel
+
+FIXTURES = ROOT / "tests" / "fixtures"
+
+
+def _tree(root: Path) -> None:
+    # one folder per package, and a flat folder paired by file name
+    (root / "busch").mkdir(parents=True)
+    shutil.copy(FIXTURES / "beer_valid.png", root / "busch" / "label.png")
+    shutil.copy(FIXTURES / "busch_application.pdf", root / "busch" / "form.pdf")
+    (root / "flat").mkdir()
+    shutil.copy(FIXTURES / "beer_valid.png", root / "flat" / "a.png")
+    shutil.copy(FIXTURES / "busch_application.pdf", root / "flat" / "a.pdf")
+    shutil.copy(FIXTURES / "beer_valid.png", root / "flat" / "b.png")
+
+
+def test_discover_pairs_and_manifest(tmp_path: Path) -> None:
+    _tree(tmp_path)
+    pairs, warnings = batch.discover_pairs(tmp_path)
+    assert [pair.id for pair in pairs] == ["busch/label.png", "flat/a.png"]
+    assert pairs[1].pdf == tmp_path / "flat" / "a.pdf"
+    assert warnings == ["no pair for flat/b.png"]
+
+    manifest = tmp_path / "pairs.csv"
+    manifest.write_text("image,pdf,id\nflat/b.png,flat/a.pdf,\nbusch/label.png,busch/form.pdf,busch\n")
+    assert [(pair.id, pair.image) for pair in batch.read_manifest(manifest)] == [
+        ("flat/b.png|flat/a.pdf", tmp_path / "flat" / "b.png"),
+        ("busch", tmp_path / "busch" / "label.png"),
+    ]
+
+
+def test_run_writes_jsonl_and_resumes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    model = CountingModel()
+    monkeypatch.setattr(OCR, "model", model)
+    monkeypatch.setattr(OCR, "warmed_up", True)
+    monkeypatch.setattr(OCR, "get_cache", classmethod(lambda cls: None))
+    _tree(tmp_path / "in")
+    pairs, _ = batch.discover_pairs(tmp_path / "in")
+    output = tmp_path / "out" / "results.jsonl"
+    # an earlier run finished the first pair and died writing the second
+    output.parent.mkdir()
+    output.write_text(json.dumps({"id": "busch/label.png", "decision": "Reject"}) + '\n{"id": "flat/a.pn')
+
+    decisions = batch.run(pairs, output, workers=0)
+
+    assert sum(decisions.values()) == 1
+    assert model.pages == 1
+    lines = output.read_text().splitlines()
+    assert json.loads(lines[-1])["id"] == "flat/a.png"
+    assert "timings" not in json.loads(lines[-1])
+    assert batch.completed_ids(output) == {"busch/label.png", "flat/a.png"}
+    assert sum(batch.run(pairs, output, workers=0).values()) == 0
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic import ocr as ocr_module
+from logic.batching import BatchingPredictor
+from logic.ocr import OCR
+from logic.settings import Settings
+
+
+class RecordingModel:
+    """Stands in for a docTR predictor: one "page" per input, tagged with the array's value."""
+
+    def __init__(self, bad_value: int | None = None):
+        self.calls: list[list[int]] = []
+        self.bad_value = bad_value
+
+    def __call__(self, pages: list[numpy.ndarray]):
+        values = [int(page[0, 0]) for page in pages]
+        self.calls.append(values)
+        if self.bad_value in values:
+            raise ValueError(f"can't read page {self.bad_value}")
+        return SimpleNamespace(pages=[f"page-{value}" for value in values])
+
+
+def page(value: int) -> numpy.ndarray:
+    return numpy.full((2, 2), value, dtype=numpy.uint8)
+
+
+def test_concurrent_callers_share_one_batch_and_get_their_own_pages() -> None:
+    model = RecordingModel()
+    batcher = BatchingPredictor(model, max_batch_size=3, max_wait_ms=2000)
+    try:
+        first = batcher.submit([page(1)])
+        second = batcher.submit([page(2), page(3)])
+        assert first.result(timeout=60).pages == ["page-1"]
+        assert second.result(timeout=60).pages == ["page-2", "page-3"]
+    finally:
+        batcher.shutdown()
+    # the batch filled up, so it ran without waiting out max_wait
+    assert model.calls == [[1, 2, 3]]
+
+
+def test_partial_batch_runs_after_max_wait() -> None:
+    model = RecordingModel()
+    batcher = BatchingPredictor(model, max_batch_size=4, max_wait_ms=50)
+    try:
+        start = time.monotonic()
+        assert batcher([page(7)]).pages == ["page-7"]
+        elapsed = time.monotonic() - start
+    finally:
+        batcher.shutdown()
+    assert 0.04 <= elapsed < 2
+    assert model.calls == [[7]]
+
+
+def test_failed_batch_is_retried_per_caller() -> None:
+    model = RecordingModel(bad_value=2)
+    batcher = BatchingPredictor(model, max_batch_size=3, max_wait_ms=2000)
+    try:
+        good = batcher.submit([page(1)])
+        bad = batcher.submit([page(2)])
+        other = batcher.submit([page(3)])
+        assert good.result(timeout=60).pages == ["page-1"]
+        assert other.result(timeout=60).pages == ["page-3"]
+        with pytest.raises(ValueError, match="page 2"):
+            bad.result(timeout=60)
+    finally:
+        batcher.shutdown()
+    assert model.calls == [[1, 2, 3], [1], [2], [3]]
+
+
+def test_shutdown_runs_queued_pages_then_refuses_new_ones() -> None:
+    release = threading.Event()
+
+    def slow_model(pages):
+        release.wait(5)
+        return RecordingModel()(pages)
+
+    batcher = BatchingPredictor(slow_model, max_batch_size=1, max_wait_ms=0)
+    running = batcher.submit([page(1)])
+    queued = batcher.submit([page(2)])
+    stopper = threading.Thread(target=batcher.shutdown)
+    stopper.start()
+    release.set()
+    stopper.join(timeout=60)
+    assert not stopper.is_alive()
+    assert running.result(timeout=60).pages == ["page-1"]
+    assert queued.result(timeout=60).pages == ["page-2"]
+    with pytest.raises(RuntimeError):
+        batcher.submit([page(3)])
+
+
+@pytest.mark.parametrize(
+    ("executor", "workers", "batched"),
+    [("thread", 1, False), ("process", 4, False), ("thread", 4, True)],
+)
+def test_batcher_only_where_reviews_share_the_model(monkeypatch: pytest.MonkeyPatch, executor, workers, batched) -> None:
+    settings = replace(Settings(), ocr_executor=executor, ocr_workers=workers, ocr_batch_size=4)
+    monkeypatch.setattr(ocr_module, "get_settings", lambda: settings)
+    monkeypatch.setattr(OCR, "batcher", None)
+    monkeypatch.setattr(OCR, "batching", True)
+    try:
+        assert (OCR.get_batcher() is not None) == batched
+    finally:
+        OCR.shutdown_batcher()
+
+
+def test_pages_submitted_during_shutdown_are_run_or_refused() -> None:
+    batcher = BatchingPredictor(RecordingModel(), max_batch_size=1, max_wait_ms=0)
+    accepted, refused = [], []
+
+    def submit(value: int) -> None:
+        try:
+            accepted.append(batcher.submit([page(value)]))
+        except RuntimeError:
+            refused.append(value)
+
+    submitters = [threading.Thread(target=submit, args=(value,)) for value in range(50)]
+    for thread in submitters[:25]:
+        thread.start()
+    batcher.shutdown(wait=False)
+    for thread in submitters[25:]:
+        thread.start()
+    for thread in submitters:
+        thread.join()
+    batcher.shutdown()
+    # nothing slipped in behind the sentinel: every accepted caller gets its result
+    assert len(accepted) + len(refused) == 50
+    assert all(future.result(timeout=60).pages for future in accepted)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.harness import find_regressions, load_results, process_memory_mb, run_case, write_results
+
+
+def test_run_case_reports_percentiles_and_errors() -> None:
+    calls = iter([True, False, True, True])
+    result = run_case("case", lambda: next(calls), iterations=3, warmup=1)
+    assert result.calls == 3
+    assert result.errors == 1  # the warmup call is not counted
+    assert result.p50_ms <= result.p95_ms <= result.p99_ms
+    assert result.peak_rss_mb > 0
+
+
+def test_regression_threshold_against_baseline(tmp_path: Path) -> None:
+    # long enough that the rounded p95 is never 0, which would disable the comparison
+    fast = run_case("case", lambda: time.sleep(0.002), iterations=2, warmup=0)
+    baseline = tmp_path / "baseline.json"
+    write_results(baseline, [fast], meta={})
+    recorded = load_results(baseline)
+
+    assert find_regressions([fast], recorded, threshold=0.25) == []
+
+    slow = fast.__class__(**{**recorded["case"], "p95_ms": recorded["case"]["p95_ms"] * 2 + 1})
+    regressions = find_regressions([slow], recorded, threshold=0.25)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("case: p95_ms")
+
+
+@pytest.mark.skipif(not Path("/proc/self/smaps_rollup").exists(), reason="needs /proc/<pid>/smaps_rollup")
+def test_process_memory_of_this_process() -> None:
+    memory = process_memory_mb(os.getpid())
+    assert 0 < memory["uss"] <= memory["rss"]
+    assert memory["uss"] <= memory["pss"] <= memory["rss"]
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import sys
+import threading
+import zipfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import main
+from logic import bulk
+from logic.executor import ReviewExecutor
+from logic.ocr import OCR
+
+FIXTURES = ROOT / "tests" / "fixtures"
+
+
+class CountingModel:
+    """Returns the same 40 words for every page and counts the pages it was given."""
+
+    def __init__(self) -> None:
+        self.pages = 0
+
+    def __call__(self, pages):
+        from doctr.io.elements import Block, Document, Line, Page, Word
+
+        self.pages += len(pages)
+        words = [
+            Word(value, 0.95, ((i / 45, 0.1), (i / 45 + 0.02, 0.12)), 0.9, {"value": 0, "confidence": None})
+            for i, value in enumerate(["GOVERNMENT", "WARNING:", *(f"WORD{n}" for n in range(38))])
+        ]
+        return Document(pages=[
+            Page(page=page, blocks=[Block([Line(words)])], page_idx=0, dimensions=page.shape[:2]) for page in pages
+        ])
+
+
+def _package(image: str, pdf: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as nested:
+        nested.writestr(image, (FIXTURES / image).read_bytes())
+        nested.writestr(pdf, (FIXTURES / pdf).read_bytes())
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def model(monkeypatch: pytest.MonkeyPatch) -> CountingModel:
+    fake = CountingModel()
+    monkeypatch.setattr(OCR, "model", fake)
+    monkeypatch.setattr(OCR, "get_cache", classmethod(lambda cls: None))
+    return fake
+
+
+def test_identical_payloads_are_processed_once(model: CountingModel) -> None:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as outer:
+        outer.writestr("a.zip", _package("beer_valid.png", "busch_application.pdf"))
+        outer.writestr("b.zip", _package("beer_valid.png", "busch_application.pdf"))
+        outer.writestr("c.zip", _package("beer_valid.png", "f510031.pdf"))
+        outer.writestr("notes.txt", b"not a package")
+
+    async def run() -> list[dict]:
+        with zipfile.ZipFile(buffer) as outer_zip:
+            return [result async for result in bulk.review_archive(outer_zip, summary=summary)]
+
+    summary = bulk.ArchiveSummary()
+    results = asyncio.run(run())
+
+    assert [result["package"] for result in results] == ["a.zip", "b.zip", "c.zip", "notes.txt"]
+    assert model.pages == 1
+    assert summary.as_dict() == {
+        "packages": 4,
+        "not_reviewable": 1,
+        "images": 3,
+        "unique_images": 1,
+        "pdfs": 3,
+        "unique_pdfs": 2,
+        "ocr_cache_hits": 0,
+        "image_hits": 2,
+        "pdf_hits": 1,
+    }
+    # every package still gets its own rule outcomes, from its own form
+    assert [rule["status"] for rule in results[0]["rules"]] == [rule["status"] for rule in results[1]["rules"]]
+    assert results[0]["findings"] == results[1]["findings"]
+    assert [rule["rule"] for rule in results[0]["rules"]].count("government_warning") == 1
+    assert all(result["decision"] in ("Reject", "Human Review") for result in results[:3])
+
+
+def test_packages_are_read_off_the_event_loop(model: CountingModel, monkeypatch: pytest.MonkeyPatch) -> None:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as outer:
+        outer.writestr("a.zip", _package("beer_valid.png", "busch_application.pdf"))
+        outer.writestr("b.zip", _package("busch.jpg", "f510031.pdf"))
+    readers: list[int] = []
+    unpack_package = bulk.pipeline.unpack_package
+
+    def recording_unpack(name, nested_bytes):
+        readers.append(threading.get_ident())
+        return unpack_package(name, nested_bytes)
+
+    async def run() -> tuple[int, list[dict]]:
+        with zipfile.ZipFile(buffer) as outer_zip:
+            return threading.get_ident(), [result async for result in bulk.review_archive(outer_zip)]
+
+    monkeypatch.setattr(bulk.pipeline, "unpack_package", recording_unpack)
+    loop_thread, results = asyncio.run(run())
+
+    # fingerprinting the archive unpacks every package too, also in a thread
+    assert readers and loop_thread not in readers
+    assert [result["package"] for result in results] == ["a.zip", "b.zip"]
+
+
+def test_full_queue_fails_the_whole_archive_with_503(model: CountingModel, monkeypatch: pytest.MonkeyPatch) -> None:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as outer:
+        outer.writestr("a.zip", _package("beer_valid.png", "busch_application.pdf"))
+        outer.writestr("b.zip", _package("beer_valid.png", "f510031.pdf"))
+
+    executor = ReviewExecutor(workers=1, queue_depth=0)
+    monkeypatch.setattr(ReviewExecutor, "capacity", property(lambda self: 0))
+    monkeypatch.setattr(bulk, "get_executor", lambda: executor)
+    try:
+        response = TestClient(main.app).post("/bulk", files={"zip_file": ("batch.zip", buffer.getvalue())})
+    finally:
+        executor.shutdown()
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+    assert model.pages == 0
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import sys
+import time
+import zipfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import main
+from logic import bulk
+from logic.executor import ReviewExecutor
+from logic.timings import Timings
+
+
+def archive(count: int) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as outer:
+        for n in range(count):
+            nested = io.BytesIO()
+            with zipfile.ZipFile(nested, "w") as package:
+                package.writestr("label.png", f"image-{n}")
+                package.writestr("form.pdf", f"form-{n}")
+            outer.writestr(f"{n}.zip", nested.getvalue())
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def spools(monkeypatch: pytest.MonkeyPatch) -> list:
+    """Stubs the OCR, form and rules stages (the first package is the slowest) and records every spool."""
+
+    def ocr_label(image_bytes: bytes):
+        if image_bytes == b"image-0":
+            time.sleep(0.3)
+        return SimpleNamespace(image=image_bytes.decode(), timings=Timings())
+
+    def review_shared(ocr, form, timings, ocr_reused, form_reused):
+        return {"decision": "Human Review", "image": ocr.image, "form": form}
+
+    executor = ReviewExecutor(workers=3, queue_depth=8)
+    monkeypatch.setattr(bulk, "get_executor", lambda: executor)
+    monkeypatch.setattr(bulk.pipeline, "ocr_label", ocr_label)
+    monkeypatch.setattr(bulk.pipeline, "read_form", lambda pdf_bytes: pdf_bytes.decode())
+    monkeypatch.setattr(bulk.pipeline, "review_shared", review_shared)
+
+    opened = []
+    spool_upload = main.spool_upload
+
+    async def recording_spool_upload(upload):
+        spool = await spool_upload(upload)
+        opened.append(spool)
+        return spool
+
+    monkeypatch.setattr(main, "spool_upload", recording_spool_upload)
+    yield opened
+    executor.shutdown()
+
+
+def post(body: bytes, **form: str):
+    return TestClient(main.app).post("/bulk_stream", files={"zip_file": ("batch.zip", body)}, data=form)
+
+
+def test_one_json_line_per_package_then_the_summary(spools) -> None:
+    response = post(archive(3), ordered="true", summary="true")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    # package 0 finishes last, ordered output still starts with it
+    assert [line["package"] for line in lines[:3]] == ["0.zip", "1.zip", "2.zip"]
+    assert [line["form"] for line in lines[:3]] == ["form-0", "form-1", "form-2"]
+    assert lines[3] == {"summary": bulk.ArchiveSummary(
+        packages=3, images=3, unique_images=3, pdfs=3, unique_pdfs=3,
+    ).as_dict()}
+    assert spools[0].closed
+
+
+def test_unordered_stream_yields_in_completion_order(spools) -> None:
+    response = post(archive(3))
+    packages = [json.loads(line)["package"] for line in response.text.splitlines()]
+    assert sorted(packages) == ["0.zip", "1.zip", "2.zip"]
+    assert packages[-1] == "0.zip"
+
+
+def test_non_zip_upload_is_refused_and_its_spool_closed(spools) -> None:
+    response = post(b"not a zip")
+    assert response.status_code == 400
+    assert spools[0].closed
+
+
+def test_spool_is_closed_when_the_client_goes_away(spools) -> None:
+    async def scenario() -> None:
+        upload = UploadFile(file=io.BytesIO(archive(3)), filename="batch.zip")
+        response = await main.bulk_stream(upload, ordered=False, summary=False)
+        lines = response.body_iterator
+        first = json.loads(await lines.__anext__())
+        assert first["package"] in ("1.zip", "2.zip")
+        assert not spools[0].closed
+        # what the server does with the body once the client disconnects
+        await lines.aclose()
+
+    asyncio.run(scenario())
+    assert spools[0].closed
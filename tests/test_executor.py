@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import main
+from logic.executor import QueueFullError, ReviewExecutor
+from logic.ocr import OCR
+
+builds: list[int] = []
+
+
+class TinyModel:
+    def __call__(self, pages):
+        return None
+
+
+def build_model() -> TinyModel:
+    builds.append(os.getpid())
+    return TinyModel()
+
+
+def model_in_worker() -> tuple[int, int, list[int]]:
+    return os.getpid(), id(OCR.get_model()), builds
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="pre-fork needs fork")
+def test_shared_model_is_built_once_before_the_workers_fork(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(OCR, "model_factory", staticmethod(build_model))
+    monkeypatch.setattr(OCR, "model", None)
+    builds.clear()
+
+    executor = ReviewExecutor(workers=2, kind="process", shared_model=True)
+    try:
+        assert builds == [os.getpid()]
+        parent_model = id(OCR.model)
+        pid, model, worker_builds = executor.submit(model_in_worker).result(timeout=60)
+    finally:
+        executor.shutdown()
+    # the worker uses the object it inherited instead of building its own
+    assert pid != os.getpid()
+    assert model == parent_model
+    assert worker_builds == [os.getpid()]
+
+
+def test_process_warmup_reaches_every_worker(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(OCR, "model_factory", staticmethod(build_model))
+    monkeypatch.setattr(OCR, "model", None)
+    monkeypatch.setattr(OCR, "warmed_up", False)
+
+    executor = ReviewExecutor(workers=3, kind="process")
+    try:
+        pids = [future.result(timeout=60) for future in executor.warmup()]
+        assert sorted(pids) == executor.worker_pids()
+    finally:
+        executor.shutdown()
+    # the workers warmed up on their own, the server process never loaded a model
+    assert OCR.model is None
+
+
+def test_submit_refuses_work_beyond_capacity() -> None:
+    release = threading.Event()
+    executor = ReviewExecutor(workers=1, queue_depth=1)
+    try:
+        running = [executor.submit(release.wait, 10), executor.submit(release.wait, 10)]
+        assert executor.in_flight == 2
+        with pytest.raises(QueueFullError):
+            executor.submit(release.wait, 10)
+        release.set()
+        for future in running:
+            future.result(timeout=10)
+    finally:
+        release.set()
+        executor.shutdown()
+    assert executor.in_flight == 0
+
+
+def test_review_answers_503_when_the_queue_is_full(monkeypatch: pytest.MonkeyPatch) -> None:
+    release = threading.Event()
+    executor = ReviewExecutor(workers=1, queue_depth=0)
+    monkeypatch.setattr(main, "get_executor", lambda: executor)
+    try:
+        busy = executor.submit(release.wait, 10)
+        response = TestClient(main.app).post(
+            "/review", files={"image_file": ("a.png", b"x"), "pdf_file": ("a.pdf", b"x")}
+        )
+        assert response.status_code == 503
+        assert int(response.headers["retry-after"]) >= 1
+        assert response.json()["decision"] == "Human Review"
+        release.set()
+        busy.result(timeout=10)
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_review_runs_off_the_event_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    seen: dict[str, object] = {}
+
+    def review_label(image_bytes: bytes, pdf_bytes: bytes) -> dict:
+        seen["thread"] = threading.current_thread().name
+        try:
+            asyncio.get_running_loop()
+            seen["loop"] = True
+        except RuntimeError:
+            seen["loop"] = False
+        return {"decision": "Human Review", "confidence": 0.0, "full_text": "", "findings": []}
+
+    executor = ReviewExecutor(workers=1, queue_depth=0)
+    monkeypatch.setattr(main, "get_executor", lambda: executor)
+    monkeypatch.setattr(main.pipeline, "review_label", review_label)
+    try:
+        response = TestClient(main.app).post(
+            "/review", files={"image_file": ("a.png", b"x"), "pdf_file": ("a.pdf", b"x")}
+        )
+    finally:
+        executor.shutdown()
+    assert response.status_code == 200
+    assert str(seen["thread"]).startswith("review")
+    assert seen["loop"] is False
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic.form510031_reader import TTBForm510031Reader
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.mark.parametrize("name", ["busch_application.pdf", "f510031.pdf"])
+def test_mapped_only_matches_full_extraction(name: str) -> None:
+    pdf_bytes = (FIXTURES / name).read_bytes()
+    full = TTBForm510031Reader(pdf_bytes)
+    mapped = TTBForm510031Reader(pdf_bytes, mapped_only=True)
+
+    assert mapped.get_values_by_field_mapping() == full.get_values_by_field_mapping()
+    assert set(mapped.pdf_fields) <= set(TTBForm510031Reader.PDF_TO_YAML_FIELD_MAPPING)
+    assert mapped.field_values == {name: full.field_values[name] for name in mapped.field_values}
+
+
+def test_mapped_only_reads_filled_values() -> None:
+    form = TTBForm510031Reader(FIXTURES / "busch_application.pdf", mapped_only=True)
+    assert form.get_value_by_field_mapping_name("Brand") == "Busch"
+    assert form.get_value_by_field_mapping_name("Product Type") == "Malt"
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import sys
+from concurrent.futures import Future
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import main
+from logic.ocr import OCR
+from logic.settings import Settings
+
+
+class StubModel:
+    def __call__(self, pages):
+        return None
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    monkeypatch.setattr(OCR, "model_factory", staticmethod(StubModel))
+    monkeypatch.setattr(OCR, "model", None)
+    monkeypatch.setattr(OCR, "warmed_up", False)
+    monkeypatch.setattr(main, "warmup_futures", [])
+    return TestClient(main.app)
+
+
+def use_settings(monkeypatch: pytest.MonkeyPatch, **overrides) -> None:
+    settings = replace(Settings(), **overrides)
+    monkeypatch.setattr(main, "get_settings", lambda: settings)
+
+
+def test_healthz_answers_before_the_model_loads(client: TestClient) -> None:
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert OCR.model is None
+
+
+def test_readyz_follows_the_warmup(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    use_settings(monkeypatch, ocr_warmup=True)
+    warmup = Future()
+    main.warmup_futures.append(warmup)
+    assert client.get("/readyz").status_code == 503
+
+    warmup.set_result(None)
+    assert client.get("/readyz").json() == {"status": "ready"}
+
+    failed = Future()
+    failed.set_exception(RuntimeError("no weights"))
+    main.warmup_futures.append(failed)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["findings"] == ["no weights"]
+
+
+def test_readyz_once_the_model_loads_lazily(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    use_settings(monkeypatch, ocr_warmup=True)
+    assert client.get("/readyz").status_code == 503
+    OCR.get_model()
+    assert isinstance(OCR.model, StubModel)
+    assert client.get("/readyz").status_code == 200
+
+
+def test_readyz_without_warmup(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    use_settings(monkeypatch, ocr_warmup=False)
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready", "warmup": "disabled"}
+    # nothing was loaded to answer that
+    assert OCR.model is None
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import io
+import sys
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import main
+from logic import jobs
+from logic.executor import ReviewExecutor
+from logic.jobs import JobNotFoundError, JobRunner, JobStore
+
+
+def archive(count: int) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as outer:
+        for n in range(count):
+            outer.writestr(f"{n}.zip", b"nested")
+        outer.writestr("notes.txt", b"not a package")
+    buffer.seek(0)
+    return buffer
+
+
+class StubReviews:
+    """Stands in for pipeline.review_package; packages listed in `hold` wait for `release`."""
+
+    def __init__(self, hold: tuple[str, ...] = ()) -> None:
+        self.reviewed: list[str] = []
+        self.hold = hold
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, package_name: str, nested_bytes: bytes) -> dict:
+        if package_name in self.hold:
+            self.started.set()
+            self.release.wait(10)
+        self.reviewed.append(package_name)
+        return {"decision": "Human Review", "findings": [], "package": package_name}
+
+
+@pytest.fixture
+def reviews(monkeypatch: pytest.MonkeyPatch) -> StubReviews:
+    stub = StubReviews()
+    executor = ReviewExecutor(workers=1, queue_depth=4)
+    monkeypatch.setattr(jobs, "get_executor", lambda: executor)
+    monkeypatch.setattr(jobs.pipeline, "review_package", stub)
+    yield stub
+    stub.release.set()
+    executor.shutdown()
+
+
+def wait_for(store: JobStore, job_id: str, *statuses: str) -> dict:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        progress = store.progress(job_id)
+        if progress["status"] in statuses:
+            return progress
+        time.sleep(0.02)
+    raise AssertionError(f"job still {progress['status']}")
+
+
+def test_job_runs_to_completion(tmp_path: Path, reviews: StubReviews) -> None:
+    store = JobStore(tmp_path)
+    created = store.create(archive(3), "batch.zip")
+    assert (created["status"], created["total"], created["pending"], created["done"]) == ("queued", 4, 3, 1)
+
+    runner = JobRunner(store)
+    try:
+        progress = wait_for(store, created["job_id"], "done")
+    finally:
+        runner.stop()
+    assert (progress["done"], progress["pending"]) == (4, 0)
+    assert [result["package"] for result in store.results(created["job_id"])] == ["0.zip", "1.zip", "2.zip", "notes.txt"]
+    assert [result["package"] for result in store.results(created["job_id"], offset=2)] == ["2.zip", "notes.txt"]
+    assert not (store.archives / f"{created['job_id']}.zip").exists()
+
+
+def test_cancel_skips_pending_packages(tmp_path: Path, reviews: StubReviews) -> None:
+    reviews.hold = ("0.zip",)
+    store = JobStore(tmp_path)
+    job_id = store.create(archive(4), "batch.zip")["job_id"]
+    runner = JobRunner(store)
+    try:
+        assert reviews.started.wait(10)
+        cancelled = store.cancel(job_id)
+        reviews.release.set()
+    finally:
+        runner.stop()
+
+    progress = store.progress(job_id)
+    assert cancelled["status"] == progress["status"] == "cancelled"
+    # the package that was already running keeps its result, the rest never ran
+    assert "0.zip" in reviews.reviewed and "3.zip" not in reviews.reviewed
+    assert progress["pending"] == 0 and progress["cancelled"] >= 2
+    assert not (store.archives / f"{job_id}.zip").exists()
+
+
+def test_new_store_and_runner_finish_a_half_done_job(tmp_path: Path, reviews: StubReviews) -> None:
+    before_restart = JobStore(tmp_path)
+    job_id = before_restart.create(archive(3), "batch.zip")["job_id"]
+    before_restart.mark_running(job_id)
+    before_restart.finish_package(job_id, 0, {"decision": "Reject", "package": "0.zip"})
+
+    store = JobStore(tmp_path)
+    runner = JobRunner(store)
+    try:
+        progress = wait_for(store, job_id, "done")
+    finally:
+        runner.stop()
+    assert sorted(reviews.reviewed) == ["1.zip", "2.zip"]
+    assert progress["pending"] == 0
+    assert store.results(job_id)[0] == {"decision": "Reject", "package": "0.zip"}
+
+
+def test_failing_job_leaves_no_pending_packages(tmp_path: Path, reviews: StubReviews) -> None:
+    store = JobStore(tmp_path)
+    job_id = store.create(archive(2), "batch.zip")["job_id"]
+    # the archive is gone, so the job can't be read
+    store.remove_archive(job_id)
+
+    runner = JobRunner(store)
+    try:
+        progress = wait_for(store, job_id, "failed")
+    finally:
+        runner.stop()
+    assert (progress["pending"], progress["failed"], progress["done"]) == (0, 2, 1)
+    results = store.results(job_id)
+    assert [result["package"] for result in results] == ["0.zip", "1.zip", "notes.txt"]
+    assert results[0]["findings"][0] == "Error Occurred"
+
+
+def test_job_endpoints(tmp_path: Path, reviews: StubReviews, monkeypatch: pytest.MonkeyPatch) -> None:
+    store = JobStore(tmp_path)
+    runner = JobRunner(store)
+    monkeypatch.setattr(main, "get_job_store", lambda: store)
+    monkeypatch.setattr(main, "notify_job_runner", runner.notify)
+    client = TestClient(main.app)
+    try:
+        submitted = client.post("/jobs", files={"zip_file": ("batch.zip", archive(2).getvalue())})
+        assert submitted.status_code == 202
+        job_id = submitted.json()["job_id"]
+        wait_for(store, job_id, "done")
+
+        assert client.get(f"/jobs/{job_id}").json()["done"] == 3
+        results = client.get(f"/jobs/{job_id}/results", params={"offset": 1}).json()
+        assert [result["package"] for result in results] == ["1.zip", "notes.txt"]
+
+        assert client.post("/jobs", files={"zip_file": ("batch.zip", b"not a zip")}).status_code == 400
+        # passes is_zipfile (the end record is intact) but its central directory is garbage
+        broken = archive(2).getvalue().replace(b"PK\x01\x02", b"XX\x01\x02")
+        assert client.post("/jobs", files={"zip_file": ("batch.zip", broken)}).status_code == 400
+        assert list(store.archives.iterdir()) == []
+        for response in (
+            client.get("/jobs/missing"),
+            client.get("/jobs/missing/results"),
+            client.post("/jobs/missing/cancel"),
+        ):
+            assert response.status_code == 404
+    finally:
+        runner.stop()
+    with pytest.raises(JobNotFoundError):
+        store.progress("missing")
+
+
+@pytest.mark.filterwarnings("ignore:Duplicate name")
+def test_entries_are_read_by_position_and_fail_on_their_own(
+    tmp_path: Path, reviews: StubReviews, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as outer:
+        outer.writestr("same.zip", b"first")
+        outer.writestr("same.zip", b"second")
+        outer.writestr("broken.zip", b"x" * 64)
+    data = bytearray(buffer.getvalue())
+    # corrupt the stored bytes of broken.zip so reading it fails its CRC check
+    start = data.index(b"x" * 64)
+    data[start:start + 64] = b"y" * 64
+
+    read: list[bytes] = []
+
+    def review_package(package_name: str, nested_bytes: bytes) -> dict:
+        read.append(nested_bytes)
+        return {"decision": "Human Review", "package": package_name}
+
+    monkeypatch.setattr(jobs.pipeline, "review_package", review_package)
+    store = JobStore(tmp_path)
+    job_id = store.create(io.BytesIO(bytes(data)), "batch.zip")["job_id"]
+    runner = JobRunner(store)
+    try:
+        progress = wait_for(store, job_id, "done", "failed")
+    finally:
+        runner.stop()
+    assert progress["status"] == "done"
+    assert read == [b"first", b"second"]
+    broken = store.results(job_id)[2]
+    assert broken["package"] == "broken.zip"
+    assert broken["findings"][0] == "Error Occurred"
+
+
+def test_stop_does_not_wait_for_a_full_executor(tmp_path: Path, reviews: StubReviews, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ReviewExecutor, "capacity", property(lambda self: 0))
+    monkeypatch.setattr(JobRunner, "POLL_SECONDS", 30.0)
+    store = JobStore(tmp_path)
+    job_id = store.create(archive(2), "batch.zip")["job_id"]
+    runner = JobRunner(store)
+    deadline = time.monotonic() + 10
+    while store.progress(job_id)["status"] != "running" and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    started = time.monotonic()
+    runner.stop()
+    assert time.monotonic() - started < 5
+    # nothing ran, the job resumes on the next start
+    assert store.progress(job_id)["pending"] == 2
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic.label_rules import Label, application_fields
+from logic.quantities import expected_alcohol, parse_alcohol, parse_volumes
+from logic.required_text import RequiredText
+from logic.text_index import TextIndex
+
+LABEL_TEXT = "\n".join(
+    [
+        "BUSCH",
+        "BEER",
+        "12 FL OZ 355 ML",
+        "5.0% ALC/VOL",
+        "Brewed by Anheuser-Busch, St. Louis, MO",
+    ]
+)
+
+
+def test_quantities_are_parsed_whatever_the_unit() -> None:
+    assert parse_volumes("12 fl. oz. 355ml") == [12 * 29.5735, 355.0]
+    assert parse_volumes("0,75 l") == [750.0]
+    assert parse_volumes("1 pint 8 fl oz") == [473.176 + 8 * 29.5735]
+    assert parse_volumes("12 large") == []
+    assert parse_alcohol("alc. 13.5 % by vol, 80 proof") == [13.5, 40.0]
+    assert expected_alcohol("5") == [5.0]
+
+
+def test_application_fields_are_checked_against_the_label() -> None:
+    index = TextIndex(LABEL_TEXT)
+    label = Label(
+        ocr=SimpleNamespace(get_index=lambda: index),
+        fields={
+            "Brand": "Busch",
+            "Name and Address": "Anheiser-Bunsch, Inc, St Louis, MO.",
+            "Net Contents": "355 mL",
+            "Alcohol Content": "5.5%",
+            "Country of Origin": None,
+        },
+        requirements=RequiredText(type="malt"),
+    )
+    rule = next(rule for rule in label.requirements.rules.rules if rule.name == "application_fields")
+
+    verdict = application_fields(rule, label)
+    fields = verdict.data["fields"]
+    assert not verdict.ok
+    assert verdict.detail == "Alcohol Content not matched on the label"
+    assert fields["Brand"]["status"] == "match"
+    # OCR-ish spelling differences and the company suffix don't count against the address
+    assert fields["Name and Address"]["status"] == "match"
+    assert fields["Net Contents"] == {"kind": "volume", "expected": "355 mL", "status": "match", "score": 100.0, "found": 355.0}
+    assert fields["Alcohol Content"]["found"] == 5.0
+    assert fields["Country of Origin"]["status"] == "not_provided"
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic.layout import Layout, estimate_text_height, plan_layout, restore_layout, tile_pages
+
+FIXTURES = ROOT / "tests" / "fixtures"
+
+
+def test_plan_layout_scales_toward_target_text_height() -> None:
+    # phone photo with big lettering: shrink, but keep 1024px on the long side
+    big = plan_layout((3000, 4000), 48.0)
+    assert big.shape == (1000, 1333) and not big.tiles
+    # small scan: enlarge up to 1024px, at most 2x
+    small = plan_layout((300, 400), 6.0)
+    assert small.scale == 2.0 and small.shape == (600, 800)
+    # already fine
+    assert not plan_layout((881, 1500), 16.0).resized
+
+
+def test_plan_layout_tiles_panoramic_labels() -> None:
+    layout = plan_layout((1500, 9000), 12.0)
+    assert layout.shape == (683, 4096)
+    assert 1 < len(layout.tiles) <= 8
+    xs = [(x0, x1) for x0, _, x1, _ in layout.tiles]
+    assert xs[0][0] == 0 and xs[-1][1] == 4096
+    # consecutive tiles overlap
+    assert all(a[1] > b[0] for a, b in zip(xs, xs[1:]))
+    pages = tile_pages(numpy.zeros((683, 4096, 3), dtype=numpy.uint8), layout)
+    assert [page.shape[1] for page in pages] == [x1 - x0 for x0, x1 in xs]
+
+
+def test_estimate_text_height_on_fixture() -> None:
+    gray = cv2.cvtColor(cv2.imread(str(FIXTURES / "busch.jpg")), cv2.COLOR_BGR2GRAY)
+    height = estimate_text_height(gray)
+    assert height is not None and 6 <= height <= 40
+    assert estimate_text_height(numpy.full((200, 200), 255, dtype=numpy.uint8)) is None
+
+
+def _tile_page(words: list[tuple[str, float, tuple[float, float, float, float]]], shape: tuple[int, int]):
+    from doctr.io.elements import Block, Line, Page, Word
+
+    return Page(
+        page=numpy.zeros((*shape, 3), dtype=numpy.uint8),
+        blocks=[Block([Line([Word(value, confidence, ((x0, y0), (x1, y1)), 0.9, {"value": 0, "confidence": None})
+                             for value, confidence, (x0, y0, x1, y1) in words])])],
+        page_idx=0,
+        dimensions=shape,
+    )
+
+
+def test_restore_layout_merges_tiles() -> None:
+    from doctr.io.elements import Document
+
+    # two 600px tiles over a 1000px wide working image, overlapping on x 400..600
+    layout = Layout(original_shape=(200, 2000), scale=0.5, shape=(100, 1000), tiles=((0, 0, 600, 100), (400, 0, 1000, 100)))
+    left = _tile_page([
+        ("GOVERNMENT", 0.9, (0.1, 0.4, 0.3, 0.6)),
+        ("WARNING", 0.6, (0.75, 0.4, 0.9, 0.6)),  # x 450..540, inside the overlap
+        ("CUT", 0.9, (0.95, 0.4, 1.0, 0.6)),  # touches the shared edge
+    ], (100, 600))
+    right = _tile_page([
+        ("WARNING:", 0.95, (0.085, 0.4, 0.235, 0.6)),  # same word, seen by the right tile
+        ("SURGEON", 0.9, (0.5, 0.4, 0.7, 0.6)),
+    ], (100, 600))
+    document = restore_layout(Document(pages=[left, right]), layout)
+
+    assert len(document.pages) == 1
+    page = document.pages[0]
+    assert page.dimensions == (200, 2000)
+    words = {word.value: word.geometry for block in page.blocks for line in block.lines for word in line.words}
+    assert set(words) == {"GOVERNMENT", "WARNING:", "SURGEON"}
+    # right tile x 0.5 -> working x 400 + 300 = 700 -> 0.7 of the page
+    assert numpy.allclose(words["SURGEON"], ((0.7, 0.4), (0.82, 0.6)))
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import main
+from logic.executor import ReviewExecutor
+from logic.metrics import ReviewMetrics
+from logic.timings import Timings
+
+
+def test_timings_accumulate_repeated_stages() -> None:
+    timings = Timings()
+    with timings.stage("rule.required_text"):
+        pass
+    timings.add("rule.required_text", 0.5)
+    timings.tag("ocr_path", "raw")
+
+    block = timings.as_dict()
+    assert block["stages"]["rule.required_text"] >= 500
+    assert block["tags"] == {"ocr_path": "raw"}
+    assert block["total_ms"] >= 0
+
+
+def test_record_review_folds_extra_stages_and_drops_block() -> None:
+    registry = ReviewMetrics()
+    response = {
+        "decision": "Reject",
+        "timings": {"total_ms": 100.0, "stages": {"ocr_pass_1": 80.0}, "tags": {"ocr_path": "raw+preprocessed"}},
+    }
+
+    kept = registry.record_review(dict(response), extra_stages={"request_read": 0.01}, keep_timings=True)
+    assert kept["timings"]["stages"]["request_read"] == 10.0
+    assert kept["timings"]["total_ms"] == 110.0
+
+    registry.record_review({"decision": "Human Review", "timings": {"total_ms": 1.0, "stages": {}, "tags": {"ocr_path": "raw"}}})
+    assert registry.preprocessing_retry_ratio() == 0.5
+
+    text = registry.render()
+    assert 'label_verification_decisions_total{decision="Reject"} 1' in text
+    assert 'label_verification_stage_seconds_count{stage="request_read"} 1' in text
+    assert "label_verification_preprocessing_retry_ratio 0.5" in text
+
+
+def test_record_review_without_timings_counts_decision() -> None:
+    registry = ReviewMetrics()
+    response = registry.record_review({"decision": "Human Review", "findings": ["Error Occurred"]})
+    assert "timings" not in response
+    assert registry.decisions.values == {(("decision", "Human Review"),): 1.0}
+
+
+def test_failed_and_busy_reviews_are_counted(monkeypatch: pytest.MonkeyPatch) -> None:
+    def review_label(image_bytes: bytes, pdf_bytes: bytes) -> dict:
+        raise ValueError("unreadable form")
+
+    registry = ReviewMetrics()
+    executor = ReviewExecutor(workers=1, queue_depth=0)
+    monkeypatch.setattr(main, "metrics", registry)
+    monkeypatch.setattr(main, "get_executor", lambda: executor)
+    monkeypatch.setattr(main.pipeline, "review_label", review_label)
+    client = TestClient(main.app)
+    files = {"image_file": ("a.png", b"x"), "pdf_file": ("a.pdf", b"x")}
+    try:
+        assert client.post("/review", files=files).json()["findings"][0] == "Error Occurred"
+        monkeypatch.setattr(ReviewExecutor, "capacity", property(lambda self: 0))
+        assert client.post("/review", files=files).status_code == 503
+    finally:
+        executor.shutdown()
+
+    text = registry.render()
+    assert 'label_verification_review_failures_total{endpoint="/review",outcome="error"} 1' in text
+    assert 'label_verification_review_failures_total{endpoint="/review",outcome="busy"} 1' in text
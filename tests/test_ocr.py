@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic import ocr as ocr_module
+from logic.ocr import OCR
+from logic.orientation import MIN_SKEW, deskew, estimate_skew
+
+FIXTURES = ROOT / "tests" / "fixtures"
+
+
+def synthetic_label(background: int = 255, ink: int = 0, noise: float = 0.0) -> numpy.ndarray:
+    canvas = numpy.full((400, 900, 3), background, dtype=numpy.uint8)
+    for row, line in enumerate(("GOVERNMENT WARNING: (1) ACCORDING TO THE SURGEON",
+                                "GENERAL WOMEN SHOULD NOT DRINK",
+                                "12 FL OZ 5.0% ALC/VOL")):
+        cv2.putText(canvas, line, (20, 80 + row * 70), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (ink, ink, ink), 2)
+    if noise:
+        grain = numpy.random.default_rng(0).normal(0, noise, canvas.shape)
+        canvas = numpy.clip(canvas + grain, 0, 255).astype(numpy.uint8)
+    return canvas
+
+
+def png(bgr: numpy.ndarray) -> bytes:
+    return cv2.imencode(".png", bgr)[1].tobytes()
+
+
+class RecordedPasses:
+    """Stands in for the model passes: records each one, and "reads" the label unless fail_raw."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, bool]] = []
+        self.fail_raw = False
+
+    def ocr_pass(self, ocr: OCR, pages, preprocessed: bool, stage: str = "ocr_pass_1"):
+        self.calls.append((stage, preprocessed))
+        return None if self.fail_raw and not preprocessed else "result"
+
+
+@pytest.fixture
+def passes(monkeypatch: pytest.MonkeyPatch) -> RecordedPasses:
+    recorder = RecordedPasses()
+    monkeypatch.setattr(OCR, "get_cache", classmethod(lambda cls: None))
+    monkeypatch.setattr(OCR, "ocr_pass", lambda self, *args, **kwargs: recorder.ocr_pass(self, *args, **kwargs))
+    return recorder
+
+
+def test_quality_estimate_flags_only_degraded_images() -> None:
+    ocr = OCR.__new__(OCR)
+    clean = ocr.estimate_image_quality(synthetic_label())
+    assert clean["preprocess"] is False and clean["reasons"] == []
+
+    degraded = ocr.estimate_image_quality(synthetic_label(background=120, ink=140, noise=12))
+    assert degraded["preprocess"] is True
+    assert set(degraded["reasons"]) >= {"low_contrast", "noisy"}
+
+
+def test_clean_label_takes_the_raw_path_in_one_pass(passes) -> None:
+    ocr = OCR(file_contents=png(synthetic_label()))
+    assert ocr.preprocessing_path == "raw"
+    assert passes.calls == [("ocr_pass_1", False)]
+    assert ocr.timings.as_dict()["tags"]["ocr_path"] == "raw"
+
+
+def test_degraded_label_goes_straight_to_preprocessing(passes) -> None:
+    ocr = OCR(file_contents=png(synthetic_label(background=120, ink=140, noise=12)))
+    assert ocr.preprocessing_path == "preprocessed"
+    assert passes.calls == [("ocr_pass_1", True)]
+    assert "preprocess" in ocr.timings.as_dict()["stages"]
+
+
+def test_raw_pass_failing_the_gate_is_retried_preprocessed(passes) -> None:
+    passes.fail_raw = True
+    ocr = OCR(file_contents=png(synthetic_label()))
+    assert ocr.preprocessing_path == "raw+preprocessed"
+    assert passes.calls == [("ocr_pass_1", False), ("ocr_pass_2", True)]
+
+
+def test_image_is_decoded_once_and_the_buffer_goes_to_the_model(monkeypatch: pytest.MonkeyPatch) -> None:
+    from doctr.io.elements import Document
+
+    contents = png(synthetic_label())
+    decoded: list[numpy.ndarray] = []
+    seen: list[list[numpy.ndarray]] = []
+    imdecode = cv2.imdecode
+
+    def counting_imdecode(buffer, flags):
+        image = imdecode(buffer, flags)
+        decoded.append(image)
+        return image
+
+    def round_trip(*args, **kwargs):
+        raise AssertionError("the decoded image was written back out")
+
+    def model(pages):
+        seen.append(pages)
+        # an empty result fails the quality gate, so the preprocessed pass runs too
+        return Document(pages=[])
+
+    monkeypatch.setattr(cv2, "imdecode", counting_imdecode)
+    monkeypatch.setattr(cv2, "imencode", round_trip)
+    monkeypatch.setattr(cv2, "imwrite", round_trip)
+    monkeypatch.setattr(tempfile, "NamedTemporaryFile", round_trip)
+    monkeypatch.setattr(OCR, "get_cache", classmethod(lambda cls: None))
+    monkeypatch.setattr(OCR, "batching", False)
+    monkeypatch.setattr(OCR, "batcher", None)
+    monkeypatch.setattr(OCR, "model", model)
+
+    ocr = OCR(file_contents=contents)
+    assert ocr.preprocessing_path == "raw+preprocessed"
+    assert len(decoded) == 1
+    assert len(seen) == 2
+    # the raw pass gets the decoded pixels themselves (converted to RGB in place), not a copy
+    assert numpy.shares_memory(seen[0][0], decoded[0])
+
+
+def test_large_tilted_photo_is_rotated_after_the_downscale(passes, monkeypatch: pytest.MonkeyPatch) -> None:
+    canvas = numpy.full((1500, 3200, 3), 255, dtype=numpy.uint8)
+    for row, line in enumerate(("GOVERNMENT WARNING: (1) ACCORDING TO", "THE SURGEON GENERAL WOMEN SHOULD",
+                                "NOT DRINK ALCOHOLIC BEVERAGES", "12 FL OZ 5.0% ALC/VOL")):
+        cv2.putText(canvas, line, (80, 300 + row * 280), cv2.FONT_HERSHEY_SIMPLEX, 3.2, (0, 0, 0), 8)
+    tilted = deskew(canvas, 8.0)
+    rotations: list[tuple[tuple[int, ...], tuple[int, ...]]] = []
+
+    def recording_deskew(bgr, angle, shape=None):
+        rotated = deskew(bgr, angle, shape)
+        rotations.append((bgr.shape[:2], rotated.shape[:2]))
+        return rotated
+
+    monkeypatch.setattr(ocr_module, "deskew", recording_deskew)
+    ocr = OCR(file_contents=png(tilted))
+
+    assert ocr.skew_angle == pytest.approx(-8.0, abs=1.0)
+    assert ocr.layout.scale < 0.5
+    # besides the thumbnail for the orientation classifier, one rotation, of the
+    # working-size image, straight to the planned shape
+    [(thumbnail_from, _), (rotated_from, rotated_to)] = rotations
+    assert max(thumbnail_from) <= 512
+    assert max(rotated_from) < max(tilted.shape[:2]) * 0.5
+    assert rotated_to == ocr.layout.shape
+
+
+class TurnedPages:
+    """Page orientation classifier with a fixed answer, recording the pages it was shown."""
+
+    def __init__(self, turn: int, confidence: float) -> None:
+        self.turn = turn
+        self.confidence = confidence
+        self.seen: list[numpy.ndarray] = []
+
+    def __call__(self, pages):
+        self.seen.extend(pages)
+        return [[2] * len(pages), [self.turn] * len(pages), [self.confidence] * len(pages)]
+
+
+def test_upside_down_fixture_is_turned_with_the_deskew(passes, monkeypatch: pytest.MonkeyPatch) -> None:
+    classifier = TurnedPages(180, 0.93)
+    angles: list[float] = []
+
+    def recording_deskew(bgr, angle, shape=None):
+        angles.append(angle)
+        return deskew(bgr, angle, shape)
+
+    monkeypatch.setattr(OCR, "orientation_model", classifier)
+    monkeypatch.setattr(ocr_module, "deskew", recording_deskew)
+    ocr = OCR(file_contents=(FIXTURES / "upside_down_angled.png").read_bytes())
+
+    # the classifier is shown the straightened thumbnail, so only the quarter turns are left to it
+    [thumbnail] = classifier.seen
+    assert max(thumbnail.shape[:2]) <= 600
+    assert abs(estimate_skew(cv2.cvtColor(thumbnail, cv2.COLOR_RGB2GRAY))) < MIN_SKEW
+    assert ocr.skew_angle == pytest.approx(-12.0, abs=1.0)
+    assert ocr.page_turn == 180
+    assert "OCR page orientation: turned +180 degrees (confidence 0.93)" in ocr.findings
+    # skew and turn are undone in the one rotation of the working image
+    assert angles == [ocr.skew_angle, pytest.approx(ocr.skew_angle + 180)]
+    assert "page_orientation" in ocr.timings.as_dict()["stages"]
+
+
+def test_unsure_page_orientation_is_left_alone(passes, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(OCR, "orientation_model", TurnedPages(180, 0.3))
+    ocr = OCR(file_contents=png(synthetic_label()))
+    assert ocr.page_turn == 0
+    assert "OCR page orientation: +180 degrees (confidence 0.30), left as is" in ocr.findings
+
+
+def test_quarter_turned_label_is_rotated_exactly(passes, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(OCR, "orientation_model", TurnedPages(-90, 0.99))
+    pages: list[numpy.ndarray] = []
+    monkeypatch.setattr(OCR, "model_input", lambda self, bgr: pages.append(bgr.copy()) or [bgr])
+
+    # wide enough to be OCRed at its own size
+    wide = cv2.copyMakeBorder(synthetic_label(), 0, 0, 0, 200, cv2.BORDER_CONSTANT, value=(255, 255, 255))
+    label = cv2.rotate(wide, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    ocr = OCR(file_contents=png(label))
+
+    assert ocr.page_turn == -90 and not ocr.layout.resized
+    assert numpy.array_equal(pages[0], cv2.rotate(label, cv2.ROTATE_90_CLOCKWISE))
+
+
+def test_pretrained_classifier_turns_the_upside_down_fixture(monkeypatch: pytest.MonkeyPatch) -> None:
+    try:
+        classifier = ocr_module.build_default_orientation_model()
+    except OSError as error:
+        pytest.skip(f"page orientation weights unavailable: {error}")
+    bgr = cv2.imread(str(FIXTURES / "upside_down_angled.png"))
+    straight = deskew(bgr, estimate_skew(cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)))
+    monkeypatch.setattr(OCR, "orientation_model", classifier)
+    turn, confidence = OCR.__new__(OCR).estimate_page_turn(cv2.cvtColor(straight, cv2.COLOR_BGR2RGB))
+    assert turn == 180 and confidence >= 0.5
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic.ocr_cache import OCRCache
+
+
+def test_cache_round_trip_survives_reopen(tmp_path: Path) -> None:
+    path = tmp_path / "ocr.sqlite3"
+    key = OCRCache.key(b"image-bytes", "model/1")
+    cache = OCRCache(path, max_bytes=1024 * 1024)
+    cache.put(key, {"export": {"pages": []}, "quality_metrics": {"ok": True}, "findings": ["OCR processing successful"]})
+    cache.close()
+
+    reopened = OCRCache(path, max_bytes=1024 * 1024)
+    assert reopened.get(key) == {
+        "export": {"pages": []},
+        "quality_metrics": {"ok": True},
+        "findings": ["OCR processing successful"],
+    }
+
+
+def test_cache_key_depends_on_version() -> None:
+    assert OCRCache.key(b"image-bytes", "model/1") != OCRCache.key(b"image-bytes", "model/2")
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = OCRCache(tmp_path / "ocr.sqlite3", max_bytes=1024 * 1024)
+    payload = {"export": {"blob": "x" * 200}}
+    cache.put("a", payload)
+    entry_size = cache.total_bytes()
+    cache.max_bytes = entry_size * 2
+
+    cache.put("b", payload)
+    assert cache.get("a") is not None  # "a" is now more recent than "b"
+    cache.put("c", payload)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import numpy
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic.ocr_result import OCRResult
+
+
+def _document(lines: list[tuple[tuple[float, float], list[tuple[str, float]]]]):
+    from doctr.io.elements import Block, Document, Line, Page, Word
+
+    built = []
+    for (x, y), words in lines:
+        built.append(Line([
+            Word(value, confidence, ((x + 0.05 * i, y), (x + 0.05 * i + 0.04, y + 0.02)), 0.9, {"value": 0, "confidence": None})
+            for i, (value, confidence) in enumerate(words)
+        ]))
+    page = Page(page=numpy.zeros((10, 10, 3), dtype=numpy.uint8), blocks=[Block(built)], page_idx=0, dimensions=(100, 200))
+    return Document(pages=[page])
+
+
+DOCUMENT_LINES = [
+    ((0.1, 0.5), [("SURGEON", 0.9), ("GENERAL", 0.8)]),
+    ((0.5, 0.1), [("LAGER", 0.95)]),
+    ((0.1, 0.1), [("BUSCH", 0.99), ("-", 0.3)]),
+    ((0.1, 0.8), [("FTSXZP", 0.4), ("", 0.9)]),
+]
+
+
+def test_render_text_in_reading_order() -> None:
+    result = OCRResult.from_document(_document(DOCUMENT_LINES))
+    assert len(result) == 7
+    assert result.render_text() == "BUSCH -\nLAGER\nSURGEON GENERAL\nFTSXZP"
+    assert result.render_text(min_word_conf=0.5, drop_single_char_below=0.5) == "BUSCH\nLAGER\nSURGEON GENERAL"
+
+
+def test_garbage_flags() -> None:
+    result = OCRResult.from_document(_document(DOCUMENT_LINES))
+    flagged = {word for word, garbage in zip(result.words(), result.garbage()) if garbage}
+    assert flagged == {"-", "FTSXZP", ""}
+
+
+def test_dict_round_trip() -> None:
+    result = OCRResult.from_document(_document(DOCUMENT_LINES))
+    restored = OCRResult.from_dict(json.loads(json.dumps(result.to_dict())))
+    assert restored.render_text() == result.render_text()
+    assert restored.dimensions == [(100, 200)]
+    assert numpy.allclose(restored.boxes, result.boxes)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic.orientation import deskew, estimate_skew, rotated_shape
+
+FIXTURES = ROOT / "tests" / "fixtures"
+
+
+def _gray(name: str) -> numpy.ndarray:
+    return cv2.cvtColor(cv2.imread(str(FIXTURES / name)), cv2.COLOR_BGR2GRAY)
+
+
+def test_estimate_skew_undoes_a_known_rotation() -> None:
+    gray = _gray("jackdaniels.png")
+    assert abs(estimate_skew(gray)) < 1.0
+    h, w = gray.shape
+    tilted = cv2.warpAffine(gray, cv2.getRotationMatrix2D((w / 2, h / 2), 12, 1.0), (w, h), borderValue=255)
+    assert abs(estimate_skew(tilted) + 12) <= 0.5
+
+
+def test_estimate_skew_on_angled_fixture() -> None:
+    assert abs(estimate_skew(_gray("upside_down_angled.png")) + 12) <= 1.0
+
+
+def test_estimate_skew_without_text() -> None:
+    assert estimate_skew(numpy.full((300, 400), 200, dtype=numpy.uint8)) is None
+
+
+def test_deskew_keeps_the_corners() -> None:
+    bgr = numpy.zeros((100, 200, 3), dtype=numpy.uint8)
+    rotated = deskew(bgr, 90.0)
+    assert rotated.shape == (200, 100, 3)
+    # quarter turns move pixels without resampling them
+    bgr[10:20, 30:60] = 255
+    assert numpy.array_equal(deskew(bgr, 180.0), cv2.rotate(bgr, cv2.ROTATE_180))
+    assert numpy.array_equal(deskew(bgr, -90.0), cv2.rotate(bgr, cv2.ROTATE_90_CLOCKWISE))
+    assert deskew(bgr, 10.0).shape[0] > 100 and deskew(bgr, 10.0).shape[1] > 200
+    assert deskew(bgr, 10.0).shape[:2] == rotated_shape(bgr.shape[:2], 10.0)
+    assert deskew(bgr, 10.0, shape=(60, 120)).shape == (60, 120, 3)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic import required_text
+from logic.required_text import RequiredText, load_rule_set
+
+
+def test_product_type_is_merged_with_all_entries() -> None:
+    requirements = RequiredText(type="malt")
+    assert "Beer" in requirements.as_type_list()
+    assert requirements.as_required_list()[-1].startswith("GOVERNMENT WARNING")
+    assert "Brand" in requirements.as_field_mapping_list()
+
+
+def test_unknown_type_only_gets_all_requirements() -> None:
+    requirements = RequiredText(type="cider")
+    assert requirements.as_type_list() == []
+    assert requirements.as_required_list() == RequiredText(type="all").as_required_list()
+
+
+def test_rule_set_is_compiled_once() -> None:
+    assert load_rule_set() is load_rule_set()
+
+
+def test_hot_reload_picks_up_changed_file(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(required_text, "HOT_RELOAD_INTERVAL", 0.0)
+    yaml_path = tmp_path / "required_text.yaml"
+    yaml_path.write_text("- type: malt\n  type_list: [Ale]\n", encoding="utf-8")
+    assert load_rule_set(yaml_path, hot_reload=True).for_type("malt").type_list == ("Ale",)
+
+    yaml_path.write_text("- type: malt\n  type_list: [Ale, Stout]\n", encoding="utf-8")
+    stat = yaml_path.stat()
+    os.utime(yaml_path, (stat.st_atime, stat.st_mtime + 10))
+    # without hot reload the compiled copy keeps being served
+    assert load_rule_set(yaml_path, hot_reload=False).for_type("malt").type_list == ("Ale",)
+    assert load_rule_set(yaml_path, hot_reload=True).for_type("malt").type_list == ("Ale", "Stout")
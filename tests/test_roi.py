@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic.ocr import OCR
+from logic.roi import RegionFirstPredictor, header_candidates
+from logic.timings import Timings
+
+PAGE_SHAPE = (400, 800)
+
+
+def _box(x0: int, y0: int, x1: int, y1: int) -> list[float]:
+    h, w = PAGE_SHAPE
+    return [x0 / w, y0 / h, x1 / w, y1 / h]
+
+
+# "BUSCH" (big), "GOVERNMENT" "WARNING:" on one line, then body text wrapping onto the next line
+WORDS = ["BUSCH", "GOVERNMENT", "WARNING:", "ACCORDING", "TO", "THE", "SURGEON", "GENERAL"]
+BOXES = numpy.array([
+    _box(300, 20, 500, 120),
+    _box(40, 200, 175, 215),
+    _box(180, 200, 280, 215),
+    _box(290, 200, 410, 215),
+    _box(415, 200, 440, 215),
+    _box(40, 222, 85, 237),
+    _box(90, 222, 190, 237),
+    _box(195, 222, 300, 237),
+])
+
+
+def test_header_pair_ranks_first() -> None:
+    pairs = header_candidates(BOXES, PAGE_SHAPE, limit=3)
+    assert tuple(pairs[0]) == (1, 2)
+    assert len(pairs) == 3
+
+
+def test_header_pair_across_line_break() -> None:
+    boxes = numpy.array([_box(600, 200, 735, 215), _box(40, 222, 140, 237), _box(145, 222, 260, 237)])
+    assert (0, 1) in {tuple(pair) for pair in header_candidates(boxes, PAGE_SHAPE)}
+
+
+class FakeModel:
+    """Detector returns BOXES, recogniser reads the word index painted into each crop."""
+
+    assume_straight_pages = True
+
+    def __init__(self) -> None:
+        from doctr.models.builder import DocumentBuilder
+
+        self.doc_builder = DocumentBuilder()
+        self.hooks = []
+        self.recognized: list[int] = []
+
+    def det_predictor(self, pages):
+        return [{"words": numpy.hstack([BOXES, numpy.full((len(BOXES), 1), 0.9)])}]
+
+    def reco_predictor(self, crops):
+        indexes = [int(crop[crop.shape[0] // 2, crop.shape[1] // 2, 0]) for crop in crops]
+        self.recognized.extend(indexes)
+        return [(self.words[i], 0.99) for i in indexes]
+
+    words = WORDS
+
+
+def _page() -> numpy.ndarray:
+    page = numpy.full((*PAGE_SHAPE, 3), 255, dtype=numpy.uint8)
+    h, w = PAGE_SHAPE
+    for index, (x0, y0, x1, y1) in enumerate(BOXES):
+        page[int(y0 * h):int(y1 * h), int(x0 * w):int(x1 * w)] = index
+    return page
+
+
+def test_region_first_recognizes_everything_once_header_found() -> None:
+    model = FakeModel()
+    document, stats = RegionFirstPredictor(model)([_page()])
+    assert stats["header_found"]
+    assert stats["recognized"] == stats["detected"] == len(WORDS)
+    assert sorted(model.recognized) == list(range(len(WORDS)))
+    assert "GOVERNMENT WARNING:" in document.render()
+
+
+def test_region_first_stops_after_candidates_without_header() -> None:
+    model = FakeModel()
+    model.words = ["BUSCH", "PREMIUM", "LAGER", *WORDS[3:]]
+    document, stats = RegionFirstPredictor(model, max_pairs=2)([_page()])
+    assert not stats["header_found"]
+    assert stats["recognized"] == stats["candidates"] < stats["detected"]
+    assert len(model.recognized) == stats["candidates"]
+
+
+def _noisy_candidates(count: int):
+    """Document of `count` low-confidence, garbage-looking words, like crops of a textured background."""
+    from doctr.io.elements import Block, Document, Line, Page, Word
+
+    words = [
+        Word("~~" if i % 2 else "XKCDZT", 0.4, ((i / 20, 0.1), (i / 20 + 0.04, 0.12)), 0.9, {"value": 0, "confidence": None})
+        for i in range(count)
+    ]
+    page = numpy.zeros((10, 10, 3), dtype=numpy.uint8)
+    return Document(pages=[Page(page=page, blocks=[Block([Line(words)])], page_idx=0, dimensions=(400, 800))])
+
+
+@pytest.mark.parametrize(("recognized", "kept"), [(16, True), (60, False)])
+def test_quality_gate_skips_a_region_first_pass_that_stopped_early(
+    monkeypatch: pytest.MonkeyPatch, recognized: int, kept: bool
+) -> None:
+    def run_model_region_first(self, pages, stage):
+        self.roi_stats = {
+            "detected": 60, "candidates": 16, "recognized": recognized,
+            "header_found": recognized == 60, "header_score": 40.0,
+        }
+        return _noisy_candidates(recognized)
+
+    monkeypatch.setattr(OCR, "use_region_first", lambda self: True)
+    monkeypatch.setattr(OCR, "run_model_region_first", run_model_region_first)
+    ocr = OCR.__new__(OCR)
+    ocr.timings, ocr.findings, ocr.layout = Timings(), [], None
+
+    result = ocr.ocr_pass([numpy.zeros((10, 10, 3), dtype=numpy.uint8)], preprocessed=False)
+    # 16 noisy candidates don't say the page was misread, so no preprocessed retry;
+    # a fully recognized page that reads like that still fails the gate
+    assert (result is not None) == kept
+    assert ocr.quality_metrics["partial"] == (recognized < 60)
+    assert ocr.quality_metrics["garbage_frac"] > 0.35
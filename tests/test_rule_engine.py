@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic.required_text import RequiredText, RuleSpec, load_rule_set
+from logic.rule_engine import Verdict, run_rules
+from logic.timings import Timings
+
+
+def spec(name: str, cost: float = 1.0, fatal: bool = False, depends_on: tuple[str, ...] = ()) -> RuleSpec:
+    return RuleSpec(name=name, check=name, cost=cost, fatal=fatal, depends_on=depends_on)
+
+
+def recording_checks(results: dict[str, bool], calls: list[str]) -> dict:
+    def make(name: str):
+        def check(rule: RuleSpec, context: object) -> Verdict:
+            calls.append(name)
+            return Verdict(results[name], 50.0, name)
+        return check
+    return {name: make(name) for name in results}
+
+
+def test_cheap_fatal_rules_run_first_and_a_reject_stops_the_run() -> None:
+    rules = [
+        spec("brand", cost=1),
+        spec("type", cost=5, fatal=True),
+        spec("warning", cost=1, fatal=True),
+        spec("statement", cost=2, fatal=True, depends_on=("warning",)),
+    ]
+    calls: list[str] = []
+    checks = recording_checks({"brand": True, "type": True, "warning": True, "statement": False}, calls)
+    timings = Timings()
+
+    outcomes = run_rules(rules, checks, None, timings=timings)
+    assert calls == ["warning", "statement"]
+    assert [(outcome.rule, outcome.status) for outcome in outcomes] == [
+        ("warning", "pass"), ("statement", "fail"), ("type", "skipped"), ("brand", "skipped"),
+    ]
+    assert set(timings.stages) == {"rule.warning", "rule.statement"}
+
+    calls.clear()
+    outcomes = run_rules(rules, checks, None, stop_on_reject=False)
+    # non-fatal rules only once no fatal rule is left
+    assert calls == ["warning", "statement", "type", "brand"]
+    assert outcomes[-1].status == "pass"
+
+
+def test_dependents_of_a_failed_rule_are_skipped_and_errors_are_outcomes() -> None:
+    def boom(rule: RuleSpec, context: object) -> Verdict:
+        raise RuntimeError("no text")
+
+    rules = [spec("header"), spec("statement", depends_on=("header",)), spec("other"), spec("typo")]
+    checks = {"header": lambda rule, context: Verdict(False), "statement": boom, "other": boom}
+    outcomes = {outcome.rule: outcome for outcome in run_rules(rules, checks, None)}
+    assert outcomes["statement"].status == "skipped"
+    assert outcomes["other"].status == "error"
+    assert outcomes["other"].detail == "Exception: no text"
+    assert outcomes["typo"].detail == "Unknown check 'typo'"
+
+
+def test_independent_rules_run_side_by_side() -> None:
+    barrier = threading.Barrier(3, timeout=5)
+
+    def meet(rule: RuleSpec, context: object) -> Verdict:
+        # only passes when all three rules are in flight at once
+        barrier.wait()
+        return Verdict(True)
+
+    rules = [spec("a"), spec("b"), spec("c")]
+    outcomes = run_rules(rules, {"a": meet, "b": meet, "c": meet}, None, max_workers=3)
+    assert [outcome.status for outcome in outcomes] == ["pass", "pass", "pass"]
+
+
+def test_rules_come_from_the_yaml_and_are_validated(tmp_path: Path) -> None:
+    rules = RequiredText(type="malt").rules.rules
+    assert [rule.name for rule in rules][:1] == ["government_warning"]
+    assert rules[0].params["text"] == "GOVERNMENT WARNING"
+
+    yaml_path = tmp_path / "required_text.yaml"
+    yaml_path.write_text(
+        "- type: all\n  rules:\n  - {name: a, depends_on: [b]}\n  - {name: b, depends_on: [a]}\n", encoding="utf-8"
+    )
+    with pytest.raises(ValueError, match="depends on itself"):
+        load_rule_set(yaml_path)
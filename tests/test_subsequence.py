@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import random
+import re
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic.subsequence import SubsequenceMatcher
+from logic.text_index import TextIndex
+
+
+def reference_contains(haystack: str, needle: str, case_sensitive: bool = False) -> bool:
+    # the character loop SubsequenceMatcher replaced
+    file_contents = re.sub(r"\s+", "", haystack)
+    search_text = re.sub(r"\s+", "", needle)
+    j = 0
+    for hay in file_contents:
+        if j >= len(search_text):
+            break
+        if not case_sensitive and hay.lower() == search_text[j].lower():
+            j += 1
+        elif hay == search_text[j]:
+            j += 1
+    return j == len(search_text)
+
+
+def test_matches_the_character_loop_on_random_text() -> None:
+    rng = random.Random(7)
+    alphabet = "abAB:.()[]^-\\ \n\t "
+    for _ in range(500):
+        haystack = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        needle = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))
+        for case_sensitive in (False, True):
+            found = SubsequenceMatcher(haystack, case_sensitive).contains(needle)
+            assert found == reference_contains(haystack, needle, case_sensitive), (haystack, needle, case_sensitive)
+
+
+def test_reports_where_each_needle_matched() -> None:
+    text = "BUSCH\nGOVERNMENT\nWARNING: (1) ACCORDING\nTO THE SURGEON GENERAL"
+    index = TextIndex(text)
+    spans = index.subsequence().find_all(["government warning:", "Surgeon General", "GOVERNMENT WARNING: (2)"])
+    assert spans[0] == (text.index("GOVERNMENT"), text.index(":") + 1)
+    assert text[spans[1][0]:spans[1][1]] == "SURGEON GENERAL"
+    assert spans[2] is None
+    assert index.subsequence(case_sensitive=True).find("government") is None
+    assert index.subsequence() is index.subsequence()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from rapidfuzz import fuzz
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from logic.text_index import TextIndex
+
+LABEL_TEXT = "\n".join(
+    [
+        "BUSCH",
+        "BEER",
+        "12 FL OZ 355 ML",
+        "GOVERNMENT WARNING: (1) ACCORDING TO THE SURGEON",
+        "GENERAL, WOMEN SHOULD NOT DRINK ALCOHOLIC",
+        "BEVERAGES DURING PREGNANCY",
+        "Anheuser-Busch, St. Louis, MO",
+    ]
+)
+
+
+def test_contains_matches_tokens_ignoring_case_and_punctuation() -> None:
+    index = TextIndex(LABEL_TEXT)
+    assert index.contains("government warning")
+    assert index.contains("anheuser busch st louis")
+    assert not index.contains("warning government")
+
+
+def test_fuzzy_score_agrees_with_full_text_scan_on_matches() -> None:
+    index = TextIndex(LABEL_TEXT)
+    for needle in ["GOVERNMENT WARNING", "GOVERMENT WARNNG", "SURGEON GENERAL", "Busch"]:
+        assert index.fuzzy_score(needle) == fuzz.partial_ratio(needle, LABEL_TEXT)
+
+
+def test_fuzzy_score_keeps_misses_below_threshold() -> None:
+    index = TextIndex(LABEL_TEXT)
+    assert index.fuzzy_score("Lager") <= 70
+    assert index.fuzzy_score("Chardonnay") <= 70
+
+
+def test_empty_text_scores_zero() -> None:
+    index = TextIndex("")
+    assert index.fuzzy_score("GOVERNMENT WARNING") == 0.0
+    assert not index.contains("GOVERNMENT WARNING")
+
+
+def test_best_matches_prefers_specific_designations() -> None:
+    index = TextIndex("OLD No. 7\nTENNESSEE\nSOUR MASH\nWHISKEY\nLight Whisky")
+    matches = index.best_matches(["Vodka", "Whisky", "Light Whisky", "Lager/Lager Beer"])
+    assert matches[0] == ("Light Whisky", 100.0)
+    assert ("Whisky", 100.0) in matches
+    assert all(name not in ("Vodka", "Lager/Lager Beer") for name, _ in matches)
+
+
+def test_best_matches_scores_alternative_spellings() -> None:
+    index = TextIndex("PREMIUM\nLAGER BEER\n12 FL OZ")
+    assert index.best_matches(["Lager/Lager Beer", "Stout"]) == [("Lager/Lager Beer", 100.0)]
+
+
+def test_token_scores_and_quantities() -> None:
+    index = TextIndex(LABEL_TEXT)
+    scores = index.token_scores(["busch", "anheiser", "chardonnay"])
+    assert scores["busch"] == 100.0
+    assert scores["anheiser"] == fuzz.ratio("anheiser", "anheuser")
+    assert scores["chardonnay"] < 70
+    assert index.quantities().volumes == (12 * 29.5735, 355.0)
+    assert index.quantities() is index.quantities()